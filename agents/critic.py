@@ -1,5 +1,6 @@
 # agents/critic.py
 from brain.model import ask_llm
+from brain.usage import usage_tags
 
 CRITIC_PROMPT = """
 You are the CRITIC agent.
@@ -23,6 +24,7 @@ ANSWER TO CRITIQUE:
 {answer}
 """
 
+@usage_tags(call_site="critic")
 def critique(answer: str) -> str:
     prompt = CRITIC_PROMPT.format(answer=answer)
     return ask_llm(prompt)
@@ -3,6 +3,9 @@ import json
 import logging
 from typing import Dict, Any, List
 from brain.model import ask_llm
+from brain.usage import usage_tags
+from brain.structured import JSONObjectExtractor, parse_json_object
+from api.schema import FailureAnalysis
 
 # Initialize logger
 logger = logging.getLogger(__name__)
@@ -30,6 +33,7 @@ RULES:
 - Return ONLY valid JSON.
 """
 
+@usage_tags(call_site="failure_analyzer")
 def analyze_failure(plan: Any, execution_result: Dict[str, Any], verdict: Dict[str, Any]) -> Dict[str, Any]:
     """
     Analyzes a rejected plan to determine why it failed.
@@ -67,17 +71,8 @@ def analyze_failure(plan: Any, execution_result: Dict[str, Any], verdict: Dict[s
     )
 
     try:
-        response = ask_llm(prompt)
-        
-        # Parse JSON
-        clean_json = response.strip()
-        if clean_json.startswith("```json"):
-            clean_json = clean_json[7:]
-        if clean_json.endswith("```"):
-            clean_json = clean_json[:-3]
-            
-        data = json.loads(clean_json.strip())
-        return data
+        response = ask_llm(prompt, stop_when=JSONObjectExtractor)
+        return parse_json_object(response, FailureAnalysis).model_dump()
 
     except Exception as e:
         logger.error(f"Failure Analyzer failed: {e}")
@@ -1,11 +1,15 @@
 # agents/planner.py
 import json
 import logging
+import threading
+from collections import OrderedDict
 from datetime import datetime
 from typing import Dict, Any, Optional
 
 from sqlalchemy.orm import Session
-from brain.model import ask_llm
+from brain.model import LLMConversation
+from brain.structured import JSONObjectExtractor, parse_json_object
+from brain.usage import usage_tags
 from api.database import SessionLocal
 from api.models import PlannerLog
 from api.schema import PlannerOutput, PlannerStep
@@ -23,6 +27,14 @@ ALLOWED_ACTIONS = {
     "respond_user"
 }
 
+PLANNER_VERSION = "v1.1"
+
+# Cosine similarity above which a near-identical request reuses a cached plan
+# (semantic cache tier, LLM_SEMANTIC_CACHE=true). Plans are action-specific, so keep it strict.
+SEMANTIC_CACHE_THRESHOLD = 0.95
+
+# Static prefix: identical for every task, so Ollama can reuse its KV cache.
+# Anything that varies per call goes in PLANNER_REQUEST_PROMPT, after it.
 PLANNER_SYSTEM_PROMPT = """
 You are the WEION Planner Agent.
 Your job is to decide WHAT actions are required to fulfill the user's request.
@@ -44,32 +56,61 @@ RULES:
     }}
   ]
 }}
+""".format(allowed_actions=", ".join(sorted(ALLOWED_ACTIONS)))
+
+PLANNER_REQUEST_PROMPT = "USER REQUEST: {task}"
+
+# Recent planning conversations, keyed by (task, context), so a replan for the same
+# task continues the conversation and only sends the failure analysis
+MAX_TRACKED_CONVERSATIONS = 32
+_conversations: "OrderedDict[tuple, LLMConversation]" = OrderedDict()
+_conversations_lock = threading.Lock()
 
-USER REQUEST: {task}
-"""
+def _remember_conversation(task: str, context: Optional[str], conversation: LLMConversation):
+    with _conversations_lock:
+        _conversations[(task, context)] = conversation
+        _conversations.move_to_end((task, context))
+        while len(_conversations) > MAX_TRACKED_CONVERSATIONS:
+            _conversations.popitem(last=False)
+
+def _recall_conversation(task: str, context: Optional[str]) -> Optional[LLMConversation]:
+    with _conversations_lock:
+        return _conversations.pop((task, context), None)
+
+def _format_request(task: str, context: Optional[str]) -> str:
+    request = PLANNER_REQUEST_PROMPT.format(task=task)
+    if context:
+        request += f"\nCONTEXT: {context}"
+    return request
 
 def make_plan(task: str, context: Optional[str] = None) -> PlannerOutput:
     """
     Generates a structured plan for the given task.
     Enforces JSON schema and logs execution to DB.
     """
+    conversation = LLMConversation(
+        system=PLANNER_SYSTEM_PROMPT,
+        template_version=PLANNER_VERSION,
+        semantic_threshold=SEMANTIC_CACHE_THRESHOLD
+    )
+    plan = _run_planner(task, conversation, _format_request(task, context))
+    _remember_conversation(task, context, conversation)
+    return plan
+
+@usage_tags(call_site="planner")
+def _run_planner(task: str, conversation: LLMConversation, message: str) -> PlannerOutput:
+    """
+    Asks the planner conversation for a plan, validating and retrying in-conversation:
+    a retry only sends the error, not the whole prompt again.
+    """
     db = SessionLocal()
     planner_log = PlannerLog(
         user_input=task,
         timestamp=datetime.now().isoformat(),
-        planner_version="v1.0"
+        planner_version=PLANNER_VERSION
     )
     
     try:
-        # Construct Prompt
-        actions_list = ", ".join(sorted(ALLOWED_ACTIONS))
-        prompt = PLANNER_SYSTEM_PROMPT.format(
-            allowed_actions=actions_list,
-            task=task
-        )
-        if context:
-            prompt += f"\nCONTEXT: {context}"
-
         # LLM Call with Retries
         attempts = 0
         max_retries = 2
@@ -79,21 +120,10 @@ def make_plan(task: str, context: Optional[str] = None) -> PlannerOutput:
 
         while attempts <= max_retries:
             try:
-                raw_response = ask_llm(prompt)
-                
-                # Clean generic markdown code blocks if present
-                clean_json = raw_response.strip()
-                if clean_json.startswith("```json"):
-                    clean_json = clean_json[7:]
-                if clean_json.endswith("```"):
-                    clean_json = clean_json[:-3]
-                clean_json = clean_json.strip()
-
-                # Parse JSON
-                parsed_data = json.loads(clean_json)
+                raw_response = conversation.ask(message, stop_when=JSONObjectExtractor)
                 
-                # Pydantic Validation
-                validated_plan = PlannerOutput(**parsed_data)
+                # Extract, repair and validate the plan object
+                validated_plan = parse_json_object(raw_response, PlannerOutput)
                 
                 # Logical Validation (Action Whitelist)
                 for step in validated_plan.steps:
@@ -112,7 +142,7 @@ def make_plan(task: str, context: Optional[str] = None) -> PlannerOutput:
                 error_reason = str(e)
                 logger.warning(f"Planner validation failed (Request: {attempts}): {e}")
                 if attempts <= max_retries:
-                    prompt += f"\n\nERROR: Previous response was invalid JSON or violated schema. Fix this error: {e}"
+                    message = f"ERROR: Previous response was invalid JSON or violated schema. Fix this error: {e}"
         
         # Handling Failure after Retries
         if not validated_plan:
@@ -159,7 +189,8 @@ def make_plan(task: str, context: Optional[str] = None) -> PlannerOutput:
 def make_replan(task: str, context: Optional[str], failure_analysis: Dict[str, Any]) -> PlannerOutput:
     """
     Generates a corrected plan based on failure analysis.
-    wraps make_plan but injects failure context.
+    Continues the original planning conversation when it is still known, so only the
+    failure analysis is sent; otherwise plans from scratch with the failure in context.
     """
     failure_msg = f"""
     [PREVIOUS PLAN REJECTED]
@@ -170,10 +201,17 @@ def make_replan(task: str, context: Optional[str], failure_analysis: Dict[str, A
     INSTRUCTION: Generate a NEW plan that implements these fixes.
     """
     
-    full_context = f"{context}\n{failure_msg}" if context else failure_msg
+    conversation = _recall_conversation(task, context)
+    if conversation is not None:
+        message = failure_msg
+    else:
+        conversation = LLMConversation(system=PLANNER_SYSTEM_PROMPT, template_version=PLANNER_VERSION)
+        full_context = f"{context}\n{failure_msg}" if context else failure_msg
+        message = _format_request(task, full_context)
     
     # Generate new plan
-    new_plan = make_plan(task, context=full_context)
+    new_plan = _run_planner(task, conversation, message)
+    _remember_conversation(task, context, conversation)
     
     # Penalize confidence for retry
     if new_plan:
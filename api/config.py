@@ -4,6 +4,41 @@ import os
 
 OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "qwen2.5:7b")
 OLLAMA_TIMEOUT = int(os.getenv("OLLAMA_TIMEOUT", "120"))
+OLLAMA_HOST = os.getenv("OLLAMA_HOST", "http://127.0.0.1:11434")
+OLLAMA_CONNECT_TIMEOUT = float(os.getenv("OLLAMA_CONNECT_TIMEOUT", "5"))
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")  # How long Ollama keeps the model loaded
+OLLAMA_POOL_SIZE = int(os.getenv("OLLAMA_POOL_SIZE", "8"))  # Idle keep-alive connections kept per host
+
+# Several Ollama boxes: comma-separated hosts, load-balanced by brain.llm_pool (overrides OLLAMA_HOST)
+OLLAMA_HOSTS = [h.strip() for h in os.getenv("OLLAMA_HOSTS", "").split(",") if h.strip()]
+LLM_HEDGE = os.getenv("LLM_HEDGE", "false").lower() == "true"  # Re-issue slow calls to a second host
+LLM_HEDGE_AFTER = float(os.getenv("LLM_HEDGE_AFTER", "0"))  # Seconds before hedging, 0 = host's observed p95
+LLM_BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", "3"))  # Consecutive failures that open a host's circuit
+LLM_BREAKER_COOLDOWN = float(os.getenv("LLM_BREAKER_COOLDOWN", "30"))  # Seconds before a half-open probe
+LLM_HEALTH_INTERVAL = float(os.getenv("LLM_HEALTH_INTERVAL", "15"))  # Seconds between host pings, 0 = off
+
+# ================== LLM SCHEDULING ==================
+
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "2"))  # Generations allowed in flight at once
+LLM_STREAM_TO_LOGS = os.getenv("LLM_STREAM_TO_LOGS", "false").lower() == "true"  # Forward agent tokens to /ws/logs
+
+# ================== LLM BACKEND ==================
+
+LLM_BACKEND = os.getenv("LLM_BACKEND", "ollama")  # ollama | record | replay | fake
+LLM_CASSETTE = os.getenv("LLM_CASSETTE", "logs/llm_cassette.jsonl.gz")  # Used by record / replay
+LLM_REPLAY_LATENCY = float(os.getenv("LLM_REPLAY_LATENCY", "0"))  # Fraction of recorded latency to simulate
+
+# ================== DATABASE ==================
+
+DB_PROFILE = os.getenv("DB_PROFILE", "production")  # production (WAL + tuned pragmas) | default (SQLite defaults)
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")  # Readers never block the writer
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")  # In WAL: no fsync per commit, still corruption-safe
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "10000"))  # Wait for the write lock instead of "database is locked"
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))  # Bytes of the file read through mmap
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", "16384"))  # Page cache per connection
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", str(min(32, (os.cpu_count() or 1) + 4))))  # Matches the default thread pool
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "8"))  # Extra connections allowed under bursts
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))  # Seconds to wait for a free connection
 
 # ================== APP CONFIG ==================
 
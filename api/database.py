@@ -1,8 +1,25 @@
-from sqlalchemy import create_engine
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, List, Optional, Tuple
+
+from sqlalchemy import create_engine, event, inspect, text
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import QueuePool
 import os
 
+from api.config import (
+    DB_MAX_OVERFLOW,
+    DB_POOL_SIZE,
+    DB_POOL_TIMEOUT,
+    DB_PROFILE,
+    SQLITE_BUSY_TIMEOUT_MS,
+    SQLITE_CACHE_SIZE_KB,
+    SQLITE_JOURNAL_MODE,
+    SQLITE_MMAP_SIZE,
+    SQLITE_SYNCHRONOUS,
+)
+
 # Create data directory if not exists
 DATA_DIR = "data"
 if not os.path.exists(DATA_DIR):
@@ -10,9 +27,45 @@ if not os.path.exists(DATA_DIR):
 
 SQLALCHEMY_DATABASE_URL = f"sqlite:///{DATA_DIR}/weion.db"
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-)
+# ================= ENGINE PROFILE =================
+
+def sqlite_pragmas(profile: str = DB_PROFILE) -> List[Tuple[str, Any]]:
+    """PRAGMAs run on every new connection for the given profile ("default" = none)."""
+    if profile != "production":
+        return []
+    return [
+        ("journal_mode", SQLITE_JOURNAL_MODE),
+        ("synchronous", SQLITE_SYNCHRONOUS),
+        ("busy_timeout", SQLITE_BUSY_TIMEOUT_MS),
+        ("mmap_size", SQLITE_MMAP_SIZE),
+        ("cache_size", -SQLITE_CACHE_SIZE_KB),  # Negative = KiB rather than pages
+        ("temp_store", "MEMORY"),
+    ]
+
+def create_db_engine(url: str = SQLALCHEMY_DATABASE_URL, profile: str = DB_PROFILE):
+    """
+    Engine with the SQLite profile applied to each pooled connection. The pool keeps one
+    connection per worker thread, so requests never wait on connect().
+    """
+    pragmas = sqlite_pragmas(profile)
+    kwargs = {}
+    if ":memory:" not in url and url != "sqlite://":
+        kwargs = dict(poolclass=QueuePool, pool_size=DB_POOL_SIZE,
+                      max_overflow=DB_MAX_OVERFLOW, pool_timeout=DB_POOL_TIMEOUT)
+    new_engine = create_engine(url, connect_args={"check_same_thread": False}, **kwargs)
+
+    @event.listens_for(new_engine, "connect")
+    def _apply_pragmas(dbapi_conn, _record):
+        cursor = dbapi_conn.cursor()
+        try:
+            for name, value in pragmas:
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+    return new_engine
+
+engine = create_db_engine(SQLALCHEMY_DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
@@ -23,3 +76,60 @@ def get_db():
         yield db
     finally:
         db.close()
+
+# ================= UNIT OF WORK =================
+
+_current_session: ContextVar[Optional[Session]] = ContextVar("current_session", default=None)
+
+@contextmanager
+def session_scope():
+    """
+    One session (and one pooled connection) per unit of work. Nested scopes in the same
+    thread / task join the outermost one, so helpers called during a decision share its
+    transaction instead of each checking out a connection. The outermost scope commits on
+    success, rolls back on error and always closes. Loaded objects stay usable afterwards.
+    A joined scope's writes commit (or roll back) with the outer one; errors propagate to it.
+    A helper that catches its own write errors must write inside db.begin_nested(), so a
+    failed flush rolls back only that savepoint and leaves the shared session usable.
+    """
+    current = _current_session.get()
+    if current is not None:
+        yield current
+        return
+
+    db = SessionLocal(expire_on_commit=False)
+    token = _current_session.set(db)
+    try:
+        yield db
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        _current_session.reset(token)
+        db.close()
+
+def add_missing_columns(conn, table) -> List[str]:
+    """
+    Creates `table` if absent, else ALTERs in the declared columns it lacks (create_all
+    only creates missing tables). New columns must be nullable or have a default.
+    Returns the names of the added columns.
+    """
+    inspector = inspect(conn)
+    if not inspector.has_table(table.name):
+        table.create(bind=conn)
+        return []
+
+    existing = {c["name"] for c in inspector.get_columns(table.name)}
+    added = []
+    for column in table.columns:
+        if column.name not in existing:
+            ddl = column.type.compile(dialect=conn.dialect)
+            conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {ddl}"))
+            added.append(column.name)
+    return added
+
+def ensure_columns(model):
+    """add_missing_columns for one model, in its own transaction."""
+    with engine.begin() as conn:
+        add_missing_columns(conn, model.__table__)
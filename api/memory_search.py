@@ -0,0 +1,220 @@
+import base64
+import json
+import logging
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import text, tuple_
+from sqlalchemy.orm import Session
+
+from api.models import Memory
+
+# Initialize logger
+logger = logging.getLogger(__name__)
+
+# ================= CONFIG =================
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+TITLE_WEIGHT = 10.0   # bm25 column weight of title vs. context (1.0)
+
+# ================= FTS5 INDEX =================
+#
+# memories_fts is an external-content FTS5 table over memories.title / memories.context,
+# keyed by the memories rowid and kept in sync by triggers, so every writer (ORM, raw SQL,
+# other processes) updates it. The text is not stored twice.
+
+_FTS_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS memories_fts USING fts5(
+        title, context, content='memories', content_rowid='rowid',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS memories_fts_ai AFTER INSERT ON memories BEGIN
+        INSERT INTO memories_fts(rowid, title, context) VALUES (new.rowid, new.title, new.context);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS memories_fts_ad AFTER DELETE ON memories BEGIN
+        INSERT INTO memories_fts(memories_fts, rowid, title, context) VALUES ('delete', old.rowid, old.title, old.context);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS memories_fts_au AFTER UPDATE OF title, context ON memories BEGIN
+        INSERT INTO memories_fts(memories_fts, rowid, title, context) VALUES ('delete', old.rowid, old.title, old.context);
+        INSERT INTO memories_fts(rowid, title, context) VALUES (new.rowid, new.title, new.context);
+    END
+    """,
+]
+
+def create_memory_search(conn):
+    """
+    Creates the keyset indexes, the FTS5 table and its triggers on a connection (idempotent).
+    A newly created index is filled from the existing rows.
+    """
+    for index in Memory.__table__.indexes:
+        index.create(bind=conn, checkfirst=True)
+
+    existed = conn.execute(text("SELECT 1 FROM sqlite_master WHERE name = 'memories_fts'")).first() is not None
+    for ddl in _FTS_DDL:
+        conn.execute(text(ddl))
+    if not existed:
+        conn.execute(text("INSERT INTO memories_fts(memories_fts) VALUES ('rebuild')"))
+        logger.info("Built memories full-text index")
+
+def ensure_memory_search(bind):
+    """create_memory_search in its own transaction (the server runs it as a migration)."""
+    with bind.begin() as conn:
+        create_memory_search(conn)
+
+def rebuild_memory_search(bind):
+    """Re-indexes every memory (e.g. after a VACUUM, which may renumber rowids)."""
+    with bind.begin() as conn:
+        conn.execute(text("INSERT INTO memories_fts(memories_fts) VALUES ('rebuild')"))
+
+def fts_query(q: str) -> Optional[str]:
+    """
+    User text -> FTS5 MATCH expression: every word must match (as a quoted phrase, so
+    FTS syntax characters in the input are inert). "word*" matches as a prefix; that
+    merges every matching term's doclist, so it is opt-in.
+    """
+    terms = [f'"{word}"{star}' for word, star in re.findall(r"(\w+)(\*?)", q or "")]
+    return " ".join(terms) or None
+
+# ================= CURSORS =================
+
+SORTS = ("recent", "relevance")
+
+def encode_cursor(key: List[Any]) -> str:
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str, sort: str) -> List[Any]:
+    """
+    Cursor -> the two-value key of the next page; it must come from the same sort.
+    recent: [timestamp, id] of the last row served. relevance: [offset, snapshot rowid].
+    """
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+    if not isinstance(key, list) or len(key) != 3 or key[0] != sort:
+        raise ValueError("Invalid cursor")
+    return key[1:]
+
+# ================= SEARCH =================
+
+def _to_dict(row) -> Dict[str, Any]:
+    tasks = row.tasks
+    if isinstance(tasks, str):
+        tasks = json.loads(tasks)
+    return {
+        "id": row.id,
+        "title": row.title,
+        "context": row.context,
+        "org_id": row.org_id,
+        "tasks": tasks or [],
+        "timestamp": row.timestamp,
+    }
+
+def _match_page(db: Session, sort: str, conditions: List[str], params: Dict[str, Any], after) -> Tuple[List, Optional[List]]:
+    """One page of full-text matches and the cursor key of the next page (None on the last)."""
+    limit = params["limit"] - 1
+    if sort == "relevance":
+        # bm25 has to score (and rank) every match anyway, so an offset costs nothing extra.
+        # Scores are not a stable key: every insert changes IDF and moves them all. Pages
+        # are cut from the snapshot of rows that existed at the first page instead.
+        if after:
+            offset, snapshot = int(after[0]), int(after[1])
+        else:
+            offset, snapshot = 0, db.execute(text("SELECT COALESCE(MAX(rowid), 0) FROM memories")).scalar()
+        conditions.append("m.rowid <= :snapshot")
+        params.update(offset=offset, snapshot=snapshot)
+        rows = db.execute(text(f"""
+            WITH hits AS (
+                SELECT rowid, bm25(memories_fts, {TITLE_WEIGHT}, 1.0) AS score
+                FROM memories_fts WHERE memories_fts MATCH :match
+            )
+            SELECT m.id, m.title, m.context, m.org_id, m.tasks, m.timestamp, hits.score AS score
+            FROM hits JOIN memories m ON m.rowid = hits.rowid
+            WHERE {" AND ".join(conditions)}
+            ORDER BY hits.score, m.id
+            LIMIT :limit OFFSET :offset
+        """), params).fetchall()
+        return rows, [offset + limit, snapshot] if len(rows) > limit else None
+
+    # Same order as the unfiltered listing (newest timestamp first), so imported or
+    # backdated memories rank the same with or without a query; this sorts every match
+    if after:
+        conditions.append("(m.timestamp, m.id) < (:after_ts, :after_id)")
+        params.update(after_ts=str(after[0]), after_id=str(after[1]))
+    rows = db.execute(text(f"""
+        SELECT m.id, m.title, m.context, m.org_id, m.tasks, m.timestamp
+        FROM memories_fts f JOIN memories m ON m.rowid = f.rowid
+        WHERE {" AND ".join(["memories_fts MATCH :match"] + conditions)}
+        ORDER BY m.timestamp DESC, m.id DESC
+        LIMIT :limit
+    """), params).fetchall()
+    return rows, [rows[limit - 1].timestamp, rows[limit - 1].id] if len(rows) > limit else None
+
+def search_memories(
+    db: Session,
+    q: Optional[str] = None,
+    org_id: Optional[int] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None,
+    sort: str = "recent",
+) -> Dict[str, Any]:
+    """
+    One page of memories and the cursor of the next one (None on the last page).
+    - Without q: newest first, walking the ((org_id,) timestamp, id) index.
+    - With q: full-text matches over title/context, newest first like the listing
+      (sort="relevance": best bm25 score first).
+    Keyset pagination on (timestamp, id): a page costs the same wherever it is in the table.
+    Relevance pages are offsets into the matches that existed at the first page, so rows
+    written while paging neither shift nor join the ranking (start over to see them).
+    since / until: ISO timestamps (inclusive / exclusive).
+    Raises ValueError for an unknown sort or a malformed cursor.
+    """
+    if sort not in SORTS:
+        raise ValueError(f"sort must be one of {', '.join(SORTS)}")
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    after = decode_cursor(cursor, sort) if cursor else None
+    match = fts_query(q) if q else None
+
+    if q and not match:
+        return {"items": [], "next_cursor": None, "limit": limit}
+
+    if match:
+        conditions = []
+        params: Dict[str, Any] = {"match": match, "limit": limit + 1}
+        if org_id is not None:
+            conditions.append("m.org_id = :org_id")
+            params["org_id"] = org_id
+        if since:
+            conditions.append("m.timestamp >= :since")
+            params["since"] = since
+        if until:
+            conditions.append("m.timestamp < :until")
+            params["until"] = until
+        rows, next_key = _match_page(db, sort, conditions, params, after)
+        items = [{**_to_dict(row), "score": row.score} if sort == "relevance" else _to_dict(row) for row in rows[:limit]]
+    else:
+        query = db.query(Memory.id, Memory.title, Memory.context, Memory.org_id, Memory.tasks, Memory.timestamp)
+        if org_id is not None:
+            query = query.filter(Memory.org_id == org_id)
+        if since:
+            query = query.filter(Memory.timestamp >= since)
+        if until:
+            query = query.filter(Memory.timestamp < until)
+        if after:
+            query = query.filter(tuple_(Memory.timestamp, Memory.id) < (str(after[0]), str(after[1])))
+        rows = query.order_by(Memory.timestamp.desc(), Memory.id.desc()).limit(limit + 1).all()
+        items = [_to_dict(row) for row in rows[:limit]]
+        next_key = [rows[limit - 1].timestamp, rows[limit - 1].id] if len(rows) > limit else None
+
+    next_cursor = encode_cursor([sort, *next_key]) if next_key else None
+    return {"items": items, "next_cursor": next_cursor, "limit": limit}
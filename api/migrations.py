@@ -0,0 +1,128 @@
+# api/migrations.py
+
+import logging
+import sys
+from datetime import datetime
+from typing import Callable, List, NamedTuple
+
+from sqlalchemy import Index, inspect, text
+
+from api import models  # noqa: F401  (registers every table on Base.metadata)
+from api.database import Base, add_missing_columns, engine
+from api.memory_search import create_memory_search
+
+# Initialize logger
+logger = logging.getLogger(__name__)
+
+# ================= SCHEMA VERSION =================
+#
+# Every migration runs once per database, in version order, and is recorded in
+# schema_migrations. A run holds SQLite's write lock (BEGIN IMMEDIATE) and DDL is
+# transactional in SQLite, so concurrent workers apply each migration exactly once and a
+# failed run leaves the schema untouched. Never edit a released migration: append one.
+
+_VERSION_TABLE = """
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        version INTEGER PRIMARY KEY,
+        name TEXT NOT NULL,
+        applied_at TEXT NOT NULL
+    )
+"""
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    upgrade: Callable  # upgrade(conn), inside the migration transaction
+
+def model_index(name: str) -> Index:
+    """An index declared in api.models (__table_args__), by name."""
+    for table in Base.metadata.tables.values():
+        for index in table.indexes:
+            if index.name == name:
+                return index
+    raise KeyError(f"No index named {name} in api.models")
+
+def create_indexes(conn, *names: str):
+    """CREATE INDEX for model-declared indexes; existing ones are left alone."""
+    for name in names:
+        model_index(name).create(bind=conn, checkfirst=True)
+
+# ================= MIGRATIONS =================
+
+def _declared_columns(conn):
+    # Tables created by create_all before a column was declared (replaces ensure_columns at startup)
+    for table in Base.metadata.sorted_tables:
+        added = add_missing_columns(conn, table)
+        if added:
+            logger.info(f"Added columns to {table.name}: {', '.join(added)}")
+
+def _hot_path_indexes(conn):
+    # Derived from the queries of decision_engine, resume_manager, emotion_engine,
+    # narrative_engine, drift_detector, policy_engine and the governance router
+    create_indexes(
+        conn,
+        "ix_goal_executions_status_org",
+        "ix_atomic_task_checkpoints_goal_task",
+        "ix_emotional_memories_user",
+        "ix_decision_logs_created_at",
+        "ix_governance_votes_timestamp",
+        "ix_user_behavior_signals_user_created",
+        "ix_audit_logs_entity",
+        "ix_org_policies_active",
+    )
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "declared_columns", _declared_columns),
+    Migration(2, "memories_search", create_memory_search),
+    Migration(3, "hot_path_indexes", _hot_path_indexes),
+]
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+# ================= RUNNER =================
+
+def current_version(bind=None) -> int:
+    """Highest applied migration (0 for a database that was never migrated)."""
+    bind = engine if bind is None else bind
+    with bind.connect() as conn:
+        if not inspect(conn).has_table("schema_migrations"):
+            return 0
+        return conn.execute(text("SELECT COALESCE(MAX(version), 0) FROM schema_migrations")).scalar()
+
+def migrate(bind=None) -> List[int]:
+    """
+    Brings the database up to LATEST_VERSION: creates missing tables from the models, then
+    applies the pending migrations to the live tables in place. Returns the versions applied.
+    """
+    bind = engine if bind is None else bind
+    applied = []
+    with bind.connect() as conn:
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+        try:
+            conn.exec_driver_sql(_VERSION_TABLE)
+            done = {row[0] for row in conn.exec_driver_sql("SELECT version FROM schema_migrations")}
+            Base.metadata.create_all(bind=conn)
+            for migration in MIGRATIONS:
+                if migration.version in done:
+                    continue
+                migration.upgrade(conn)
+                conn.execute(
+                    text("INSERT INTO schema_migrations (version, name, applied_at) VALUES (:v, :n, :t)"),
+                    {"v": migration.version, "n": migration.name, "t": datetime.utcnow().isoformat()},
+                )
+                applied.append(migration)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+    for migration in applied:
+        logger.info(f"Applied migration {migration.version}: {migration.name}")
+    return [migration.version for migration in applied]
+
+if __name__ == "__main__":
+    # python -m api.migrations [status]
+    if sys.argv[1:] == ["status"]:
+        print(f"Schema version {current_version()} (latest {LATEST_VERSION})")
+    else:
+        print(f"Applied migrations: {migrate() or 'none'} (schema version {current_version()})")
@@ -1,4 +1,4 @@
-from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, Float, DateTime, JSON, Text
+from sqlalchemy import Boolean, Column, ForeignKey, Index, Integer, String, Float, DateTime, JSON, Text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from api.database import Base
@@ -13,6 +13,12 @@ class Memory(Base):
     tasks = Column(JSON, default=[])  # Stored as JSON array
     timestamp = Column(String, default=lambda: datetime.now().isoformat())
 
+    # Keyset pagination of GET /api/memories (newest first, optionally per org)
+    __table_args__ = (
+        Index("ix_memories_timestamp_id", "timestamp", "id"),
+        Index("ix_memories_org_timestamp_id", "org_id", "timestamp", "id"),
+    )
+
 class Goal(Base):
     __tablename__ = "goals"
 
@@ -42,6 +48,11 @@ class GoalExecution(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    # decide_next_goal: status IN (...) AND org_id = ?; resume_manager: status IN (...) alone
+    __table_args__ = (
+        Index("ix_goal_executions_status_org", "status", "org_id"),
+    )
+
 class AtomicTaskCheckpoint(Base):
     __tablename__ = "atomic_task_checkpoints"
 
@@ -53,6 +64,10 @@ class AtomicTaskCheckpoint(Base):
     execution_result = Column(JSON)
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        Index("ix_atomic_task_checkpoints_goal_task", "goal_id", "task_index"),
+    )
+
 class Task(Base):
     __tablename__ = "tasks"
 
@@ -140,6 +155,11 @@ class DecisionLog(Base):
     snapshot = Column(JSON)         # all goal scores at decision time
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    # drift_detector: latest decisions first
+    __table_args__ = (
+        Index("ix_decision_logs_created_at", "created_at"),
+    )
+
 class DecisionOutcome(Base):
     __tablename__ = "decision_outcomes"
 
@@ -193,6 +213,10 @@ class UserBehaviorSignal(Base):
     
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        Index("ix_user_behavior_signals_user_created", "user_id", "created_at"),
+    )
+
 class UserRole(Base):
     __tablename__ = "user_roles"
 
@@ -220,6 +244,10 @@ class OrgPolicy(Base):
     severity = Column(String)   # HARD / SOFT
     active = Column(Boolean, default=True)
 
+    __table_args__ = (
+        Index("ix_org_policies_active", "active"),
+    )
+
 class UsageLog(Base):
     __tablename__ = "usage_logs"
 
@@ -230,6 +258,16 @@ class UsageLog(Base):
     cost = Column(Float, default=0.0)
     timestamp = Column(DateTime, default=datetime.utcnow)
 
+    # Per-call LLM accounting (action="llm_call"), written by brain.usage
+    call_site = Column(String, nullable=True)       # planner, decomposer, memory_agent, actions.summarize, ...
+    org_id = Column(Integer, nullable=True)
+    goal_id = Column(Integer, nullable=True)
+    lane = Column(String, nullable=True)            # interactive | goal | background
+    prompt_tokens = Column(Integer, default=0)
+    completion_tokens = Column(Integer, default=0)
+    latency_ms = Column(Float, default=0.0)
+    cache_outcome = Column(String, nullable=True)   # miss | hit | semantic | coalesced
+
 class AuditLog(Base):
     __tablename__ = "audit_logs"
 
@@ -242,6 +280,11 @@ class AuditLog(Base):
     scores_snapshot = Column(JSON)    # impact, urgency, user_pref, role, personality
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    # narrative_engine: latest audit entry of one entity (ORDER BY id rides on the rowid)
+    __table_args__ = (
+        Index("ix_audit_logs_entity", "entity_type", "entity_id"),
+    )
+
 class DecisionTrace(Base):
     __tablename__ = "decision_traces"
 
@@ -264,6 +307,11 @@ class EmotionalMemory(Base):
     context = Column(Text)
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    # emotion_engine: latest emotion of one user (ORDER BY id rides on the rowid)
+    __table_args__ = (
+        Index("ix_emotional_memories_user", "user_id"),
+    )
+
 class TrustSnapshot(Base):
     __tablename__ = "trust_snapshots"
 
@@ -345,3 +393,7 @@ class GovernanceVote(Base):
     reason = Column(Text)
     minority_opinion = Column(JSON) # List of dissenting reasons
     timestamp = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_governance_votes_timestamp", "timestamp"),
+    )
@@ -1,21 +1,47 @@
-import subprocess
-from api.config import OLLAMA_MODEL, OLLAMA_TIMEOUT
+from brain.llm_client import get_client, LLMTransportError
+from brain.model import MODEL, ask_llm_async, stream_llm_async
+from brain.scheduler import gate, llm_lane
+from brain.usage import usage_tags
 
 
 def run_llm(prompt: str) -> str:
     try:
-        result = subprocess.run(
-            ["ollama", "run", OLLAMA_MODEL],
-            input=prompt,
-            capture_output=True,
-            text=True,
-            timeout=OLLAMA_TIMEOUT
-        )
+        with gate.slot("interactive"):
+            result = get_client().generate(prompt, model=MODEL)
+        return result.get("response", "").strip()
 
-        if result.returncode != 0:
-            return f"Ollama error: {result.stderr}"
+    except LLMTransportError as e:
+        return f"Ollama error: {str(e)}"
 
-        return result.stdout.strip()
+    except Exception as e:
+        return f"Ollama exception: {str(e)}"
+
+
+async def run_llm_async(prompt: str) -> str:
+    """
+    Interactive-lane generation for API handlers; never blocks the event loop while queued.
+    Chat answers bypass the response cache, like run_llm: asking again generates again.
+    """
+    try:
+        with llm_lane("interactive"), usage_tags(call_site="api.query"):
+            return await ask_llm_async(prompt, use_cache=False)
+
+    except LLMTransportError as e:
+        return f"Ollama error: {str(e)}"
 
     except Exception as e:
         return f"Ollama exception: {str(e)}"
+
+
+async def stream_llm_interactive(prompt: str):
+    """
+    Interactive-lane token stream (uncached, see run_llm_async).
+    Errors are reported in-band as a final token.
+    """
+    try:
+        with llm_lane("interactive"), usage_tags(call_site="api.query_stream"):
+            async for token in stream_llm_async(prompt, use_cache=False):
+                yield token
+
+    except LLMTransportError as e:
+        yield f"Ollama error: {str(e)}"
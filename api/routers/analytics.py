@@ -1,4 +1,7 @@
-from fastapi import APIRouter, Depends
+from datetime import datetime, timedelta
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from api.database import get_db
 from api.models import Log
@@ -31,3 +34,48 @@ def get_analytics(range: str = "7d", db: Session = Depends(get_db)):
         "successRate": 98.5,
         "queriesPerDay": queries_per_day
     }
+
+@router.get("/llm")
+def get_llm_stats():
+    """LLM layer health: priority-lane queue depth / wait times, backend/endpoint health, cache and coalescing counters"""
+    from brain import metrics
+    from brain.cache import cache_stats
+    from brain.llm_client import get_client
+    from brain.semantic_cache import semantic_cache_stats
+    from brain.scheduler import gate
+
+    return {
+        "scheduler": gate.stats(),
+        "backend": getattr(get_client(), "stats", {}),
+        "cache": cache_stats(),
+        "semantic_cache": semantic_cache_stats(),
+        "counters": metrics.snapshot()
+    }
+
+@router.get("/llm/usage")
+def get_llm_usage(group_by: str = "call_site", since_hours: Optional[float] = None, db: Session = Depends(get_db)):
+    """Per-call-site (or org/goal/lane/cache outcome) LLM token, latency and cache-hit totals from UsageLog"""
+    from brain.usage import GROUP_FIELDS, sink, usage_summary
+
+    if group_by not in GROUP_FIELDS:
+        raise HTTPException(status_code=400, detail=f"group_by must be one of {', '.join(GROUP_FIELDS)}")
+    since = datetime.utcnow() - timedelta(hours=since_hours) if since_hours else None
+
+    return {
+        "group_by": group_by,
+        "since": since.isoformat() if since else None,
+        "groups": usage_summary(db, group_by=group_by, since=since),
+        "sink": sink.stats
+    }
+
+@router.get("/memory")
+def get_memory_stats():
+    """Vector memory layer: backend, embedding / recall cache hit rates and encoder time saved, retention budget and evictions"""
+    from memory.vector_store import backend_stats, embedding_cache_stats, recall_cache_stats, retention_stats
+
+    return {
+        "backend": backend_stats(),
+        "embedding_cache": embedding_cache_stats(),
+        "recall_cache": recall_cache_stats(),
+        "retention": retention_stats()
+    }
@@ -1,9 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import time
 from datetime import datetime
 from api.database import get_db
+from api.memory_search import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, search_memories
 from api.models import Memory
 from api.system import add_log
 
@@ -12,10 +13,24 @@ from api.auth import get_api_key
 router = APIRouter(prefix="/api/memories", tags=["Memory"], dependencies=[Depends(get_api_key)])
 
 @router.get("/")
-def get_memories(db: Session = Depends(get_db)):
-    """Get all memory items from DB"""
-    memories = db.query(Memory).all()
-    return memories
+def get_memories(
+    q: Optional[str] = None,
+    org_id: Optional[int] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    sort: str = "recent",
+    db: Session = Depends(get_db)
+):
+    """
+    Page of memory items, newest first: full-text search over title/context when q is given
+    (sort=relevance ranks matches by bm25). Pass next_cursor back as cursor for the following page.
+    """
+    try:
+        return search_memories(db, q=q, org_id=org_id, since=since, until=until, limit=limit, cursor=cursor, sort=sort)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @router.post("/")
 async def create_memory(memory_data: Dict[str, Any], db: Session = Depends(get_db)):
@@ -24,8 +39,9 @@ async def create_memory(memory_data: Dict[str, Any], db: Session = Depends(get_d
     memory = Memory(
         id=memory_id,
         title=memory_data.get("title", ""),
-        content=memory_data.get("content", ""),
-        tags=memory_data.get("tags", []),
+        context=memory_data.get("context", memory_data.get("content", "")),
+        org_id=memory_data.get("org_id", 1),
+        tasks=memory_data.get("tasks", []),
         timestamp=datetime.now().isoformat()
     )
     db.add(memory)
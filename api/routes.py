@@ -1,12 +1,14 @@
 from fastapi import APIRouter
+from fastapi.responses import StreamingResponse
 from datetime import datetime
+import json
 import uuid
 
 from api.schema import (
     QueryRequest, QueryResponse,
     Task, MemoryItem, Goal
 )
-from api.ollama_client import run_llm
+from api.ollama_client import run_llm_async, stream_llm_interactive
 
 router = APIRouter()
 
@@ -32,11 +34,29 @@ def status():
 
 
 @router.post("/query", response_model=QueryResponse)
-def query(req: QueryRequest):
-    answer = run_llm(req.input)
+async def query(req: QueryRequest):
+    answer = await run_llm_async(req.input)
     return {"answer": answer}
 
 
+@router.post("/query/stream")
+async def query_stream(req: QueryRequest):
+    """
+    Server-Sent Events variant of /query: one `token` event per generated token, then `done`.
+    If the client disconnects, the response generator is closed and Ollama stops generating.
+    """
+    async def events():
+        async for token in stream_llm_interactive(req.input):
+            yield f"event: token\ndata: {json.dumps({'token': token})}\n\n"
+        yield "event: done\ndata: {}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 # ------------------ AUTONOMY ------------------
 @router.post("/start")
 def start():
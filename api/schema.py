@@ -45,3 +45,26 @@ class PlannerOutput(BaseModel):
     goal: str
     confidence: float
     steps: List[PlannerStep]
+
+
+# ---------- AGENT OUTPUTS ----------
+class DecompositionOutput(BaseModel):
+    strategy_explanation: str = ""
+    tasks: List[str]
+
+class MemoryDecision(BaseModel):
+    decision: str = "SKIP"  # STORE | SKIP
+    memory_type: str = "knowledge"
+    summary: str = ""
+    tags: List[str] = []
+    reason: str = ""
+
+class FailureAnalysis(BaseModel):
+    failure_type: str = "UNKNOWN"
+    root_causes: List[str] = []
+    recommended_fix: List[str] = []
+
+class TextAnalysis(BaseModel):
+    key_points: List[str] = []
+    themes: List[str] = []
+    risks: List[str] = []
@@ -1,20 +1,26 @@
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Depends
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.websockets import WebSocketState
 import asyncio
+import contextlib
 import time
 from datetime import datetime
 from sqlalchemy.orm import Session
 
-from api.database import SessionLocal, engine, Base
+from api.database import SessionLocal, engine
+from api.migrations import migrate
 from api.models import Task, Log
 from api.system import SYSTEM_STATE, task_manager, log_manager, add_log, add_task_broadcast
+from api.config import LLM_STREAM_TO_LOGS
+from api.ollama_client import stream_llm_interactive
 from autonomy.autonomy_loop import autonomous_run
+from brain.model import set_token_sink
 
 # Import Routers
 from api.routers import memories, goals, tasks, analytics, settings, notifications
 
-# Create tables
-Base.metadata.create_all(bind=engine)
+# Create tables / apply pending schema migrations
+migrate(engine)
 
 app = FastAPI(title="WEION AI API", version="1.0.0")
 
@@ -144,10 +150,46 @@ async def websocket_logs(websocket: WebSocket):
     except WebSocketDisconnect:
         log_manager.disconnect(websocket)
 
+@app.websocket("/ws/query")
+async def websocket_query(websocket: WebSocket):
+    """
+    Streaming chat: client sends {"input": "..."}, receives {"type": "token", "data": "..."}
+    messages followed by {"type": "done"}. Disconnecting mid-answer cancels the generation.
+    """
+    await websocket.accept()
+    try:
+        while True:
+            request = await websocket.receive_json()
+            # aclosing: leaving the loop early (send failed) closes the stream right away,
+            # which cancels the upstream generation instead of waiting for garbage collection
+            async with contextlib.aclosing(stream_llm_interactive(request.get("input", ""))) as tokens:
+                async for token in tokens:
+                    await websocket.send_json({"type": "token", "data": token})
+            await websocket.send_json({"type": "done"})
+    except WebSocketDisconnect:
+        pass
+    except RuntimeError:
+        # Sending on a socket that is already closed raises RuntimeError, not WebSocketDisconnect
+        if WebSocketState.DISCONNECTED not in (websocket.client_state, websocket.application_state):
+            raise
+
+def _forward_tokens_to_logs(loop: asyncio.AbstractEventLoop):
+    """Token sink for agent LLM calls: live token stream for /ws/logs subscribers."""
+    def sink(token: str, lane: str):
+        if not log_manager.active_connections:
+            return
+        asyncio.run_coroutine_threadsafe(
+            log_manager.broadcast({"type": "token", "data": {"lane": lane, "token": token}}),
+            loop
+        )
+    return sink
+
 # Background Simulation
 @app.on_event("startup")
 async def startup_event():
     await add_log("info", "WEION AI Backend started (Modular)")
+    if LLM_STREAM_TO_LOGS:
+        set_token_sink(_forward_tokens_to_logs(asyncio.get_running_loop()))
     asyncio.create_task(simulate_task_updates())
 
 async def simulate_task_updates():
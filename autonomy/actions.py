@@ -4,6 +4,11 @@ import logging
 import json
 from typing import Dict, Any, Optional
 from brain.model import ask_llm
+from brain.usage import usage_tags
+from brain.chunking import map_concurrent, split_text
+from brain.structured import JSONObjectExtractor, parse_json_object
+from api.schema import TextAnalysis
+from pydantic import ValidationError
 
 # Initialize logger
 logger = logging.getLogger(__name__)
@@ -77,15 +82,7 @@ def read_file(path: str) -> Dict[str, Any]:
         return _create_result("failed", error=str(e))
 
 
-def analyze_text(text: str) -> Dict[str, Any]:
-    """
-    Analyzes text using LLM to extract key points, themes, and risks.
-    Constraint: Max 100k chars.
-    """
-    if len(text) > MAX_TEXT_INPUT:
-        return _create_result("failed", error=f"Input text too long: {len(text)} chars (Max: {MAX_TEXT_INPUT})")
-
-    prompt = f"""
+ANALYZE_PROMPT = """
     Analyze the following text and extract insights.
     
     RULES:
@@ -98,52 +95,134 @@ def analyze_text(text: str) -> Dict[str, Any]:
     }}
     
     TEXT:
-    {text[:MAX_TEXT_INPUT]}
+    {text}
+    """
+
+ANALYZE_REDUCE_PROMPT = """
+    Merge these analyses of consecutive parts of one document into a single analysis.
+    Remove duplicates, combine overlapping points, keep the most important items.
+    
+    RULES:
+    1. Return ONLY valid JSON with the same schema:
+    {{
+      "key_points": [...],
+      "themes": [...],
+      "risks": [...]
+    }}
+    
+    PARTIAL ANALYSES:
+    {partials}
+    """
+
+SUMMARIZE_PROMPT = """
+    Summarize the following text in concise bullet points.
+    Keep it factual and objective.
+    
+    TEXT:
+    {text}
     """
+
+SUMMARIZE_REDUCE_PROMPT = """
+    Combine these partial summaries of consecutive parts of one document into one
+    set of concise bullet points. Remove repetition. Keep it factual and objective.
     
+    PARTIAL SUMMARIES:
+    {partials}
+    """
+
+MAX_REDUCE_ITEMS = 30  # Per analysis field fed into the reduce prompt
+MAX_REDUCE_DEPTH = 3
+
+
+def _analyze_chunk(chunk: str) -> TextAnalysis:
+    response = ask_llm(ANALYZE_PROMPT.format(text=chunk), stop_when=JSONObjectExtractor)
+    return parse_json_object(response, TextAnalysis)
+
+
+def _merge_analyses(analyses) -> Dict[str, Any]:
+    """Order-preserving union of every field (deterministic fallback for the reduce step)."""
+    merged = {}
+    for field in TextAnalysis.model_fields:
+        seen = {}
+        for analysis in analyses:
+            for item in getattr(analysis, field):
+                seen.setdefault(item.strip().lower(), item)
+        merged[field] = list(seen.values())
+    return merged
+
+
+def _reduce_analyses(analyses) -> Dict[str, Any]:
+    merged = _merge_analyses(analyses)
+    partials = json.dumps({field: items[:MAX_REDUCE_ITEMS] for field, items in merged.items()}, indent=1)
     try:
-        response = ask_llm(prompt)
-        # Parse JSON from LLM
-        clean_json = response.strip()
-        if clean_json.startswith("```json"):
-            clean_json = clean_json[7:]
-        if clean_json.endswith("```"):
-            clean_json = clean_json[:-3]
-            
-        data = json.loads(clean_json.strip())
-        
-        # Validate keys
-        required_keys = ["key_points", "themes", "risks"]
-        for key in required_keys:
-            if key not in data:
-                data[key] = []
-                
+        response = ask_llm(ANALYZE_REDUCE_PROMPT.format(partials=partials), stop_when=JSONObjectExtractor)
+        return parse_json_object(response, TextAnalysis).model_dump()
+    except (ValidationError, ValueError) as e:
+        logger.warning(f"Analysis reduce step returned invalid JSON, using merged chunk results: {e}")
+        return merged
+
+
+@usage_tags(call_site="actions.analyze_text")
+def analyze_text(text: str) -> Dict[str, Any]:
+    """
+    Analyzes text using LLM to extract key points, themes, and risks.
+    Large inputs are split into chunks analyzed concurrently, then merged with a reduce prompt.
+    Constraint: Max 100k chars.
+    """
+    if len(text) > MAX_TEXT_INPUT:
+        return _create_result("failed", error=f"Input text too long: {len(text)} chars (Max: {MAX_TEXT_INPUT})")
+
+    try:
+        chunks = split_text(text) or [text]
+        results = map_concurrent(_analyze_chunk, chunks, return_exceptions=True)
+        analyses = [r for r in results if isinstance(r, TextAnalysis)]
+
+        if not analyses:
+            error = next(r for r in results if isinstance(r, Exception))
+            if isinstance(error, ValueError):
+                return _create_result("failed", error="LLM returned invalid JSON for analysis.")
+            raise error
+        if len(analyses) < len(chunks):
+            logger.warning(f"analyze_text: {len(chunks) - len(analyses)}/{len(chunks)} chunks failed, merging the rest")
+
+        # Missing keys default to [] in the schema
+        data = analyses[0].model_dump() if len(chunks) == 1 else _reduce_analyses(analyses)
         return _create_result("success", output=data)
         
-    except json.JSONDecodeError:
-        return _create_result("failed", error="LLM returned invalid JSON for analysis.")
     except Exception as e:
         return _create_result("failed", error=str(e))
 
 
+def _summarize_chunk(chunk: str) -> str:
+    return ask_llm(SUMMARIZE_PROMPT.format(text=chunk))
+
+
+def _reduce_summaries(partials, depth: int = 0) -> str:
+    joined = "\n\n".join(partials)
+    groups = split_text(joined)
+    if len(groups) > 1 and depth < MAX_REDUCE_DEPTH:
+        # Partial summaries still too long for one prompt: reduce them in groups first
+        reduced = map_concurrent(lambda g: ask_llm(SUMMARIZE_REDUCE_PROMPT.format(partials=g)), groups)
+        return _reduce_summaries(reduced, depth + 1)
+    return ask_llm(SUMMARIZE_REDUCE_PROMPT.format(partials=joined))
+
+
+@usage_tags(call_site="actions.summarize")
 def summarize(text: str) -> Dict[str, Any]:
     """
     Summarizes text concisely.
+    Large inputs are summarized chunk by chunk (concurrently), then combined with a reduce prompt.
+    Chunk answers are cached by content, so re-reading an edited document only
+    re-summarizes the chunks that changed.
     Constraint: Max 100k chars.
     """
     if len(text) > MAX_TEXT_INPUT:
         return _create_result("failed", error=f"Input text too long: {len(text)} chars (Max: {MAX_TEXT_INPUT})")
-        
-    prompt = f"""
-    Summarize the following text in concise bullet points.
-    Keep it factual and objective.
-    
-    TEXT:
-    {text[:MAX_TEXT_INPUT]}
-    """
     
     try:
-        summary = ask_llm(prompt)
+        chunks = split_text(text) or [text]
+        partials = map_concurrent(_summarize_chunk, chunks)
+        summary = partials[0] if len(partials) == 1 else _reduce_summaries(partials)
         return _create_result("success", output={"summary": summary})
     except Exception as e:
         return _create_result("failed", error=str(e))
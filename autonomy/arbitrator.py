@@ -2,7 +2,7 @@
 # autonomy/arbitrator.py
 
 import logging
-from api.database import SessionLocal
+from api.database import session_scope
 from api.models import UserRole
 
 logger = logging.getLogger(__name__)
@@ -19,14 +19,11 @@ DEFAULT_ROLE = "CONTRIBUTOR"
 
 def get_user_role(user_id: str) -> str:
     """Fetches user role from DB or returns default."""
-    db = SessionLocal()
-    try:
+    with session_scope() as db:
         user_role = db.query(UserRole).filter(UserRole.user_id == user_id).first()
         if user_role:
             return user_role.role
         return DEFAULT_ROLE
-    finally:
-        db.close()
 
 def calculate_role_score(user_id: str) -> float:
     """
@@ -92,8 +92,8 @@ async def run_task_async(task: str) -> Dict[str, Any]:
     """
     from agents.planner import make_plan
     
-    # 1. Plan
-    plan = make_plan(task)
+    # 1. Plan (sync LLM + DB work, keep it off the event loop)
+    plan = await asyncio.to_thread(make_plan, task)
     
     # 2. Execute
     result = await execute_plan_async(plan)
@@ -2,6 +2,7 @@
 
 import asyncio
 from autonomy.async_task_runner import run_task_async
+from brain.scheduler import llm_lane
 
 # ye hi main loop hai
 async def run_all(context: str):
@@ -20,4 +21,6 @@ async def run_all(context: str):
 
 # API yahin se call karegi
 async def autonomous_run(context: str):
-    await run_all(context)
+    # Unattended work queues behind interactive and user-triggered LLM calls
+    with llm_lane("background"):
+        await run_all(context)
@@ -6,9 +6,9 @@ import logging
 from datetime import datetime
 from typing import List, Dict, Any, Optional
 
-from api.database import SessionLocal
+from api.database import session_scope
 from api.models import GoalExecution, GoalPriority, DecisionLog
-from memory.vector_store import recall
+from memory.vector_store import recall, recall_many
 
 # Initialize Logger
 logger = logging.getLogger(__name__)
@@ -19,6 +19,9 @@ from autonomy.weight_updater import get_current_weights
 # Removed Hardcoded Constants
 # W_IMPACT = 0.40 ...
 
+# Past memories consulted per candidate goal
+MEMORY_EVIDENCE_K = 3
+
 def calculate_score(priority: GoalPriority, weights=None) -> float:
     """
     Calculates the detailed priority score using Dynamic Weights.
@@ -44,12 +47,29 @@ def get_or_create_priority(db, goal_id: int) -> GoalPriority:
         db.refresh(prio)
     return prio
 
-def adjust_priority_based_on_memory(prio: GoalPriority, objective: str) -> GoalPriority:
+def get_or_create_priorities(db, goal_ids: List[int]) -> Dict[int, GoalPriority]:
+    """Priorities for many goals in one query; missing rows are created in one commit."""
+    priorities = {
+        p.goal_id: p for p in db.query(GoalPriority).filter(GoalPriority.goal_id.in_(goal_ids)).all()
+    }
+    missing = [GoalPriority(goal_id=goal_id) for goal_id in goal_ids if goal_id not in priorities]
+    if missing:
+        db.add_all(missing)
+        db.commit()
+        priorities.update({p.goal_id: p for p in missing})
+    return priorities
+
+def adjust_priority_based_on_memory(
+    prio: GoalPriority,
+    objective: str,
+    memories: Optional[List[Dict[str, Any]]] = None
+) -> GoalPriority:
     """
     Check if similar goals failed/succeeded in the past.
+    memories: evidence already fetched for this objective (see recall_many); recalled if None.
     """
-    from memory.vector_store import recall
-    memories = recall(objective, k=3)
+    if memories is None:
+        memories = recall(objective, k=MEMORY_EVIDENCE_K)
     
     for mem in memories:
         if "FAILED" in mem["summary"]:
@@ -66,10 +86,11 @@ def decide_next_goal(user_id: str = "default_user", org_id: int = 1) -> Dict[str
     The CEO Function.
     Arbitrates using Dynamic Weights from DB.
     """
-    db = SessionLocal()
-    current_weights = get_current_weights()
-    
-    try:
+    # One session for the whole decision: the weight / preference / role / emotion / org
+    # lookups below join it instead of each opening a connection.
+    with session_scope() as db:
+        current_weights = get_current_weights()
+
         # 1. Fetch Candidates (Filtered by Org)
         candidates = db.query(GoalExecution).filter(
             GoalExecution.status.in_(["RUNNING", "PENDING", "PAUSED"]),
@@ -146,11 +167,16 @@ def decide_next_goal(user_id: str = "default_user", org_id: int = 1) -> Dict[str
         org_profile = get_org_profile(org_id)
         org_bias = org_profile["bias"]
         
-        for goal in candidates:
-            prio = get_or_create_priority(db, goal.id)
+        # Priorities and memory evidence for all candidates at once (one query each),
+        # instead of a DB lookup plus an embedding + vector query per goal
+        priorities = get_or_create_priorities(db, [goal.id for goal in candidates])
+        evidence = recall_many([goal.objective or "" for goal in candidates], k=MEMORY_EVIDENCE_K, org_id=org_id)
+        
+        for goal, memories in zip(candidates, evidence):
+            prio = priorities[goal.id]
             
             # --- MEMORY ADJUSTMENT (Phase 9) ---
-            prio = adjust_priority_based_on_memory(prio, goal.objective)
+            prio = adjust_priority_based_on_memory(prio, goal.objective, memories)
             
             # 1. System Score (Logic) - 40%
             system_score = calculate_score(prio, weights=current_weights)
@@ -361,9 +387,6 @@ def decide_next_goal(user_id: str = "default_user", org_id: int = 1) -> Dict[str
         
         return decision_structure
 
-    finally:
-        db.close()
-
 def apply_decision(decision: Dict[str, Any]):
     """
     Applies the decision (helper for the engine).
@@ -2,7 +2,7 @@
 # autonomy/emotion_engine.py
 
 import logging
-from api.database import SessionLocal
+from api.database import session_scope
 from api.models import EmotionalMemory
 
 logger = logging.getLogger(__name__)
@@ -28,8 +28,7 @@ def detect_emotion(user_id: str, trigger_event: str, context: str = "") -> str:
         intensity = 0.6
         
     # Save to DB
-    db = SessionLocal()
-    try:
+    with session_scope() as db:
         mem = EmotionalMemory(
             user_id=user_id,
             emotion=emotion,
@@ -38,23 +37,17 @@ def detect_emotion(user_id: str, trigger_event: str, context: str = "") -> str:
             context=context
         )
         db.add(mem)
-        db.commit()
         # logger.info(f"❤️ Emotion Detected: {emotion} ({intensity})")
-    finally:
-        db.close()
         
     return emotion
 
 def get_current_emotion(user_id: str) -> str:
     """Returns latest emotion."""
-    db = SessionLocal()
-    try:
+    with session_scope() as db:
         last = db.query(EmotionalMemory).filter(EmotionalMemory.user_id == user_id).order_by(EmotionalMemory.id.desc()).first()
         if last:
             return last.emotion
         return "CALM"
-    finally:
-        db.close()
 
 def get_emotional_bias(emotion: str) -> float:
     """
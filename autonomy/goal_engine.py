@@ -6,6 +6,7 @@ from api.database import SessionLocal
 from api.models import GoalExecution, AtomicTaskCheckpoint
 from autonomy.task_decomposer import decompose_goal
 from brain.task_executor import run_atomic_task
+from brain.usage import usage_tags
 from memory.vector_store import add_memory
 
 # Initialize logger
@@ -92,7 +93,8 @@ def run_goal_loop(objective: str, context: str = "", resume_goal_id: int = None)
 
             # 2. Decompose
             try:
-                decomposition = decompose_goal(objective, context)
+                with usage_tags(goal_id=state.db_id, org_id=goal_db.org_id):
+                    decomposition = decompose_goal(objective, context)
                 state.tasks = decomposition.get("tasks", [])
                 print(f"Goal decomposed into {len(state.tasks)} tasks.")
                 for i, t in enumerate(state.tasks):
@@ -142,10 +144,12 @@ def run_goal_loop(objective: str, context: str = "", resume_goal_id: int = None)
                     "goal": objective,
                     "goal_context": context,
                     "goal_id": state.db_id,
+                    "org_id": goal_db.org_id,
                     "resume": (resume_goal_id is not None)
                 }
                 
-                result = run_atomic_task(task_str, extra_context=extra_ctx)
+                with usage_tags(goal_id=state.db_id, org_id=goal_db.org_id):
+                    result = run_atomic_task(task_str, extra_context=extra_ctx)
                 state.results.append(result)
                 
                 # Check Verdict
@@ -192,8 +196,10 @@ def run_goal_loop(objective: str, context: str = "", resume_goal_id: int = None)
                             "memory_type": "mistake",
                             "tags": ["goal_failure", "execution_error"],
                             "score": verdict.get("score", 0.0),
-                            "source_task": objective
-                        }
+                            "source_task": objective,
+                            "org_id": goal_db.org_id
+                        },
+                        buffered=True
                     )
                     break # Stop Loop
                     
@@ -222,8 +228,10 @@ def run_goal_loop(objective: str, context: str = "", resume_goal_id: int = None)
                     "memory_type": "knowledge",
                     "tags": ["goal_success", "strategy"],
                     "score": 1.0,
-                    "source_task": objective
-                }
+                    "source_task": objective,
+                    "org_id": goal_db.org_id
+                },
+                buffered=True
             )
         
         return state.to_dict()
@@ -3,7 +3,7 @@
 
 import logging
 from typing import Dict, Any, List
-from api.database import SessionLocal
+from api.database import session_scope
 from api.models import EvolutionDirective
 
 logger = logging.getLogger(__name__)
@@ -53,18 +53,16 @@ def record_evolution_directive(source: str, change_type: str, reason: str, risk:
     """
     Writes a self-evolution directive to DB.
     """
-    db = SessionLocal()
     try:
-        directive = EvolutionDirective(
-            source=source,
-            change_type=change_type,
-            reason=reason,
-            risk_level=risk
-        )
-        db.add(directive)
-        db.commit()
+        with session_scope() as db, db.begin_nested():
+            # Savepoint: a failed insert is rolled back alone, not the caller's decision
+            directive = EvolutionDirective(
+                source=source,
+                change_type=change_type,
+                reason=reason,
+                risk_level=risk
+            )
+            db.add(directive)
         logger.info(f"🧬 EVOLUTION DIRECTIVE: {change_type} - {reason}")
     except Exception as e:
         logger.error(f"Failed to record evolution: {e}")
-    finally:
-        db.close()
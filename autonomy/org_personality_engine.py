@@ -2,7 +2,7 @@
 # autonomy/org_personality_engine.py
 
 from typing import Dict, Any
-from api.database import SessionLocal
+from api.database import session_scope
 from api.models import Organization
 
 DEFAULT_ORG_ID = 1
@@ -11,8 +11,7 @@ def get_org_profile(org_id: int) -> Dict[str, Any]:
     """
     Fetches organization profile and derives cognitive biases.
     """
-    db = SessionLocal()
-    try:
+    with session_scope() as db:
         org = db.query(Organization).filter(Organization.id == org_id).first()
         if not org:
             # Fallback or create default
@@ -57,5 +56,3 @@ def get_org_profile(org_id: int) -> Dict[str, Any]:
             "risk_tolerance": org.risk_profile, # 0.0 - 1.0
             "bias": bias
         }
-    finally:
-        db.close()
@@ -3,32 +3,35 @@
 
 import logging
 from typing import Dict, Any, Optional
-from api.database import SessionLocal
+from sqlalchemy.exc import IntegrityError
+from api.database import session_scope
 from api.models import UserPreference, GoalPriority
 
 logger = logging.getLogger(__name__)
 
 def get_user_preference(user_id: str = "default_user") -> UserPreference:
     """Fetches user preference or creates default."""
-    db = SessionLocal()
     try:
-        pref = db.query(UserPreference).filter(UserPreference.user_id == user_id).first()
-        if not pref:
-            pref = UserPreference(
-                user_id=user_id,
-                pref_speed_vs_quality=0.5,
-                pref_risk_tolerance=0.5,
-                pref_experimentation=0.5
-            )
-            db.add(pref)
-            db.commit()
-            db.refresh(pref)
-        return pref
+        with session_scope() as db:
+            pref = db.query(UserPreference).filter(UserPreference.user_id == user_id).first()
+            if not pref:
+                pref = UserPreference(
+                    user_id=user_id,
+                    pref_speed_vs_quality=0.5,
+                    pref_risk_tolerance=0.5,
+                    pref_experimentation=0.5
+                )
+                # Savepoint: a failed insert must not poison a caller's shared session
+                try:
+                    with db.begin_nested():
+                        db.add(pref)
+                except IntegrityError:
+                    # Another decision created the default concurrently
+                    pref = db.query(UserPreference).filter(UserPreference.user_id == user_id).one()
+            return pref
     except Exception as e:
         logger.error(f"Error fetching preference: {e}")
         return UserPreference() # safety fallback
-    finally:
-        db.close()
 
 def calculate_user_score(priority: GoalPriority, user_pref: UserPreference) -> float:
     """
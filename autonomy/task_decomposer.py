@@ -1,19 +1,26 @@
 
-import json
 import logging
 from typing import List, Dict, Any
-from brain.model import ask_llm
+from brain.model import LLMConversation
+from brain.structured import JSONObjectExtractor, parse_json_object
+from brain.usage import usage_tags
+from api.schema import DecompositionOutput
+from pydantic import ValidationError
 
 # Initialize logger
 logger = logging.getLogger(__name__)
 
-DECOMPOSER_PROMPT = """
+DECOMPOSER_VERSION = "v2"
+
+# Cosine similarity above which a near-identical goal reuses a cached decomposition
+# (semantic cache tier, LLM_SEMANTIC_CACHE=true).
+SEMANTIC_CACHE_THRESHOLD = 0.92
+
+# Static prefix first (cacheable by Ollama across goals), per-goal input after it.
+DECOMPOSER_SYSTEM_PROMPT = """
 You are the STRATEGIST (Task Decomposer).
 Your job is to break down a HIGH-LEVEL GOAL into a sequence of ATOMIC, EXECUTABLE TASKS.
 
-INPUT GOAL: {goal}
-CONTEXT/CONSTRAINTS: {context}
-
 RULES:
 1. Return ONLY valid JSON.
 2. Generate between 1 and 10 tasks.
@@ -22,39 +29,44 @@ RULES:
 5. Each task description must be under 200 characters.
 
 OUTPUT SCHEMA:
-{{
+{
   "strategy_explanation": "Brief reasoning...",
   "tasks": [
     "Task 1 description...",
     "Task 2 description..."
   ]
-}}
+}
+"""
+
+DECOMPOSER_REQUEST_PROMPT = """
+INPUT GOAL: {goal}
+CONTEXT/CONSTRAINTS: {context}
 """
 
 VAGUE_VERBS = ["think", "understand", "explore", "consider", "ponder", "imagine"]
 
+@usage_tags(call_site="decomposer")
 def decompose_goal(goal: str, context: str = "") -> Dict[str, Any]:
     """
     Decomposes a goal into atomic tasks with deterministic validation.
     """
-    prompt = DECOMPOSER_PROMPT.format(goal=goal, context=context)
+    conversation = LLMConversation(
+        system=DECOMPOSER_SYSTEM_PROMPT,
+        template_version=DECOMPOSER_VERSION,
+        semantic_threshold=SEMANTIC_CACHE_THRESHOLD
+    )
+    message = DECOMPOSER_REQUEST_PROMPT.format(goal=goal, context=context)
     
     max_retries = 2
     attempts = 0
     
     while attempts <= max_retries:
         try:
-            response = ask_llm(prompt)
+            response = conversation.ask(message, stop_when=JSONObjectExtractor)
             
             # Parse
-            clean_json = response.strip()
-            if clean_json.startswith("```json"):
-                clean_json = clean_json[7:]
-            if clean_json.endswith("```"):
-                clean_json = clean_json[:-3]
-            
-            data = json.loads(clean_json.strip())
-            tasks = data.get("tasks", [])
+            data = parse_json_object(response, DecompositionOutput).model_dump()
+            tasks = data["tasks"]
             
             # --- DETERMINISTIC VALIDATION ---
             
@@ -78,10 +90,11 @@ def decompose_goal(goal: str, context: str = "") -> Dict[str, Any]:
             logger.info(f"Goal decomposed into {len(tasks)} tasks.")
             return data
 
-        except (json.JSONDecodeError, ValueError) as e:
+        except (ValidationError, ValueError) as e:
             logger.warning(f"Decomposition validation failed (Attempt {attempts+1}): {e}")
             attempts += 1
-            prompt += f"\n\nERROR: Previous output was invalid. {e}. Fix it."
+            # Retry in-conversation: only the error is sent, the goal is already in context
+            message = f"ERROR: Previous output was invalid. {e}. Fix it."
             
     # Fallback if max retries reached
     logger.error("Decomposition failed after retries.")
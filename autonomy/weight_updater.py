@@ -3,7 +3,7 @@
 
 import logging
 from typing import Dict, Any
-from api.database import SessionLocal
+from api.database import SessionLocal, session_scope
 from api.models import PriorityWeights
 
 logger = logging.getLogger(__name__)
@@ -15,17 +15,14 @@ MAX_STEP_CHANGE = 0.05
 
 def get_current_weights() -> PriorityWeights:
     """Fetches the latest weights or creates default."""
-    db = SessionLocal()
-    try:
+    with session_scope() as db:
         weights = db.query(PriorityWeights).order_by(PriorityWeights.id.desc()).first()
         if not weights:
             weights = PriorityWeights()
             db.add(weights)
-            db.commit()
+            db.flush()
             db.refresh(weights)
         return weights
-    finally:
-        db.close()
 
 def update_priority_weights(adjustments: Dict[str, float]):
     """
@@ -0,0 +1,113 @@
+# benchmarks/bench_hybrid_recall.py
+"""
+Memory recall latency and recall@k: pure vector (recall) vs. hybrid BM25 + vector (hybrid_recall).
+
+    python benchmarks/bench_hybrid_recall.py                  # 1000 memories, 200 queries, k=5
+    python benchmarks/bench_hybrid_recall.py --n 5000 --queries 500 --k 3
+    python benchmarks/bench_hybrid_recall.py --hashed         # no embedding model needed
+
+Every memory mentions one error code, file and service; each query asks about one of them
+the way a task would ("Why does ERR-4821 keep failing in billing/invoice_1234.py?").
+The target counts as recalled if it is in the top k. --hashed swaps MiniLM for a
+hashed bag-of-words embedder, for machines without the model (it is lexical itself, so
+it measures latency overhead rather than the recall gain).
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import zlib
+from unittest.mock import patch
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import chromadb
+from memory import vector_store
+from memory.embedding_cache import EmbeddingCache
+from memory.lexical_index import BM25Index, tokenize
+from memory.retention import MemoryLedger
+
+SERVICES = ["billing", "auth", "search", "ingest", "notifications", "reports", "scheduler", "gateway"]
+SYMPTOMS = ["timed out", "returned HTTP 500", "raised KeyError", "ran out of memory", "hit a deadlock", "lost its lock"]
+
+
+class HashedEncoder:
+    """Bag-of-words hashed into `dim` buckets, L2-normalized (stand-in for MiniLM)."""
+
+    def __init__(self, dim=384):
+        self.dim = dim
+
+    def encode(self, texts, batch_size=None, **kwargs):
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for term in tokenize(text):
+                out[row, zlib.crc32(term.encode()) % self.dim] += 1.0
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        return out / np.where(norms == 0, 1, norms)
+
+
+def _corpus(n, seed=7):
+    rng = random.Random(seed)
+    items, queries = [], []
+    for i in range(n):
+        service, symptom = rng.choice(SERVICES), rng.choice(SYMPTOMS)
+        code, path = f"ERR-{1000 + i}", f"{service}/handler_{i}.py"
+        summary = f"Task in {service} {symptom}: {code} raised from {path}; fixed by retrying with backoff."
+        items.append((summary, {"memory_type": rng.choice(["strategy", "mistake", "knowledge"]), "tags": [service]}))
+        queries.append((f"Why does {code} keep failing in {path}?", summary))
+    return items, queries
+
+
+def _measure(label, fn, queries, k):
+    hits, latencies = 0, []
+    for query, target in queries:
+        started = time.perf_counter()
+        found = fn(query, k=k)
+        latencies.append(time.perf_counter() - started)
+        hits += any(m["summary"] == target for m in found)
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2] * 1000
+    p95 = latencies[int(len(latencies) * 0.95)] * 1000
+    print(f"{label:<8} recall@{k}={hits / len(queries):6.1%}  p50={p50:7.2f}ms  p95={p95:7.2f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--n", type=int, default=1000, help="memories stored")
+    parser.add_argument("--queries", type=int, default=200, help="queries measured")
+    parser.add_argument("--k", type=int, default=5, help="memories recalled per query")
+    parser.add_argument("--hashed", action="store_true", help="hashed bag-of-words embedder instead of MiniLM")
+    args = parser.parse_args()
+
+    encoder = HashedEncoder() if args.hashed else vector_store.embedder
+    if encoder is None:
+        sys.exit("Embedding model unavailable (all-MiniLM-L6-v2 could not be loaded). Use --hashed.")
+
+    items, queries = _corpus(args.n)
+    queries = random.Random(11).sample(queries, min(args.queries, len(queries)))
+
+    client = chromadb.PersistentClient(path=tempfile.mkdtemp(prefix="weion_bench_recall_"))
+    collection = client.get_or_create_collection("bench")
+    cache = EmbeddingCache(lambda texts, batch_size: encoder.encode(texts, batch_size=batch_size), "bench", path=None)
+    with patch("memory.vector_store.collection", collection), \
+         patch("memory.vector_store.embedder", encoder), \
+         patch("memory.vector_store.embedding_cache", cache), \
+         patch("memory.vector_store.ledger", MemoryLedger()), \
+         patch("memory.vector_store.lexical_index", BM25Index()), \
+         patch("memory.vector_store.MEMORY_BUDGET", args.n * 2):
+        for start in range(0, len(items), 256):
+            vector_store.add_memories(items[start:start + 256])
+        # Same queries for both paths: embeddings come from the cache after the first
+        vector_store.embed([q for q, _ in queries])
+
+        print(f"n={args.n} queries={len(queries)} embedder={'hashed' if args.hashed else vector_store.EMBED_MODEL_NAME}")
+        _measure("vector", vector_store.recall, queries, args.k)
+        _measure("hybrid", vector_store.hybrid_recall, queries, args.k)
+
+
+if __name__ == "__main__":
+    main()
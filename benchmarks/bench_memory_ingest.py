@@ -0,0 +1,78 @@
+# benchmarks/bench_memory_ingest.py
+"""
+Vector memory ingestion throughput: add_memory one at a time vs. add_memories in batches.
+
+    python benchmarks/bench_memory_ingest.py                  # 500 memories, batch 64
+    python benchmarks/bench_memory_ingest.py --n 2000 --batch 128
+
+Runs against a throwaway Chroma collection with the real embedding model
+(all-MiniLM-L6-v2), so encoder and insert costs are both included.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from unittest.mock import patch
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import chromadb
+from memory import vector_store
+from memory.embedding_cache import EmbeddingCache
+
+
+def _items(n, offset=0):
+    return [
+        (
+            f"Deployment report {offset + i}: rollback of service {i % 17} after latency regression in region {i % 5}.",
+            {"memory_type": "knowledge", "tags": ["bench", f"service_{i % 17}"], "score": 1.0, "source_task": "bench"},
+        )
+        for i in range(n)
+    ]
+
+
+def _run(label, n, fn):
+    client = chromadb.PersistentClient(path=tempfile.mkdtemp(prefix="weion_bench_mem_"))
+    collection = client.get_or_create_collection("bench")
+    # Cold, memory-only embedding cache so both runs pay the full encoder cost
+    cache = EmbeddingCache(vector_store.embedding_cache.encode_fn, vector_store.EMBED_MODEL_NAME, path=None)
+    with patch("memory.vector_store.collection", collection), \
+         patch("memory.vector_store.embedding_cache", cache), \
+         patch("memory.vector_store.MEMORY_BUDGET", n * 2):
+        started = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - started
+    assert collection.count() == n, f"{label}: stored {collection.count()} of {n}"
+    print(f"{label:<10} n={n:<6} {elapsed * 1000:9.1f}ms  {n / elapsed:8.1f} memories/s")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--n", type=int, default=500, help="memories to ingest")
+    parser.add_argument("--batch", type=int, default=vector_store.ENCODE_BATCH_SIZE, help="add_memories batch size")
+    args = parser.parse_args()
+
+    if vector_store.embedder is None:
+        sys.exit("Embedding model unavailable (all-MiniLM-L6-v2 could not be loaded).")
+
+    vector_store.embedder.encode(["warm up"])
+
+    def single():
+        for summary, meta in _items(args.n):
+            vector_store.add_memory(summary, meta)
+
+    def batched():
+        items = _items(args.n)
+        with patch("memory.vector_store.ENCODE_BATCH_SIZE", args.batch):
+            for start in range(0, len(items), args.batch):
+                vector_store.add_memories(items[start:start + args.batch])
+
+    single_s = _run("single", args.n, single)
+    batched_s = _run("batched", args.n, batched)
+    print(f"speedup: {single_s / batched_s:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
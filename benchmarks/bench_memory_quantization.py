@@ -0,0 +1,95 @@
+# benchmarks/bench_memory_quantization.py
+"""
+Quantized memory storage: bytes per memory, query latency and recall@k of the NumPy
+vector backend with float32 vectors vs. int8 codes (with and without float32 re-ranking).
+
+    python benchmarks/bench_memory_quantization.py                    # 20000 x 384, 200 queries, k=5
+    python benchmarks/bench_memory_quantization.py --n 100000 --rerank 2 4 8
+    python benchmarks/bench_memory_quantization.py --ivf 10000        # IVF above 10000 vectors
+
+Vectors are unit-normalized and clustered like sentence embeddings (MiniLM's 384 dims).
+Recall@k is measured against exact float32 brute force; bytes are the files on disk
+divided by the number of memories (documents and metadata excluded, same for all runs).
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from memory.numpy_store import NumpyCollection
+
+
+def _embeddings(n, dim, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((max(8, n // 200), dim)).astype(np.float32)
+    data = centers[rng.integers(0, len(centers), n)] + 0.6 * rng.standard_normal((n, dim)).astype(np.float32)
+    return data / np.linalg.norm(data, axis=1, keepdims=True)
+
+
+def _vector_bytes(path, name):
+    return sum(
+        os.path.getsize(os.path.join(path, f))
+        for f in os.listdir(path)
+        if f.startswith(name + ".") and f.split(".")[-1] in ("f32", "i8")
+    )
+
+
+def _run(label, data, queries, expected, k, ivf, **kwargs):
+    path = tempfile.mkdtemp(prefix="weion_bench_quant_")
+    try:
+        store = NumpyCollection(path=path, name="bench", ivf_threshold=ivf, **kwargs)
+        for start in range(0, len(data), 4096):
+            chunk = data[start:start + 4096]
+            store.add(ids=[str(i) for i in range(start, start + len(chunk))], embeddings=chunk)
+        # Files are allocated ahead (capacity doubling): report what the stored vectors use
+        disk = _vector_bytes(path, "bench") / store._capacity
+        sizes = store.storage_bytes()
+
+        latencies, found = [], 0
+        for q, truth in zip(queries, expected):
+            started = time.perf_counter()
+            ids = store.query(query_embeddings=[q], n_results=k, include=[])["ids"][0]
+            latencies.append(time.perf_counter() - started)
+            found += len(truth & set(ids))
+        latencies.sort()
+        print(
+            f"{label:<16} scan={sizes['scan_per_vector']:5d}B  disk={disk:7.1f}B/memory  "
+            f"p50={latencies[len(latencies) // 2] * 1000:7.2f}ms  "
+            f"p95={latencies[int(len(latencies) * 0.95)] * 1000:7.2f}ms  "
+            f"recall@{k}={found / (len(queries) * k):6.1%}"
+        )
+        store.close()
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--n", type=int, default=20000, help="memories stored")
+    parser.add_argument("--dim", type=int, default=384, help="embedding dimension")
+    parser.add_argument("--queries", type=int, default=200, help="queries measured")
+    parser.add_argument("--k", type=int, default=5, help="memories recalled per query")
+    parser.add_argument("--rerank", type=int, nargs="+", default=[4], help="int8 re-rank factors to compare")
+    parser.add_argument("--ivf", type=int, default=10 ** 9, help="IVF threshold (default: exact search)")
+    args = parser.parse_args()
+
+    data = _embeddings(args.n, args.dim)
+    rng = np.random.default_rng(1)
+    queries = data[rng.integers(0, args.n, args.queries)] + 0.05 * rng.standard_normal((args.queries, args.dim)).astype(np.float32)
+    expected = [set(map(str, np.argsort(((data - q) ** 2).sum(axis=1))[:args.k])) for q in queries]
+
+    print(f"n={args.n} dim={args.dim} queries={args.queries} k={args.k}")
+    _run("float32", data, queries, expected, args.k, args.ivf, quantization="none")
+    for factor in args.rerank:
+        _run(f"int8 rerank x{factor}", data, queries, expected, args.k, args.ivf, quantization="int8", rerank_factor=factor)
+    _run("int8 no rerank", data, queries, expected, args.k, args.ivf, quantization="int8", rerank_factor=0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+# benchmarks/bench_pipeline.py
+"""
+Orchestration overhead of run_atomic_task / run_goal_loop, separated from model latency.
+
+    python benchmarks/bench_pipeline.py                       # synthetic model, no Ollama
+    python benchmarks/bench_pipeline.py --latency 0.05        # plus 50ms simulated per call
+    LLM_BACKEND=record python main.py ...                     # record a cassette against Ollama
+    python benchmarks/bench_pipeline.py --cassette logs/llm_cassette.jsonl.gz --scale 1.0
+
+Overhead = wall time - simulated model time (planner/agents, verifier, DB writes, memory).
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Isolated LLM response cache, so every call reaches the backend under test
+os.environ.setdefault("LLM_CACHE_DB", os.path.join(tempfile.mkdtemp(prefix="weion_bench_"), "llm_cache.db"))
+
+from brain.llm_backends import FakeBackend, ReplayBackend
+from brain.llm_client import set_client
+
+
+def _timed(fn, *args, **kwargs):
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = fn(*args, **kwargs)
+    return result, time.perf_counter() - started
+
+
+def _report(label, walls, backend, model_before):
+    model = backend.stats["model_seconds"] - model_before
+    total = sum(walls)
+    walls = sorted(walls)
+    print(
+        f"{label:<14} runs={len(walls):<4} wall={total * 1000:9.1f}ms  "
+        f"p50={walls[len(walls) // 2] * 1000:8.1f}ms  model={model * 1000:9.1f}ms  "
+        f"overhead={(total - model) * 1000:9.1f}ms ({(total - model) / len(walls) * 1000:.1f}ms/run)"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=10, help="atomic tasks to run")
+    parser.add_argument("--goals", type=int, default=2, help="goals to run through run_goal_loop")
+    parser.add_argument("--latency", type=float, default=0.0, help="fake model: seconds per call")
+    parser.add_argument("--cassette", help="replay this cassette instead of the fake model")
+    parser.add_argument("--scale", type=float, default=0.0, help="replay: fraction of recorded latency")
+    args = parser.parse_args()
+
+    if args.cassette:
+        backend = ReplayBackend(args.cassette, latency_scale=args.scale, fallback=FakeBackend(latency=args.latency))
+    else:
+        backend = FakeBackend(latency=args.latency)
+    set_client(backend)
+
+    from brain.task_executor import run_atomic_task
+    from autonomy.goal_engine import run_goal_loop
+
+    before = backend.stats["model_seconds"]
+    walls = [_timed(run_atomic_task, f"Analyze deployment report #{i}")[1] for i in range(args.tasks)]
+    _report("atomic_task", walls, backend, before)
+
+    if args.goals:
+        before = backend.stats["model_seconds"]
+        walls = [_timed(run_goal_loop, f"Prepare quarterly reliability review #{i}")[1] for i in range(args.goals)]
+        _report("goal_loop", walls, backend, before)
+
+    print(f"backend stats: {backend.stats}")
+
+
+if __name__ == "__main__":
+    main()
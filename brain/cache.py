@@ -1,21 +1,339 @@
+# brain/cache.py
+
 import hashlib
 import json
+import logging
 import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from api.config import OLLAMA_MODEL
+
+# Initialize logger
+logger = logging.getLogger(__name__)
+
+# ================= CONFIG =================
 
-CACHE_DIR = "logs/llm_cache"
-os.makedirs(CACHE_DIR, exist_ok=True)
+CACHE_DB = os.getenv("LLM_CACHE_DB", "logs/llm_cache.db")
+LEGACY_CACHE_DIR = "logs/llm_cache"  # Old one-JSON-file-per-prompt layout
+
+CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "50000"))
+CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600)))  # seconds, 0 = never expire
+HOT_TIER_SIZE = int(os.getenv("LLM_CACHE_HOT_SIZE", "512"))
+
+DEFAULT_TEMPLATE_VERSION = "v1"
 
 def _hash(prompt: str) -> str:
     return hashlib.md5(prompt.encode()).hexdigest()
 
-def get_cached(prompt: str):
-    path = f"{CACHE_DIR}/{_hash(prompt)}.json"
-    if os.path.exists(path):
-        with open(path, "r") as f:
-            return json.load(f)["response"]
-    return None
-
-def set_cache(prompt: str, response: str):
-    path = f"{CACHE_DIR}/{_hash(prompt)}.json"
-    with open(path, "w") as f:
-        json.dump({"response": response}, f)
+def cache_namespace(model: str = OLLAMA_MODEL, template_version: str = DEFAULT_TEMPLATE_VERSION) -> str:
+    """Responses are only reusable for the same model and the same prompt template revision."""
+    return f"{model}:{template_version}"
+
+# ================= ENGINE =================
+
+class LLMCache:
+    """
+    Size-bounded LLM response cache in a single SQLite (WAL) file.
+    - Two tiers: in-process LRU dict (hot) in front of SQLite (warm).
+    - LRU eviction against an entry and byte budget, per-entry TTL.
+    - Hot-tier hits do not write to SQLite; their access times are flushed before eviction.
+    """
+
+    def __init__(
+        self,
+        path: str = CACHE_DB,
+        max_bytes: int = CACHE_MAX_BYTES,
+        max_entries: int = CACHE_MAX_ENTRIES,
+        ttl: int = CACHE_TTL,
+        hot_size: int = HOT_TIER_SIZE,
+    ):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hot_size = hot_size
+
+        self._lock = threading.RLock()
+        self._hot: "OrderedDict[tuple, tuple]" = OrderedDict()  # (ns, key) -> (response, expires_at)
+        self._touched: Dict[tuple, float] = {}
+        self.counters = {"hits_hot": 0, "hits_disk": 0, "misses": 0, "sets": 0, "evictions": 0, "expired": 0}
+
+        is_new = path == ":memory:" or not os.path.exists(path)
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                namespace   TEXT NOT NULL,
+                key         TEXT NOT NULL,
+                response    TEXT NOT NULL,
+                size        INTEGER NOT NULL,
+                created_at  REAL NOT NULL,
+                expires_at  REAL,
+                last_access REAL NOT NULL,
+                hits        INTEGER DEFAULT 0,
+                PRIMARY KEY (namespace, key)
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_llm_cache_last_access ON llm_cache (last_access)")
+
+        row = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache").fetchone()
+        self._entries, self._bytes = row[0], row[1]
+
+        # First open of the default store imports the legacy per-prompt JSON files
+        if is_new and path == CACHE_DB and os.path.isdir(LEGACY_CACHE_DIR):
+            self.migrate_json(LEGACY_CACHE_DIR)
+
+    # ---------- hot tier ----------
+
+    def _hot_put(self, ident: tuple, response: str, expires_at: Optional[float]):
+        self._hot[ident] = (response, expires_at)
+        self._hot.move_to_end(ident)
+        while len(self._hot) > self.hot_size:
+            self._hot.popitem(last=False)
+
+    # ---------- public API ----------
+
+    def get(self, prompt: str, namespace: Optional[str] = None) -> Optional[str]:
+        ident = (namespace or cache_namespace(), _hash(prompt))
+        now = time.time()
+
+        with self._lock:
+            hot = self._hot.get(ident)
+            if hot is not None:
+                response, expires_at = hot
+                if expires_at is None or expires_at > now:
+                    self._hot.move_to_end(ident)
+                    self._touched[ident] = now
+                    self.counters["hits_hot"] += 1
+                    return response
+                del self._hot[ident]
+
+            row = self._conn.execute(
+                "SELECT response, expires_at FROM llm_cache WHERE namespace = ? AND key = ?", ident
+            ).fetchone()
+
+            if row is None:
+                self.counters["misses"] += 1
+                return None
+
+            response, expires_at = row
+            if expires_at is not None and expires_at <= now:
+                self._delete(ident)
+                self.counters["expired"] += 1
+                self.counters["misses"] += 1
+                return None
+
+            self._conn.execute(
+                "UPDATE llm_cache SET last_access = ?, hits = hits + 1 WHERE namespace = ? AND key = ?",
+                (now, *ident)
+            )
+            self._hot_put(ident, response, expires_at)
+            self.counters["hits_disk"] += 1
+            return response
+
+    def set(self, prompt: str, response: str, namespace: Optional[str] = None, ttl: Optional[int] = None):
+        ident = (namespace or cache_namespace(), _hash(prompt))
+        self._put(ident, response, ttl)
+
+    def _put(self, ident: tuple, response: str, ttl: Optional[int] = None):
+        now = time.time()
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = now + ttl if ttl else None
+        size = len(response.encode())
+
+        with self._lock:
+            old = self._conn.execute(
+                "SELECT size FROM llm_cache WHERE namespace = ? AND key = ?", ident
+            ).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (namespace, key, response, size, created_at, expires_at, last_access, hits) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, 0)",
+                (*ident, response, size, now, expires_at, now)
+            )
+            if old:
+                self._bytes += size - old[0]
+            else:
+                self._entries += 1
+                self._bytes += size
+
+            self._hot_put(ident, response, expires_at)
+            self.counters["sets"] += 1
+
+            if self._entries > self.max_entries or self._bytes > self.max_bytes:
+                self._evict()
+
+    def _delete(self, ident: tuple):
+        row = self._conn.execute(
+            "DELETE FROM llm_cache WHERE namespace = ? AND key = ? RETURNING size", ident
+        ).fetchone()
+        if row:
+            self._entries -= 1
+            self._bytes -= row[0]
+        self._hot.pop(ident, None)
+
+    def _flush_touched(self):
+        if self._touched:
+            self._conn.executemany(
+                "UPDATE llm_cache SET last_access = ?, hits = hits + 1 WHERE namespace = ? AND key = ?",
+                [(ts, *ident) for ident, ts in self._touched.items()]
+            )
+            self._touched.clear()
+
+    def _evict(self):
+        """Drops expired entries, then least-recently-used ones until back under ~90% of budget."""
+        self._flush_touched()
+        now = time.time()
+
+        expired = self._conn.execute(
+            "DELETE FROM llm_cache WHERE expires_at IS NOT NULL AND expires_at <= ? RETURNING namespace, key, size",
+            (now,)
+        ).fetchall()
+        for ns, key, size in expired:
+            self._entries -= 1
+            self._bytes -= size
+            self._hot.pop((ns, key), None)
+        self.counters["expired"] += len(expired)
+
+        target_entries = int(self.max_entries * 0.9)
+        target_bytes = int(self.max_bytes * 0.9)
+        if self._entries <= target_entries and self._bytes <= target_bytes:
+            return
+
+        victims = []
+        entries, total = self._entries, self._bytes
+        cursor = self._conn.execute("SELECT namespace, key, size FROM llm_cache ORDER BY last_access ASC")
+        for ns, key, size in cursor:
+            if entries <= target_entries and total <= target_bytes:
+                break
+            victims.append((ns, key))
+            entries -= 1
+            total -= size
+        cursor.close()
+
+        self._conn.execute("BEGIN")
+        self._conn.executemany("DELETE FROM llm_cache WHERE namespace = ? AND key = ?", victims)
+        self._conn.execute("COMMIT")
+        for ident in victims:
+            self._hot.pop(ident, None)
+
+        self._entries, self._bytes = entries, total
+        self.counters["evictions"] += len(victims)
+        logger.info(f"LLM cache evicted {len(victims)} entries ({self._entries} left, {self._bytes} bytes)")
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+            self._hot.clear()
+            self._touched.clear()
+            self._entries, self._bytes = 0, 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.counters["hits_hot"] + self.counters["hits_disk"] + self.counters["misses"]
+            hits = self.counters["hits_hot"] + self.counters["hits_disk"]
+            return {
+                **self.counters,
+                "entries": self._entries,
+                "bytes": self._bytes,
+                "hot_entries": len(self._hot),
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            }
+
+    # ---------- migration ----------
+
+    def migrate_json(self, src_dir: str = LEGACY_CACHE_DIR, namespace: Optional[str] = None, remove: bool = False) -> int:
+        """
+        Imports legacy `<md5>.json` files. Their names are already md5(prompt), so keys carry over.
+        Legacy entries were all produced by the default model with the original templates.
+        """
+        namespace = namespace or cache_namespace()
+        now = time.time()
+        expires_at = now + self.ttl if self.ttl else None
+        read: List[str] = []   # Files taken over (removed afterwards with remove=True)
+        stored = [0]
+
+        def rows():
+            # Read lazily: executemany streams the files into the one transaction
+            for name in sorted(os.listdir(src_dir)):
+                if not name.endswith(".json"):
+                    continue
+                path = os.path.join(src_dir, name)
+                try:
+                    with open(path, "r") as f:
+                        response = json.load(f)["response"]
+                except (OSError, ValueError, KeyError) as e:
+                    logger.warning(f"Skipping unreadable cache file {path}: {e}")
+                    continue
+                read.append(path)
+                if response:
+                    stored[0] += 1
+                    yield (namespace, name[:-5], response, len(response.encode()), now, expires_at, now)
+
+        # One transaction (one fsync) for the whole import instead of one per file
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO llm_cache (namespace, key, response, size, created_at, expires_at, last_access, hits) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, 0)",
+                    rows()
+                )
+                self._conn.execute("COMMIT")
+            except sqlite3.Error:
+                self._conn.execute("ROLLBACK")
+                raise
+            # Replaced keys do not add entries: re-count once rather than per row
+            self._entries, self._bytes = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache"
+            ).fetchone()
+            self.counters["sets"] += stored[0]
+            if self._entries > self.max_entries or self._bytes > self.max_bytes:
+                self._evict()
+
+        if remove:
+            for path in read:
+                os.remove(path)
+
+        logger.info(f"Imported {stored[0]} legacy LLM cache files from {src_dir}")
+        return stored[0]
+
+    def close(self):
+        with self._lock:
+            self._flush_touched()
+            self._conn.close()
+
+# ================= MODULE API =================
+
+_cache: Optional[LLMCache] = None
+_cache_lock = threading.Lock()
+
+def get_cache() -> LLMCache:
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = LLMCache()
+    return _cache
+
+def get_cached(prompt: str, namespace: Optional[str] = None):
+    return get_cache().get(prompt, namespace)
+
+def set_cache(prompt: str, response: str, namespace: Optional[str] = None, ttl: Optional[int] = None):
+    get_cache().set(prompt, response, namespace, ttl)
+
+def cache_stats() -> Dict[str, Any]:
+    return get_cache().stats()
+
+if __name__ == "__main__":
+    # python -m brain.cache  -> one-off import of the legacy JSON directory
+    count = get_cache().migrate_json(LEGACY_CACHE_DIR)
+    print(f"Imported {count} entries. Stats: {cache_stats()}")
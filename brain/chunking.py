@@ -0,0 +1,97 @@
+# brain/chunking.py
+
+import contextvars
+import hashlib
+import logging
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List
+
+from api.config import LLM_MAX_CONCURRENCY
+from brain import metrics
+
+# Initialize logger
+logger = logging.getLogger(__name__)
+
+# ================= CONFIG =================
+
+CHUNK_CHARS = int(os.getenv("LLM_CHUNK_CHARS", "8000"))  # Max characters per map prompt
+ANCHOR_EVERY = 4  # On average every Nth section starts a new chunk regardless of fill
+
+# Coarsest boundary first: markdown headings, paragraphs, lines, sentences, words
+_BOUNDARIES = [
+    (r"\n(?=#{1,6} )", "\n"),
+    (r"\n[ \t]*\n", "\n\n"),
+    (r"\n", "\n"),
+    (r"(?<=[.!?])\s+", " "),
+    (r"\s+", " "),
+]
+
+# ================= SPLITTING =================
+
+def _is_anchor(piece: str) -> bool:
+    return int(hashlib.md5(piece.encode()).hexdigest(), 16) % ANCHOR_EVERY == 0
+
+def _split(text: str, max_chars: int, level: int) -> List[str]:
+    if len(text) <= max_chars:
+        return [text]
+    if level == len(_BOUNDARIES):
+        return [text[i:i + max_chars] for i in range(0, len(text), max_chars)]
+
+    pattern, joiner = _BOUNDARIES[level]
+    pieces = [p for p in re.split(pattern, text) if p.strip()]
+    if len(pieces) <= 1:
+        return _split(text, max_chars, level + 1)
+
+    chunks, current = [], ""
+    min_fill = max_chars // 4
+    for piece in pieces:
+        for part in _split(piece, max_chars, level + 1):
+            candidate = f"{current}{joiner}{part}" if current else part
+            # Content-defined boundaries: a chunk also closes before an "anchor" section, so an
+            # edit only shifts chunk boundaries up to the next anchor instead of to the end
+            if current and (len(candidate) > max_chars or (len(current) >= min_fill and _is_anchor(part))):
+                chunks.append(current)
+                current = part
+            else:
+                current = candidate
+    if current:
+        chunks.append(current)
+    return chunks
+
+def split_text(text: str, max_chars: int = CHUNK_CHARS) -> List[str]:
+    """
+    Splits text into chunks of at most `max_chars`, preferring structural boundaries
+    (headings > paragraphs > lines > sentences > words). Boundaries depend on content,
+    not position, so unchanged parts of a re-read document produce identical chunks
+    (and therefore LLM cache hits).
+    """
+    if not text.strip():
+        return []
+    return _split(text, max_chars, 0)
+
+# ================= MAP =================
+
+def map_concurrent(fn: Callable[[Any], Any], items: List[Any], return_exceptions: bool = False) -> List[Any]:
+    """
+    Applies fn to every item on up to LLM_MAX_CONCURRENCY threads, preserving order.
+    Workers run in a copy of the caller's context, so LLM calls keep the caller's
+    priority lane; the global gate still bounds what reaches the model.
+    """
+    metrics.incr("chunking.map_items", len(items))
+
+    def run(item):
+        try:
+            return fn(item)
+        except Exception as e:
+            if not return_exceptions:
+                raise
+            return e
+
+    if len(items) <= 1:
+        return [run(item) for item in items]
+
+    with ThreadPoolExecutor(max_workers=min(len(items), LLM_MAX_CONCURRENCY)) as executor:
+        futures = [executor.submit(contextvars.copy_context().run, run, item) for item in items]
+        return [f.result() for f in futures]
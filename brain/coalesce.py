@@ -0,0 +1,89 @@
+# brain/coalesce.py
+
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict
+
+from brain import metrics
+
+# Initialize logger
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """
+    Request coalescing: while a call for `key` is in flight, later callers with the
+    same key wait for it and receive its result instead of issuing their own.
+
+    Threaded callers (`do`) and asyncio callers (`do_async`) share the same in-flight
+    table, so a prompt started from an `asyncio.to_thread` worker also satisfies a
+    native async caller and vice versa.
+    """
+
+    def __init__(self, name: str = "llm"):
+        self.name = name
+        self._calls: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def _join(self, key: str):
+        """Returns (future, is_leader)."""
+        with self._lock:
+            fut = self._calls.get(key)
+            if fut is not None:
+                return fut, False
+            fut = Future()
+            self._calls[key] = fut
+            return fut, True
+
+    def _finish(self, key: str, fut: Future, result: Any = None, error: BaseException = None):
+        with self._lock:
+            self._calls.pop(key, None)
+        if error is not None:
+            fut.set_exception(error)
+        else:
+            fut.set_result(result)
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        fut, leader = self._join(key)
+        if not leader:
+            metrics.incr(f"{self.name}.coalesced_waits")
+            return fut.result()
+
+        metrics.incr(f"{self.name}.flights")
+        try:
+            result = fn()
+        except BaseException as e:
+            self._finish(key, fut, error=e)
+            raise
+        self._finish(key, fut, result=result)
+        return result
+
+    async def do_async(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        while True:
+            fut, leader = self._join(key)
+            if leader:
+                break
+            metrics.incr(f"{self.name}.coalesced_waits")
+            try:
+                # shield: a cancelled waiter must not cancel the shared future
+                return await asyncio.shield(asyncio.wrap_future(fut))
+            except asyncio.CancelledError:
+                if fut.cancelled() or (fut.done() and isinstance(fut.exception(), asyncio.CancelledError)):
+                    # The leader was cancelled, not us: take over the call
+                    continue
+                raise
+
+        metrics.incr(f"{self.name}.flights")
+        try:
+            result = await fn()
+        except BaseException as e:
+            self._finish(key, fut, error=e)
+            raise
+        self._finish(key, fut, result=result)
+        return result
@@ -0,0 +1,387 @@
+# brain/llm_backends.py
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from api.config import (
+    LLM_BACKEND,
+    LLM_CASSETTE,
+    LLM_REPLAY_LATENCY,
+    LLM_HEALTH_INTERVAL,
+    OLLAMA_HOST,
+    OLLAMA_HOSTS,
+    OLLAMA_MODEL,
+)
+from brain.llm_client import BufferedStream, LLMBackend, LLMTransportError, OllamaClient
+
+# Initialize logger
+logger = logging.getLogger(__name__)
+
+# ================= CASSETTES =================
+
+def _digest(context: Optional[List[int]]) -> str:
+    if not context:
+        return ""
+    return hashlib.md5(json.dumps(context).encode()).hexdigest()[:16]
+
+def _request_key(model: str, system: Optional[str], prompt: str, context_digest: str) -> str:
+    raw = json.dumps([model, system or "", prompt, context_digest])
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+class Cassette:
+    """
+    Recorded prompt -> response pairs with timing, one JSON line per generation in a
+    gzip file. Each append is its own gzip member, so recording is crash-safe and the
+    file stays readable with a plain gzip.open.
+
+    Token contexts are not stored (they are thousands of ints); entries keep a short
+    digest of the context they were called with and the one they returned, which is
+    enough to chain conversation turns on replay.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            self._load()
+
+    def _load(self):
+        with gzip.open(self.path, "rt", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self.entries[entry["key"]] = entry
+        logger.info(f"Loaded {len(self.entries)} cassette entries from {self.path}")
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        return self.entries.get(key)
+
+    def append(self, entry: Dict[str, Any]):
+        with self._lock:
+            self.entries[entry["key"]] = entry
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with gzip.open(self.path, "at", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+
+    def __len__(self):
+        return len(self.entries)
+
+# ================= RECORD =================
+
+class _RecordingStream:
+    """Passes chunks through and records the (possibly early-cancelled) generation at the end."""
+
+    def __init__(self, inner, on_finish, started: float):
+        self._inner = inner
+        self._on_finish = on_finish
+        self._parts = []
+        self._started = started
+        self._finished = False
+
+    @property
+    def done(self):
+        return self._inner.done
+
+    @property
+    def final(self):
+        return self._inner.final
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            chunk = next(self._inner)
+        except StopIteration:
+            self._finish()
+            raise
+        self._parts.append(chunk.get("response", ""))
+        if chunk.get("done"):
+            self._finish()
+        return chunk
+
+    def _finish(self):
+        if not self._finished:
+            self._finished = True
+            payload = {**self._inner.final, "response": "".join(self._parts)}
+            self._on_finish(payload, time.perf_counter() - self._started, self._inner.done)
+
+    def cancel(self):
+        self._inner.cancel()
+        self._finish()
+
+    close = cancel
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cancel()
+
+
+class RecordingBackend(LLMBackend):
+    """Forwards every call to `inner` (normally the live OllamaClient) and records it to a cassette."""
+
+    def __init__(self, inner: LLMBackend, path: str = LLM_CASSETTE):
+        self.inner = inner
+        self.cassette = Cassette(path)
+        self.stats = {"requests": 0, "recorded": 0}
+
+    def _record(self, model, system, prompt, context, payload, seconds, completed=True):
+        self.cassette.append({
+            "key": _request_key(model, system, prompt, _digest(context)),
+            "prompt": prompt[:120],  # For humans reading the cassette; not used for lookup
+            "response": payload.get("response", ""),
+            "duration_ms": round(seconds * 1000, 2),
+            "prompt_eval_count": payload.get("prompt_eval_count"),
+            "eval_count": payload.get("eval_count"),
+            "ctx_out": _digest(payload.get("context")),
+            "done": completed,
+        })
+        self.stats["recorded"] += 1
+
+    def generate(self, prompt, model=None, system=None, context=None, options=None):
+        model = model or OLLAMA_MODEL
+        self.stats["requests"] += 1
+        started = time.perf_counter()
+        payload = self.inner.generate(prompt, model=model, system=system, context=context, options=options)
+        self._record(model, system, prompt, context, payload, time.perf_counter() - started)
+        return payload
+
+    def generate_stream(self, prompt, model=None, system=None, context=None, options=None):
+        model = model or OLLAMA_MODEL
+        self.stats["requests"] += 1
+        started = time.perf_counter()
+        inner = self.inner.generate_stream(prompt, model=model, system=system, context=context, options=options)
+        return _RecordingStream(
+            inner,
+            lambda payload, seconds, completed: self._record(model, system, prompt, context, payload, seconds, completed),
+            started
+        )
+
+    def list_models(self):
+        return self.inner.list_models()
+
+    def close(self):
+        self.inner.close()
+
+# ================= REPLAY =================
+
+class ReplayBackend(LLMBackend):
+    """
+    Serves generations from a cassette, with no Ollama needed.
+    latency_scale: 0 = instant, 1.0 = recorded wall time, anything in between for what-ifs.
+    fallback: backend for prompts missing from the cassette (e.g. FakeBackend); without one
+    a miss raises LLMTransportError, like an unreachable server would.
+    """
+
+    def __init__(self, path: str = LLM_CASSETTE, latency_scale: float = LLM_REPLAY_LATENCY, fallback: Optional[LLMBackend] = None):
+        self.cassette = Cassette(path)
+        self.latency_scale = latency_scale
+        self.fallback = fallback
+        self._contexts: Dict[tuple, str] = {}  # placeholder context -> recorded ctx_out digest
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "hits": 0, "misses": 0, "model_seconds": 0.0}
+
+    def _lookup(self, prompt, model, system, context):
+        model = model or OLLAMA_MODEL
+        with self._lock:
+            self.stats["requests"] += 1
+            context_digest = self._contexts.get(tuple(context), _digest(context)) if context else ""
+        entry = self.cassette.get(_request_key(model, system, prompt, context_digest))
+
+        with self._lock:
+            if entry is None:
+                self.stats["misses"] += 1
+                return model, None, []
+            self.stats["hits"] += 1
+            # Stand-in token context the next turn can be chained from
+            placeholder = [len(self._contexts) + 1]
+            self._contexts[tuple(placeholder)] = entry.get("ctx_out", "")
+        return model, entry, placeholder
+
+    def _payload(self, model, entry, placeholder) -> Dict[str, Any]:
+        return {
+            "model": model,
+            "response": entry["response"],
+            "done": True,
+            # A generation recorded as cancelled early returned no context either
+            "context": placeholder if entry.get("done", True) else None,
+            "prompt_eval_count": entry.get("prompt_eval_count"),
+            "eval_count": entry.get("eval_count"),
+            "total_duration": int(entry.get("duration_ms", 0) * 1e6),
+        }
+
+    def _delay(self, entry) -> float:
+        seconds = entry.get("duration_ms", 0) / 1000 * self.latency_scale
+        with self._lock:
+            self.stats["model_seconds"] += seconds
+        return seconds
+
+    def _miss(self, prompt):
+        if self.fallback is None:
+            raise LLMTransportError(f"Prompt not in cassette {self.cassette.path}: {prompt[:80]!r}")
+        logger.debug(f"Cassette miss, using fallback backend: {prompt[:80]!r}")
+
+    def generate(self, prompt, model=None, system=None, context=None, options=None):
+        model, entry, placeholder = self._lookup(prompt, model, system, context)
+        if entry is None:
+            self._miss(prompt)
+            return self.fallback.generate(prompt, model=model, system=system, context=context, options=options)
+        delay = self._delay(entry)
+        if delay:
+            time.sleep(delay)
+        return self._payload(model, entry, placeholder)
+
+    def generate_stream(self, prompt, model=None, system=None, context=None, options=None):
+        model, entry, placeholder = self._lookup(prompt, model, system, context)
+        if entry is None:
+            self._miss(prompt)
+            return self.fallback.generate_stream(prompt, model=model, system=system, context=context, options=options)
+        payload = self._payload(model, entry, placeholder)
+        tokens = max(1, len(payload["response"].split(" ")))
+        return BufferedStream(payload, token_delay=self._delay(entry) / tokens)
+
+    def list_models(self):
+        return [OLLAMA_MODEL]
+
+# ================= FAKE MODEL =================
+
+def _pick(seed: str, options: List[str]) -> str:
+    return options[int(hashlib.md5(seed.encode()).hexdigest(), 16) % len(options)]
+
+def _first_match(pattern: str, text: str, default: str) -> str:
+    match = re.search(pattern, text)
+    return match.group(1).strip() if match else default
+
+
+class FakeBackend(LLMBackend):
+    """
+    Synthetic model that answers every WEION prompt template with schema-valid output
+    (planner, decomposer, memory decision, failure analysis, analyze_text, summarize,
+    including their map-reduce prompts),
+    deterministically per prompt. Lets the full pipeline run without a model so its own
+    overhead can be measured; `latency` / `token_latency` simulate model time.
+    """
+
+    def __init__(self, latency: float = 0.0, token_latency: float = 0.0):
+        self.latency = latency
+        self.token_latency = token_latency
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "model_seconds": 0.0}
+
+    # ---------- templates ----------
+
+    def _plan(self, prompt: str) -> Dict[str, Any]:
+        task = _first_match(r"USER REQUEST:\s*(.+)", prompt, "the requested task")
+        return {
+            "goal": task[:120],
+            "confidence": 0.85,
+            "steps": [
+                {"step_id": 1, "action": "analyze_text", "input": {"text": f"Notes on {task}"}},
+                {"step_id": 2, "action": "summarize", "input": {"text": f"Findings for {task}"}},
+                {"step_id": 3, "action": "respond_user", "input": {"message": f"Completed: {task}"}},
+            ],
+        }
+
+    def _decomposition(self, prompt: str) -> Dict[str, Any]:
+        goal = _first_match(r"INPUT GOAL:\s*(.+)", prompt, "the goal")[:120]
+        return {
+            "strategy_explanation": f"Gather facts, analyze them, then report on {goal}.",
+            "tasks": [f"Analyze requirements for {goal}", f"Summarize findings on {goal}", f"Report results of {goal}"],
+        }
+
+    def _respond(self, prompt: str, system: str) -> str:
+        if "Planner Agent" in system:
+            return json.dumps(self._plan(prompt))
+        if "STRATEGIST" in system:
+            return json.dumps(self._decomposition(prompt))
+        if "MEMORY DECISION AGENT" in prompt:
+            task = _first_match(r"Task:\s*(.+)", prompt, "task")
+            return json.dumps({
+                "decision": _pick(prompt, ["STORE", "SKIP"]),
+                "memory_type": _pick(prompt, ["knowledge", "strategy"]),
+                "summary": f"Breaking '{task[:80]}' into analyze, summarize and report steps works reliably.",
+                "tags": ["synthetic", "pipeline"],
+                "reason": "Reusable execution pattern.",
+            })
+        if "FAILURE ANALYZER" in prompt:
+            return json.dumps({
+                "failure_type": "POOR_QUALITY",
+                "root_causes": ["Output lacked detail"],
+                "recommended_fix": ["Add an analyze_text step before responding"],
+            })
+        if '"key_points"' in prompt:
+            return json.dumps({
+                "key_points": ["The text describes the task scope", "Inputs are well defined"],
+                "themes": ["planning", "execution"],
+                "risks": ["Incomplete source data"],
+            })
+        if "Summarize the following text" in prompt or "PARTIAL SUMMARIES" in prompt:
+            return "- The task was analyzed and its findings recorded.\n- No blocking risks were identified."
+        return f"Synthetic answer ({_pick(prompt, ['alpha', 'beta', 'gamma'])}) to: {prompt.strip()[:80]}"
+
+    # ---------- backend API ----------
+
+    def _payload(self, prompt, model, system, context) -> Dict[str, Any]:
+        text = self._respond(prompt, system or "")
+        delay = self.latency + self.token_latency * len(text.split())
+        with self._lock:
+            self.stats["requests"] += 1
+            self.stats["model_seconds"] += delay
+        return {
+            "model": model or OLLAMA_MODEL,
+            "response": text,
+            "done": True,
+            "context": list(context or []) + [len(prompt)],
+            "prompt_eval_count": len(((system or "") + " " + prompt).split()),
+            "eval_count": len(text.split()),
+        }
+
+    def generate(self, prompt, model=None, system=None, context=None, options=None):
+        payload = self._payload(prompt, model, system, context)
+        delay = self.latency + self.token_latency * payload["eval_count"]
+        if delay:
+            time.sleep(delay)
+        return payload
+
+    def generate_stream(self, prompt, model=None, system=None, context=None, options=None):
+        payload = self._payload(prompt, model, system, context)
+        if self.latency:
+            time.sleep(self.latency)
+        return BufferedStream(payload, token_delay=self.token_latency)
+
+    def list_models(self):
+        return ["fake-model"]
+
+# ================= FACTORY =================
+
+def _ollama_backend() -> LLMBackend:
+    """One OllamaClient, or a load-balanced pool when OLLAMA_HOSTS lists several hosts."""
+    if len(OLLAMA_HOSTS) > 1:
+        from brain.llm_pool import EndpointPool
+        pool = EndpointPool(OLLAMA_HOSTS)
+        pool.start_health_checks(LLM_HEALTH_INTERVAL)
+        return pool
+    return OllamaClient(host=OLLAMA_HOSTS[0] if OLLAMA_HOSTS else OLLAMA_HOST)
+
+def create_backend(kind: str = LLM_BACKEND, cassette: str = LLM_CASSETTE) -> LLMBackend:
+    """Builds the backend named by LLM_BACKEND: ollama | record | replay | fake."""
+    if kind == "ollama":
+        return _ollama_backend()
+    if kind == "record":
+        return RecordingBackend(_ollama_backend(), cassette)
+    if kind == "replay":
+        return ReplayBackend(cassette, LLM_REPLAY_LATENCY)
+    if kind == "fake":
+        return FakeBackend()
+    raise ValueError(f"Unknown LLM_BACKEND '{kind}'. Use ollama, record, replay or fake.")
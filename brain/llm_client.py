@@ -0,0 +1,434 @@
+# brain/llm_client.py
+
+import abc
+import http.client
+import json
+import logging
+import socket
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Iterator, List, Optional
+from urllib.parse import urlparse
+
+from api.config import (
+    OLLAMA_HOST,
+    OLLAMA_MODEL,
+    OLLAMA_TIMEOUT,
+    OLLAMA_CONNECT_TIMEOUT,
+    OLLAMA_KEEP_ALIVE,
+    OLLAMA_POOL_SIZE,
+)
+
+# Initialize logger
+logger = logging.getLogger(__name__)
+
+# Errors that mean a pooled keep-alive socket was closed by the server while idle.
+# The request never reached Ollama, so it is safe to retry once on a fresh connection.
+STALE_CONNECTION_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.BadStatusLine,
+    BrokenPipeError,
+    ConnectionResetError,
+    ConnectionAbortedError,
+)
+
+
+class LLMTransportError(Exception):
+    """Raised when the Ollama HTTP API is unreachable or returns an error."""
+
+
+class OllamaStream:
+    """
+    Iterator over the NDJSON chunks of a streaming /api/generate response.
+    Closing it before the final chunk drops the connection, which makes Ollama
+    abort the generation. `cancel()` is safe to call from another thread.
+    """
+
+    def __init__(self, client: "OllamaClient", conn: http.client.HTTPConnection, resp: http.client.HTTPResponse):
+        self._client = client
+        self._conn = conn
+        self._resp = resp
+        self._closed = False
+        self.done = False
+        self.final: Dict[str, Any] = {}
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return self
+
+    def __next__(self) -> Dict[str, Any]:
+        if self._closed or self.done:
+            raise StopIteration
+        try:
+            line = self._resp.readline()
+        except (OSError, http.client.HTTPException, ValueError) as e:
+            self._abort()
+            if self._closed:
+                raise StopIteration
+            raise LLMTransportError(f"Ollama stream interrupted: {e}") from e
+
+        if not line:
+            self._abort()
+            raise LLMTransportError("Ollama stream ended before completion")
+
+        line = line.strip()
+        if not line:
+            return self.__next__()
+
+        chunk = json.loads(line)
+        if chunk.get("error"):
+            self._abort()
+            raise LLMTransportError(f"Ollama stream error: {chunk['error']}")
+
+        if chunk.get("done"):
+            self.done = True
+            self.final = chunk
+            self._resp.read()  # Drain the chunked terminator so the socket can be reused
+            if self._resp.will_close:
+                self._conn.close()
+            else:
+                self._client._release(self._conn)
+            self._closed = True
+        return chunk
+
+    def _abort(self):
+        if not self.done:
+            self._conn.close()
+
+    def cancel(self):
+        """Stop generation upstream. Unblocks a reader waiting on the socket."""
+        if self._closed or self.done:
+            return
+        self._closed = True
+        sock = self._conn.sock
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        self._conn.close()
+        with self._client._lock:
+            self._client.stats["cancelled"] += 1
+
+    close = cancel
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cancel()
+
+
+class BufferedStream:
+    """
+    OllamaStream look-alike over an already complete payload, for backends that do not
+    stream natively (replay, fake). Yields the response word by word, then the final chunk.
+    """
+
+    def __init__(self, payload: Dict[str, Any], token_delay: float = 0.0):
+        text = payload.get("response", "")
+        tokens = [w + " " for w in text.split(" ")]
+        tokens[-1] = tokens[-1][:-1]
+        self._tokens = deque(t for t in tokens if t)
+        self._payload = payload
+        self._token_delay = token_delay
+        self._closed = False
+        self.done = False
+        self.final: Dict[str, Any] = {}
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return self
+
+    def __next__(self) -> Dict[str, Any]:
+        if self._closed or self.done:
+            raise StopIteration
+        if self._tokens:
+            if self._token_delay:
+                time.sleep(self._token_delay)
+            return {"model": self._payload.get("model"), "response": self._tokens.popleft(), "done": False}
+        self.done = True
+        self.final = {**self._payload, "response": "", "done": True}
+        return self.final
+
+    def cancel(self):
+        self._closed = True
+
+    close = cancel
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cancel()
+
+
+class LLMBackend(abc.ABC):
+    """
+    What brain.model and the API layer call to generate text. OllamaClient is the live
+    implementation; brain.llm_backends adds record/replay cassettes and a synthetic model.
+    Payloads follow Ollama's /api/generate shape ('response', 'context', 'eval_count', ...).
+    A backend missing one of the abstract methods fails when it is created, not when called.
+    """
+
+    @abc.abstractmethod
+    def generate(
+        self,
+        prompt: str,
+        model: Optional[str] = None,
+        system: Optional[str] = None,
+        context: Optional[List[int]] = None,
+        options: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """Final payload of one generation."""
+
+    @abc.abstractmethod
+    def generate_stream(
+        self,
+        prompt: str,
+        model: Optional[str] = None,
+        system: Optional[str] = None,
+        context: Optional[List[int]] = None,
+        options: Optional[Dict[str, Any]] = None,
+    ):
+        """
+        Iterable of Ollama chunks with .final, .done, cancel() and context-manager support
+        (OllamaStream; BufferedStream wraps a complete payload).
+        """
+
+    @abc.abstractmethod
+    def list_models(self) -> List[str]:
+        """Model names the backend can serve."""
+
+    def close(self):
+        pass
+
+
+def _parse_host(host: str):
+    """Accepts 'http://host:port', 'host:port' or 'host' (OLLAMA_HOST conventions)."""
+    if "://" not in host:
+        host = f"http://{host}"
+    parsed = urlparse(host)
+    scheme = parsed.scheme or "http"
+    port = parsed.port or (443 if scheme == "https" else 11434)
+    return scheme, parsed.hostname or "127.0.0.1", port
+
+
+class OllamaClient(LLMBackend):
+    """
+    Talks to the Ollama HTTP API over a pool of persistent keep-alive connections.
+    Replaces spawning `ollama run` per prompt (process startup + CLI handshake on every call).
+    """
+
+    def __init__(
+        self,
+        host: str = OLLAMA_HOST,
+        model: str = OLLAMA_MODEL,
+        timeout: float = OLLAMA_TIMEOUT,
+        connect_timeout: float = OLLAMA_CONNECT_TIMEOUT,
+        keep_alive: str = OLLAMA_KEEP_ALIVE,
+        pool_size: int = OLLAMA_POOL_SIZE,
+    ):
+        self.scheme, self.hostname, self.port = _parse_host(host)
+        self.host = f"{self.scheme}://{self.hostname}:{self.port}"
+        self.model = model
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.keep_alive = keep_alive
+        self.pool_size = pool_size
+
+        self._idle: deque = deque()
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "connections_opened": 0, "connections_reused": 0, "errors": 0, "cancelled": 0}
+
+    # ================= CONNECTION POOL =================
+
+    def _new_connection(self) -> http.client.HTTPConnection:
+        conn_cls = http.client.HTTPSConnection if self.scheme == "https" else http.client.HTTPConnection
+        conn = conn_cls(self.hostname, self.port, timeout=self.connect_timeout)
+        conn.connect()
+        # Connect fast, but allow long generations once connected
+        conn.sock.settimeout(self.timeout)
+        with self._lock:
+            self.stats["connections_opened"] += 1
+        return conn
+
+    def _acquire(self):
+        """Returns (connection, reused). Most recently used socket first (warmest)."""
+        with self._lock:
+            if self._idle:
+                self.stats["connections_reused"] += 1
+                return self._idle.pop(), True
+        return self._new_connection(), False
+
+    def _release(self, conn: http.client.HTTPConnection):
+        with self._lock:
+            if len(self._idle) < self.pool_size:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+    def close(self):
+        """Closes every idle pooled connection."""
+        with self._lock:
+            idle, self._idle = list(self._idle), deque()
+        for conn in idle:
+            conn.close()
+
+    # ================= HTTP =================
+
+    def _send(self, method: str, path: str, payload: Optional[Dict[str, Any]], timeout: Optional[float] = None):
+        """
+        Sends a request and returns (connection, response) with the body still unread.
+        timeout: read timeout for this request (defaults to the client's).
+        """
+        body = json.dumps(payload).encode() if payload is not None else None
+        headers = {"Content-Type": "application/json", "Connection": "keep-alive"}
+
+        with self._lock:
+            self.stats["requests"] += 1
+
+        for attempt in range(2):
+            try:
+                conn, reused = self._acquire()
+            except OSError as e:
+                with self._lock:
+                    self.stats["errors"] += 1
+                raise LLMTransportError(f"Cannot connect to Ollama at {self.host}: {e}") from e
+
+            try:
+                conn.sock.settimeout(timeout or self.timeout)
+                conn.request(method, path, body=body, headers=headers)
+                return conn, conn.getresponse()
+            except STALE_CONNECTION_ERRORS as e:
+                conn.close()
+                if reused and attempt == 0:
+                    logger.debug(f"Pooled Ollama connection went stale, reconnecting: {e}")
+                    continue
+                with self._lock:
+                    self.stats["errors"] += 1
+                raise LLMTransportError(f"Ollama connection failed: {e}") from e
+            except (OSError, http.client.HTTPException) as e:
+                conn.close()
+                with self._lock:
+                    self.stats["errors"] += 1
+                raise LLMTransportError(f"Ollama request failed: {e}") from e
+
+        raise LLMTransportError("Ollama connection failed after reconnect")
+
+    def _check_status(self, conn: http.client.HTTPConnection, resp: http.client.HTTPResponse):
+        if resp.status >= 400:
+            raw = resp.read()
+            conn.close()
+            with self._lock:
+                self.stats["errors"] += 1
+            raise LLMTransportError(f"Ollama HTTP {resp.status}: {raw.decode(errors='ignore')[:500]}")
+
+    def _request(self, method: str, path: str, payload: Optional[Dict[str, Any]] = None, timeout: Optional[float] = None) -> Dict[str, Any]:
+        conn, resp = self._send(method, path, payload, timeout)
+        self._check_status(conn, resp)
+
+        try:
+            raw = resp.read()
+        except (OSError, http.client.HTTPException) as e:
+            conn.close()
+            with self._lock:
+                self.stats["errors"] += 1
+            raise LLMTransportError(f"Ollama request failed: {e}") from e
+
+        if resp.will_close:
+            conn.close()
+        else:
+            self._release(conn)
+
+        try:
+            return json.loads(raw) if raw else {}
+        except json.JSONDecodeError as e:
+            raise LLMTransportError(f"Ollama returned invalid JSON: {e}") from e
+
+    # ================= API =================
+
+    def _generate_payload(self, prompt, model, system, context, options, stream) -> Dict[str, Any]:
+        payload = {
+            "model": model or self.model,
+            "prompt": prompt,
+            "stream": stream,
+            "keep_alive": self.keep_alive,
+        }
+        if system:
+            payload["system"] = system
+        if context:
+            # Token state returned by a previous call: Ollama continues from it and only
+            # prefills the new prompt
+            payload["context"] = context
+        if options:
+            payload["options"] = options
+        return payload
+
+    def generate(
+        self,
+        prompt: str,
+        model: Optional[str] = None,
+        system: Optional[str] = None,
+        context: Optional[List[int]] = None,
+        options: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """
+        Non-streaming /api/generate call.
+        Returns the raw Ollama payload ('response', 'context', 'eval_count', 'total_duration', ...).
+        """
+        payload = self._generate_payload(prompt, model, system, context, options, stream=False)
+        return self._request("POST", "/api/generate", payload, timeout)
+
+    def generate_stream(
+        self,
+        prompt: str,
+        model: Optional[str] = None,
+        system: Optional[str] = None,
+        context: Optional[List[int]] = None,
+        options: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None,
+    ) -> OllamaStream:
+        """
+        Streaming /api/generate call. Iterate the result for chunks ({'response': token, 'done': False}, ...).
+        The last chunk has done=True and carries the usage counters.
+        timeout applies to each read, i.e. time to first token and between tokens.
+        """
+        payload = self._generate_payload(prompt, model, system, context, options, stream=True)
+        conn, resp = self._send("POST", "/api/generate", payload, timeout)
+        self._check_status(conn, resp)
+        return OllamaStream(self, conn, resp)
+
+    def list_models(self, timeout: Optional[float] = None) -> List[str]:
+        """Names of the models available on the server (cheap health check)."""
+        data = self._request("GET", "/api/tags", timeout=timeout)
+        return [m.get("name") for m in data.get("models", [])]
+
+
+# ================= SHARED CLIENT =================
+
+_client: Optional[OllamaClient] = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> LLMBackend:
+    """
+    Process-wide backend so every agent shares one connection pool.
+    Which backend is chosen by LLM_BACKEND (see brain.llm_backends.create_backend).
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                from brain.llm_backends import create_backend
+                _client = create_backend()
+    return _client
+
+
+def set_client(client: Optional[LLMBackend]):
+    """Swap the shared client (tests / alternate hosts). Closes the previous pool."""
+    global _client
+    with _client_lock:
+        previous, _client = _client, client
+    if previous is not None and previous is not client:
+        previous.close()
@@ -0,0 +1,401 @@
+# brain/llm_pool.py
+
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional
+
+from api.config import (
+    OLLAMA_MODEL,
+    OLLAMA_CONNECT_TIMEOUT,
+    LLM_HEDGE,
+    LLM_HEDGE_AFTER,
+    LLM_BREAKER_FAILURES,
+    LLM_BREAKER_COOLDOWN,
+)
+from brain import metrics
+from brain.llm_client import LLMBackend, LLMTransportError, OllamaClient
+
+# Initialize logger
+logger = logging.getLogger(__name__)
+
+# ================= CONFIG =================
+
+LATENCY_WINDOW = 200       # Latency samples kept per endpoint
+MIN_SAMPLES = 20           # Below this, p95 is not trusted: static timeout, no hedging
+TIMEOUT_MULTIPLIER = 4.0   # Adaptive timeout = p95 x this ...
+MIN_TIMEOUT = 15.0         # ... but never below this (seconds)
+
+# ================= CIRCUIT BREAKER =================
+
+class CircuitBreaker:
+    """
+    closed -> (N consecutive failures) -> open -> (cooldown) -> half_open
+    half_open lets exactly one probe request through: success closes, failure re-opens.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_threshold: int = LLM_BREAKER_FAILURES, cooldown: float = LLM_BREAKER_COOLDOWN):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trips = 0
+
+    def available(self) -> bool:
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN:
+            return time.monotonic() - self.opened_at >= self.cooldown
+        return False  # half_open: probe already in flight
+
+    def on_dispatch(self):
+        if self.state == self.OPEN:
+            self.state = self.HALF_OPEN
+
+    def record_success(self):
+        self.state = self.CLOSED
+        self.failures = 0
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self.trip()
+
+    def trip(self):
+        if self.state != self.OPEN:
+            self.trips += 1
+        self.state = self.OPEN
+        self.opened_at = time.monotonic()
+
+# ================= ENDPOINT =================
+
+class _Endpoint:
+    def __init__(self, client: OllamaClient, breaker: CircuitBreaker):
+        self.client = client
+        self.breaker = breaker
+        self.outstanding = 0
+        self.dispatched = 0
+        self.latencies: deque = deque(maxlen=LATENCY_WINDOW)
+        self.counters = {"requests": 0, "failures": 0, "hedges_won": 0}
+
+    def p95(self) -> Optional[float]:
+        if len(self.latencies) < MIN_SAMPLES:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+
+    def timeout(self) -> float:
+        """Adaptive read timeout: a multiple of observed p95, capped by the client's static timeout."""
+        p95 = self.p95()
+        if p95 is None:
+            return self.client.timeout
+        return min(self.client.timeout, max(MIN_TIMEOUT, p95 * TIMEOUT_MULTIPLIER))
+
+    def stats(self) -> Dict[str, Any]:
+        p95 = self.p95()
+        return {
+            **self.counters,
+            "host": self.client.host,
+            "state": self.breaker.state,
+            "trips": self.breaker.trips,
+            "outstanding": self.outstanding,
+            "p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+            "timeout_s": round(self.timeout(), 2),
+        }
+
+
+def _collect(stream) -> Dict[str, Any]:
+    parts = [chunk.get("response", "") for chunk in stream]
+    return {**stream.final, "response": "".join(parts)}
+
+
+class _PooledStream:
+    """Stream handle that reports its outcome back to the pool when it ends."""
+
+    def __init__(self, inner, on_finish: Callable[[Optional[float], Optional[Exception]], None]):
+        self._inner = inner
+        self._on_finish = on_finish
+        self._started = time.perf_counter()
+        self._finished = False
+
+    @property
+    def done(self):
+        return self._inner.done
+
+    @property
+    def final(self):
+        return self._inner.final
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            chunk = next(self._inner)
+        except StopIteration:
+            self._finish()
+            raise
+        except LLMTransportError as e:
+            self._finish(error=e)
+            raise
+        if chunk.get("done"):
+            self._finish(time.perf_counter() - self._started)
+        return chunk
+
+    def _finish(self, seconds: Optional[float] = None, error: Optional[Exception] = None):
+        if not self._finished:
+            self._finished = True
+            self._on_finish(seconds, error)
+
+    def cancel(self):
+        self._inner.cancel()
+        self._finish()
+
+    close = cancel
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cancel()
+
+# ================= POOL =================
+
+class EndpointPool(LLMBackend):
+    """
+    Load balancer over several Ollama hosts serving the same model.
+    - Least-outstanding-requests routing (ties: lower p95, then fewer dispatches).
+    - Per-host circuit breaker; failed calls fail over to the next healthy host.
+    - Adaptive per-host read timeout derived from observed p95 latency.
+    - Optional hedging for non-streaming calls: if the first host has not answered
+      after `hedge_after` (default: its p95), the call is re-issued to a second host,
+      the first answer wins and the slower request is cancelled.
+    Streams are routed and failed over at open, but not hedged.
+    """
+
+    def __init__(
+        self,
+        hosts: List[str],
+        model: str = OLLAMA_MODEL,
+        hedge: bool = LLM_HEDGE,
+        hedge_after: float = LLM_HEDGE_AFTER,
+        failure_threshold: int = LLM_BREAKER_FAILURES,
+        cooldown: float = LLM_BREAKER_COOLDOWN,
+        **client_kwargs,
+    ):
+        if not hosts:
+            raise ValueError("EndpointPool needs at least one host")
+        self.endpoints = [
+            _Endpoint(OllamaClient(host=host, model=model, **client_kwargs), CircuitBreaker(failure_threshold, cooldown))
+            for host in hosts
+        ]
+        self.model = model
+        self.hedge = hedge
+        self.hedge_after = hedge_after
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max(4, 2 * len(hosts)), thread_name_prefix="llm-hedge")
+        self._health_thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.counters = {"requests": 0, "failovers": 0, "hedges": 0, "no_healthy_endpoint": 0}
+
+    # ---------- routing ----------
+
+    def _pick(self, exclude=()) -> _Endpoint:
+        with self._lock:
+            candidates = [ep for ep in self.endpoints if ep not in exclude and ep.breaker.available()]
+            if not candidates:
+                self.counters["no_healthy_endpoint"] += 1
+                raise LLMTransportError("No healthy LLM endpoint available")
+            ep = min(candidates, key=lambda e: (e.outstanding, e.p95() or 0.0, e.dispatched))
+            ep.breaker.on_dispatch()
+            ep.outstanding += 1
+            ep.dispatched += 1
+            ep.counters["requests"] += 1
+            return ep
+
+    def _done(self, ep: _Endpoint, seconds: Optional[float] = None, error: Optional[Exception] = None):
+        """seconds=None and no error: cancelled, counts neither as success nor failure."""
+        with self._lock:
+            ep.outstanding -= 1
+            if error is not None:
+                ep.counters["failures"] += 1
+                ep.breaker.record_failure()
+                logger.warning(f"LLM endpoint {ep.client.host} failed ({ep.breaker.state}): {error}")
+            elif seconds is not None:
+                ep.latencies.append(seconds)
+                ep.breaker.record_success()
+            elif ep.breaker.state == CircuitBreaker.HALF_OPEN:
+                # A cancelled probe proved nothing; let the next request probe again
+                ep.breaker.trip()
+                ep.breaker.opened_at -= ep.breaker.cooldown
+
+    def _with_failover(self, call: Callable[[_Endpoint], Any], exclude=(), finish: bool = True):
+        """
+        Runs call(endpoint) on the best host, moving on to the next one on transport errors.
+        finish=False leaves the success bookkeeping to the returned object (streams).
+        """
+        tried = list(exclude)
+        last_error: Optional[Exception] = None
+        for _ in range(len(self.endpoints)):
+            try:
+                ep = self._pick(exclude=tried)
+            except LLMTransportError as e:
+                last_error = last_error or e
+                break
+            if tried:
+                with self._lock:
+                    self.counters["failovers"] += 1
+            tried.append(ep)
+            started = time.perf_counter()
+            try:
+                result = call(ep)
+            except LLMTransportError as e:
+                self._done(ep, error=e)
+                last_error = e
+                continue
+            if finish:
+                self._done(ep, time.perf_counter() - started)
+            return result
+        raise LLMTransportError(f"All LLM endpoints failed: {last_error}") from last_error
+
+    # ---------- hedging ----------
+
+    def _attempt(self, ep: _Endpoint, holder: Dict[str, Any], request: Dict[str, Any]) -> Dict[str, Any]:
+        """One hedged attempt, streamed internally so the losing request can be cancelled."""
+        started = time.perf_counter()
+        try:
+            stream = ep.client.generate_stream(timeout=ep.timeout(), **request)
+            holder["stream"] = stream
+            if holder.get("cancelled"):
+                stream.cancel()
+            payload = _collect(stream)
+        except LLMTransportError as e:
+            self._done(ep, error=None if holder.get("cancelled") else e)
+            raise
+        if not stream.done:
+            self._done(ep)
+            raise LLMTransportError("Hedged request cancelled")
+        self._done(ep, time.perf_counter() - started)
+        return payload
+
+    def _generate_hedged(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        primary = self._pick()
+        delay = self.hedge_after or primary.p95()
+        attempts = {}
+
+        def launch(ep):
+            holder = {}
+            attempts[self._executor.submit(self._attempt, ep, holder, request)] = (ep, holder)
+
+        launch(primary)
+        first = next(iter(attempts))
+        wait([first], timeout=delay)
+
+        if not first.done():
+            try:
+                launch(self._pick(exclude=[primary]))
+                with self._lock:
+                    self.counters["hedges"] += 1
+                metrics.incr("llm.hedges")
+            except LLMTransportError:
+                pass  # No second host available: just wait for the first
+
+        pending = set(attempts)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is not None:
+                    continue
+                ep, _ = attempts[future]
+                if future is not first:
+                    with self._lock:
+                        ep.counters["hedges_won"] += 1
+                for other, (_, holder) in attempts.items():
+                    if other is not future:
+                        holder["cancelled"] = True
+                        if holder.get("stream") is not None:
+                            holder["stream"].cancel()
+                return future.result()
+
+        # Every attempt failed: fall back to plain failover over the remaining hosts
+        tried = [ep for ep, _ in attempts.values()]
+        if len(tried) < len(self.endpoints):
+            return self._with_failover(lambda ep: ep.client.generate(timeout=ep.timeout(), **request), exclude=tried)
+        raise LLMTransportError(f"All LLM endpoints failed: {first.exception()}")
+
+    # ---------- backend API ----------
+
+    def generate(self, prompt, model=None, system=None, context=None, options=None):
+        with self._lock:
+            self.counters["requests"] += 1
+        request = {"prompt": prompt, "model": model or self.model, "system": system, "context": context, "options": options}
+        if self.hedge and len(self.endpoints) > 1:
+            return self._generate_hedged(request)
+        return self._with_failover(lambda ep: ep.client.generate(timeout=ep.timeout(), **request))
+
+    def generate_stream(self, prompt, model=None, system=None, context=None, options=None):
+        with self._lock:
+            self.counters["requests"] += 1
+        request = {"prompt": prompt, "model": model or self.model, "system": system, "context": context, "options": options}
+
+        def open_stream(ep):
+            inner = ep.client.generate_stream(timeout=ep.timeout(), **request)
+            return _PooledStream(inner, lambda seconds, error: self._done(ep, seconds, error))
+
+        return self._with_failover(open_stream, finish=False)
+
+    def list_models(self) -> List[str]:
+        models = set()
+        for ep in self.endpoints:
+            try:
+                models.update(ep.client.list_models(timeout=OLLAMA_CONNECT_TIMEOUT))
+            except LLMTransportError:
+                continue
+        return sorted(models)
+
+    # ---------- health ----------
+
+    def check_health(self):
+        """Pings every host: unreachable ones are opened, reachable open ones closed again."""
+        for ep in self.endpoints:
+            try:
+                ep.client.list_models(timeout=OLLAMA_CONNECT_TIMEOUT)
+                healthy = True
+            except LLMTransportError as e:
+                logger.warning(f"LLM endpoint {ep.client.host} failed health check: {e}")
+                healthy = False
+            with self._lock:
+                if not healthy:
+                    ep.breaker.trip()
+                elif ep.breaker.state == CircuitBreaker.OPEN:
+                    ep.breaker.record_success()
+                    logger.info(f"LLM endpoint {ep.client.host} recovered")
+
+    def start_health_checks(self, interval: float):
+        if self._health_thread is not None or interval <= 0:
+            return
+
+        def loop():
+            while not self._stop.wait(interval):
+                self.check_health()
+
+        self._health_thread = threading.Thread(target=loop, daemon=True, name="llm-health")
+        self._health_thread.start()
+
+    # ---------- observability ----------
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self.counters, "endpoints": [ep.stats() for ep in self.endpoints]}
+
+    def close(self):
+        self._stop.set()
+        self._executor.shutdown(wait=False)
+        for ep in self.endpoints:
+            ep.client.close()
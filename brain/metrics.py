@@ -0,0 +1,25 @@
+# brain/metrics.py
+
+import threading
+from collections import defaultdict
+from typing import Dict
+
+# Process-wide counters for the LLM layer (cheap enough to call on every request)
+_counters: Dict[str, int] = defaultdict(int)
+_lock = threading.Lock()
+
+def incr(name: str, amount: int = 1):
+    with _lock:
+        _counters[name] += amount
+
+def get(name: str) -> int:
+    with _lock:
+        return _counters.get(name, 0)
+
+def snapshot() -> Dict[str, int]:
+    with _lock:
+        return dict(_counters)
+
+def reset():
+    with _lock:
+        _counters.clear()
@@ -1,19 +1,362 @@
-import subprocess
-from brain.cache import get_cached, set_cache
+import asyncio
+import threading
+import time
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional
 
-MODEL = "qwen2.5:7b"
+from api.config import OLLAMA_MODEL
+from brain.cache import get_cached, set_cache, cache_namespace, _hash, DEFAULT_TEMPLATE_VERSION
+from brain import metrics
+from brain.coalesce import SingleFlight
+from brain.llm_client import get_client
+from brain.scheduler import gate, current_lane
+from brain.semantic_cache import get_semantic_cache
+from brain.usage import record_llm_call
 
-def ask_llm(prompt: str) -> str:
-    cached = get_cached(prompt)
+MODEL = OLLAMA_MODEL
+
+# Identical prompts issued concurrently (API /query, autonomy loop, resumed goals)
+# share one generation instead of each hitting Ollama.
+_inflight = SingleFlight("llm")
+
+# Optional observer for tokens of ask_llm calls (e.g. forward planner/action output to /ws/logs).
+# Called as sink(token, lane) from whichever thread runs the generation.
+_token_sink: Optional[Callable[[str, str], None]] = None
+
+# Tokens still read after a stop_when detector is satisfied. A model that ends its answer
+# right there delivers the final chunk (with its token context) within this window; one that
+# runs on into prose is cut off.
+EARLY_STOP_GRACE_TOKENS = 4
+
+def set_token_sink(sink: Optional[Callable[[str, str], None]]):
+    global _token_sink
+    _token_sink = sink
+
+def _call(
+    prompt: str,
+    system: Optional[str] = None,
+    context: Optional[List[int]] = None,
+    stop_when: Optional[Callable[[], Any]] = None,
+) -> Dict[str, Any]:
+    """
+    One generation through the priority gate of the caller's lane.
+    Returns the final Ollama payload with the full 'response' text (and 'context').
+
+    stop_when: factory for a detector with feed(token) -> bool (e.g. JSONObjectExtractor).
+    The generation is streamed and cancelled shortly after the detector is satisfied; a
+    cancelled payload has no 'context', since Ollama only returns it with the final chunk.
+    """
+    with gate.slot():
+        return _call_unlocked(prompt, system, context, stop_when)
+
+def _call_unlocked(
+    prompt: str,
+    system: Optional[str] = None,
+    context: Optional[List[int]] = None,
+    stop_when: Optional[Callable[[], Any]] = None,
+) -> Dict[str, Any]:
+    """`_call` for a caller that already holds a gate slot (sync or async)."""
+    # Pooled keep-alive HTTP call (no fork/exec of the ollama CLI per prompt)
+    sink = _token_sink
+    if sink is None and stop_when is None:
+        return get_client().generate(prompt, model=MODEL, system=system, context=context)
+
+    lane = current_lane()
+    detector = stop_when() if stop_when else None
+    satisfied = False
+    tail = 0
+    parts = []
+    with get_client().generate_stream(prompt, model=MODEL, system=system, context=context) as stream:
+        for chunk in stream:
+            token = chunk.get("response", "")
+            if not token:
+                continue
+            parts.append(token)
+            if sink is not None:
+                sink(token, lane)
+            if satisfied:
+                tail += 1
+                if tail > EARLY_STOP_GRACE_TOKENS:
+                    metrics.incr("llm.early_stops")
+                    break
+            elif detector is not None and detector.feed(token):
+                satisfied = True
+    return {**stream.final, "response": "".join(parts)}
+
+def _generate(
+    prompt: str,
+    namespace: str,
+    stop_when: Optional[Callable[[], Any]] = None,
+    leader: Optional[Dict[str, Any]] = None,
+) -> str:
+    """
+    leader: filled with the cache outcome (and final payload) when this caller's flight
+    actually ran; followers of a coalesced flight get their dict back untouched.
+    """
+    leader = leader if leader is not None else {}
+    # Another flight for this key may have finished between our cache check and now
+    cached = get_cached(prompt, namespace)
     if cached:
+        leader["outcome"] = "hit"
         return cached
 
-    result = subprocess.run(
-        ["ollama", "run", MODEL, prompt],
-        capture_output=True,
-        text=True
-    )
+    result = _call(prompt, stop_when=stop_when)
+    leader.update(outcome="miss", payload=result)
+    output = result.get("response", "").strip()
+    if output:
+        set_cache(prompt, output, namespace)
+    return output
+
+async def _generate_async(
+    prompt: str,
+    namespace: str,
+    stop_when: Optional[Callable[[], Any]] = None,
+    leader: Optional[Dict[str, Any]] = None,
+    use_cache: bool = True,
+) -> str:
+    leader = leader if leader is not None else {}
+    cached = get_cached(prompt, namespace) if use_cache else None
+    if cached:
+        leader["outcome"] = "hit"
+        return cached
+
+    # Queue on the gate without holding a thread; only the generation itself runs in one
+    # (to_thread copies the context, so the token sink still sees the caller's lane)
+    async with gate.slot_async():
+        result = await asyncio.to_thread(_call_unlocked, prompt, stop_when=stop_when)
+
+    leader.update(outcome="miss", payload=result)
+    output = result.get("response", "").strip()
+    if output and use_cache:
+        set_cache(prompt, output, namespace)
+    return output
+
+def ask_llm(
+    prompt: str,
+    template_version: str = DEFAULT_TEMPLATE_VERSION,
+    stop_when: Optional[Callable[[], Any]] = None,
+) -> str:
+    """
+    template_version: bump it at the call site whenever a prompt template changes,
+    so stale answers from the old template are never served.
+    stop_when: see `_call`. Pass JSONObjectExtractor for JSON-only prompts so the
+    generation stops right after the object instead of running on into trailing prose.
+    """
+    started = time.perf_counter()
+    namespace = cache_namespace(MODEL, template_version)
+    cached = get_cached(prompt, namespace)
+    if cached:
+        record_llm_call(prompt, cached, "hit", started)
+        return cached
+
+    key = f"{namespace}:{_hash(prompt)}"
+    leader: Dict[str, Any] = {}
+    output = _inflight.do(key, lambda: _generate(prompt, namespace, stop_when, leader))
+    record_llm_call(prompt, output, leader.get("outcome", "coalesced"), started, leader.get("payload"))
+    return output
+
+async def ask_llm_async(
+    prompt: str,
+    template_version: str = DEFAULT_TEMPLATE_VERSION,
+    stop_when: Optional[Callable[[], Any]] = None,
+    use_cache: bool = True,
+) -> str:
+    """
+    Native async ask_llm. Same cache, in-flight coalescing, token sink and stop_when;
+    the priority lane is taken from the surrounding `llm_lane(...)` block.
+    use_cache=False: always generate (no cache lookup, store or coalescing), for
+    interactive chat where a repeated question should get a fresh answer.
+    """
+    started = time.perf_counter()
+    namespace = cache_namespace(MODEL, template_version)
+    if not use_cache:
+        leader: Dict[str, Any] = {}
+        output = await _generate_async(prompt, namespace, stop_when, leader, use_cache=False)
+        record_llm_call(prompt, output, "miss", started, leader.get("payload"))
+        return output
+
+    cached = get_cached(prompt, namespace)
+    if cached:
+        record_llm_call(prompt, cached, "hit", started)
+        return cached
 
-    output = result.stdout.strip()
-    set_cache(prompt, output)
+    key = f"{namespace}:{_hash(prompt)}"
+    leader: Dict[str, Any] = {}
+    output = await _inflight.do_async(key, lambda: _generate_async(prompt, namespace, stop_when, leader))
+    record_llm_call(prompt, output, leader.get("outcome", "coalesced"), started, leader.get("payload"))
     return output
+
+# ================= CONVERSATIONS =================
+
+class LLMConversation:
+    """
+    Multi-turn handle for retries and replans.
+    `system` is the static template prefix (sent as Ollama's system prompt, so it stays
+    byte-identical across calls and its KV cache is reused). After each turn the token
+    `context` returned by Ollama is kept, so the next turn only sends - and the model only
+    prefills - the new message.
+
+    If a turn is served from the response cache there is no token context for it; the
+    following turn then replays the transcript once and picks the context up again.
+
+    semantic_threshold: enables the semantic cache tier for the opening message (the
+    variable part of the prompt; `system` is pinned by the namespace). Retries are never
+    served semantically since they depend on the exact transcript.
+    """
+
+    def __init__(
+        self,
+        system: str = "",
+        template_version: str = DEFAULT_TEMPLATE_VERSION,
+        semantic_threshold: Optional[float] = None,
+    ):
+        self.system = system
+        self.namespace = cache_namespace(MODEL, template_version)
+        self.semantic_threshold = semantic_threshold
+        self.context: Optional[List[int]] = None
+        self.turns: List[tuple] = []  # (message, response)
+
+    def _transcript(self, message: str) -> str:
+        parts = [p for turn in self.turns for p in turn]
+        return "\n\n".join(parts + [message])
+
+    def _semantic_cache(self):
+        return get_semantic_cache() if self.semantic_threshold is not None else None
+
+    def ask(self, message: str, stop_when: Optional[Callable[[], Any]] = None) -> str:
+        """
+        stop_when: see `_call`. A turn stopped early returns no token context, so the
+        next turn (a retry or replan) replays the transcript once.
+        """
+        started = time.perf_counter()
+        full_prompt = self._transcript(message)
+        cache_key = f"{self.system}\n\n{full_prompt}"
+
+        cached = get_cached(cache_key, self.namespace)
+        outcome = "hit"
+        semantic = self._semantic_cache() if not self.turns else None
+        if not cached and semantic is not None:
+            cached = semantic.get(message, self.namespace, self.semantic_threshold)
+            outcome = "semantic"
+        if cached:
+            record_llm_call(cache_key, cached, outcome, started)
+            self.turns.append((message, cached))
+            self.context = None
+            return cached
+
+        if self.context is not None:
+            # Continue from the server-side token state: only the delta is sent
+            metrics.incr("llm.context_reuse")
+            prompt, context = message, self.context
+        else:
+            prompt, context = full_prompt, None
+
+        flight_key = f"{self.namespace}:{_hash(cache_key)}"
+        leader: Dict[str, Any] = {}
+
+        def generate():
+            leader["outcome"] = "miss"
+            return _call(prompt, system=self.system, context=context, stop_when=stop_when)
+
+        result = _inflight.do(flight_key, generate)
+
+        output = result.get("response", "").strip()
+        record_llm_call(cache_key, output, leader.get("outcome", "coalesced"), started, result if leader else None)
+        if output:
+            set_cache(cache_key, output, self.namespace)
+            if semantic is not None:
+                semantic.set(message, output, self.namespace)
+        self.turns.append((message, output))
+        self.context = result.get("context")
+        return output
+
+# ================= STREAMING =================
+
+def stream_llm(prompt: str, template_version: str = DEFAULT_TEMPLATE_VERSION) -> Iterator[str]:
+    """
+    Yields tokens as Ollama produces them. A cached answer is yielded in one piece.
+    Closing the generator early (consumer gone) aborts the generation upstream.
+    """
+    started = time.perf_counter()
+    namespace = cache_namespace(MODEL, template_version)
+    cached = get_cached(prompt, namespace)
+    if cached:
+        record_llm_call(prompt, cached, "hit", started)
+        yield cached
+        return
+
+    parts = []
+    with gate.slot():
+        with get_client().generate_stream(prompt, model=MODEL) as stream:
+            for chunk in stream:
+                token = chunk.get("response", "")
+                if token:
+                    parts.append(token)
+                    yield token
+            completed = stream.done
+
+    output = "".join(parts).strip()
+    record_llm_call(prompt, output, "miss", started, stream.final)
+    if completed and output:
+        set_cache(prompt, output, namespace)
+
+async def stream_llm_async(
+    prompt: str,
+    template_version: str = DEFAULT_TEMPLATE_VERSION,
+    use_cache: bool = True,
+) -> AsyncIterator[str]:
+    """
+    Async token stream for API handlers (SSE / WebSocket).
+    The blocking socket read runs in a worker thread; if the consumer stops iterating
+    (client disconnected, task cancelled) the upstream request is cancelled immediately.
+    use_cache=False: neither served from nor stored in the response cache.
+    """
+    started = time.perf_counter()
+    namespace = cache_namespace(MODEL, template_version)
+    cached = get_cached(prompt, namespace) if use_cache else None
+    if cached:
+        record_llm_call(prompt, cached, "hit", started)
+        yield cached
+        return
+
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    stream_ref = {}
+    stopped = threading.Event()
+
+    def pump():
+        try:
+            stream = get_client().generate_stream(prompt, model=MODEL)
+            stream_ref["stream"] = stream
+            if stopped.is_set():
+                stream.cancel()
+            for chunk in stream:
+                token = chunk.get("response", "")
+                if token:
+                    loop.call_soon_threadsafe(queue.put_nowait, ("token", token))
+            loop.call_soon_threadsafe(queue.put_nowait, ("done", stream.done))
+        except Exception as e:
+            loop.call_soon_threadsafe(queue.put_nowait, ("error", e))
+
+    async with gate.slot_async():
+        worker = loop.run_in_executor(None, pump)
+        parts = []
+        try:
+            while True:
+                kind, value = await queue.get()
+                if kind == "token":
+                    parts.append(value)
+                    yield value
+                elif kind == "error":
+                    raise value
+                else:
+                    output = "".join(parts).strip()
+                    record_llm_call(prompt, output, "miss", started, stream_ref["stream"].final)
+                    if value and output and use_cache:
+                        set_cache(prompt, output, namespace)
+                    break
+        finally:
+            stopped.set()
+            stream = stream_ref.get("stream")
+            if stream is not None:
+                stream.cancel()
+            await asyncio.shield(worker)
@@ -0,0 +1,168 @@
+# brain/ollama_stub.py
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Optional
+
+
+def _fake_context(payload: Dict[str, Any], text: str):
+    """Stand-in for Ollama's token context: previous context + one id per word of prompt and answer."""
+    words = (payload.get("prompt", "") + " " + text).split()
+    return list(payload.get("context") or []) + [len(w) for w in words]
+
+
+def echo_responder(payload: Dict[str, Any]) -> str:
+    """Default stub behaviour: echo the prompt back."""
+    return f"ECHO: {payload.get('prompt', '')}"
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 so clients can keep the connection alive between requests
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass  # Keep test output clean
+
+    def _send_json(self, status: int, data: Dict[str, Any]):
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        stub = self.server.stub
+        stub._record(self, None)
+        if self.path == "/api/tags":
+            self._send_json(200, {"models": [{"name": stub.model}]})
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        stub = self.server.stub
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        stub._record(self, payload)
+
+        if self.path != "/api/generate":
+            self._send_json(404, {"error": "not found"})
+            return
+
+        if stub.delay:
+            time.sleep(stub.delay)
+
+        try:
+            text = stub.responder(payload)
+        except Exception as e:
+            self._send_json(500, {"error": str(e)})
+            return
+
+        if payload.get("stream"):
+            self._stream(stub, payload, text)
+            return
+
+        self._send_json(200, {
+            "model": payload.get("model", stub.model),
+            "response": text,
+            "done": True,
+            "context": _fake_context(payload, text),
+            "prompt_eval_count": len(payload.get("prompt", "").split()),
+            "eval_count": len(text.split()),
+        })
+
+    def _write_chunk(self, data: Dict[str, Any]):
+        line = (json.dumps(data) + "\n").encode()
+        self.wfile.write(f"{len(line):x}\r\n".encode() + line + b"\r\n")
+        self.wfile.flush()
+
+    def _stream(self, stub: "OllamaStubServer", payload: Dict[str, Any], text: str):
+        """NDJSON over chunked transfer encoding, one word per chunk like Ollama's token stream."""
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        tokens = [w + " " for w in text.split(" ")]
+        tokens[-1] = tokens[-1][:-1]
+        try:
+            for token in tokens:
+                self._write_chunk({"model": payload.get("model"), "response": token, "done": False})
+                if stub.token_delay:
+                    time.sleep(stub.token_delay)
+            self._write_chunk({
+                "model": payload.get("model"),
+                "response": "",
+                "done": True,
+                "context": _fake_context(payload, text),
+                "prompt_eval_count": len(payload.get("prompt", "").split()),
+                "eval_count": len(tokens),
+            })
+            self.wfile.write(b"0\r\n\r\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            # Client went away mid-generation (what Ollama treats as a cancel)
+            with stub._lock:
+                stub.cancelled += 1
+            self.close_connection = True
+
+
+class OllamaStubServer:
+    """
+    Minimal in-process stand-in for the Ollama HTTP API, for tests and offline runs.
+    Records every request and the client sockets it saw, so tests can assert on pooling.
+
+    Usage:
+        with OllamaStubServer(responder=lambda p: '{"ok": true}') as stub:
+            client = OllamaClient(host=stub.url)
+    """
+
+    def __init__(
+        self,
+        responder: Callable[[Dict[str, Any]], str] = echo_responder,
+        model: str = "stub-model",
+        delay: float = 0.0,
+        token_delay: float = 0.0,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        self.responder = responder
+        self.model = model
+        self.delay = delay
+        self.token_delay = token_delay
+        self.cancelled = 0
+        self.requests = []
+        self.client_addresses = set()
+        self._lock = threading.Lock()
+
+        self._server = ThreadingHTTPServer((host, port), _StubHandler)
+        self._server.daemon_threads = True
+        self._server.stub = self
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _record(self, handler: BaseHTTPRequestHandler, payload: Optional[Dict[str, Any]]):
+        with self._lock:
+            self.requests.append({"path": handler.path, "payload": payload})
+            self.client_addresses.add(handler.client_address)
+
+    def start(self) -> "OllamaStubServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
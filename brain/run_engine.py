@@ -58,10 +58,9 @@ if __name__ == "__main__":
 
     print("\n================ START =================\n")
     
-    # Ensure DB Tables Exist
-    from api.database import engine, Base
-    from api.models import GoalExecution, AtomicTaskCheckpoint # Import models to register them
-    Base.metadata.create_all(bind=engine)
+    # Ensure DB Tables Exist (and the schema is up to date)
+    from api.migrations import migrate
+    migrate()
     
     # RESUME CHECK
     from autonomy.resume_manager import resume_pending_goals
@@ -0,0 +1,183 @@
+# brain/scheduler.py
+
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Optional
+
+from api.config import LLM_MAX_CONCURRENCY
+
+# Initialize logger
+logger = logging.getLogger(__name__)
+
+# Priority lanes, highest first.
+#   interactive -> /query and other user-facing requests
+#   goal        -> user-triggered goals / atomic tasks (default)
+#   background  -> autonomous_run and other unattended work
+LANES = ("interactive", "goal", "background")
+DEFAULT_LANE = "goal"
+
+_current_lane: ContextVar[str] = ContextVar("llm_lane", default=DEFAULT_LANE)
+
+
+def current_lane() -> str:
+    return _current_lane.get()
+
+
+@contextmanager
+def llm_lane(lane: str):
+    """
+    Tags every LLM call made inside the block (including asyncio.to_thread workers,
+    which copy the context) with a priority lane.
+    """
+    if lane not in LANES:
+        raise ValueError(f"Unknown LLM lane '{lane}'. Use one of {LANES}.")
+    token = _current_lane.set(lane)
+    try:
+        yield
+    finally:
+        _current_lane.reset(token)
+
+
+class _Waiter:
+    __slots__ = ("lane", "enqueued_at", "granted", "wake")
+
+    def __init__(self, lane: str, wake: Callable[[], Any]):
+        self.lane = lane
+        self.enqueued_at = time.monotonic()
+        self.granted = False
+        self.wake = wake
+
+
+class PriorityGate:
+    """
+    Global LLM concurrency limit with strict-priority admission.
+    A free slot always goes to the oldest waiter of the highest non-empty lane,
+    so a burst of background planning cannot delay interactive requests by more
+    than one in-flight generation.
+
+    One gate serves both threads (`slot`) and asyncio (`slot_async`); async waiters
+    do not occupy a thread while queued.
+    """
+
+    def __init__(self, max_concurrency: int = LLM_MAX_CONCURRENCY):
+        self.max_concurrency = max_concurrency
+        self._lock = threading.Lock()
+        self._active = 0
+        self._queues: Dict[str, deque] = {lane: deque() for lane in LANES}
+        self._stats = {
+            lane: {"active": 0, "admitted": 0, "wait_total": 0.0, "wait_max": 0.0}
+            for lane in LANES
+        }
+
+    # ---------- admission (call with lock held) ----------
+
+    def _can_admit(self, lane: str) -> bool:
+        if self._active >= self.max_concurrency:
+            return False
+        # Do not overtake queued waiters of the same or higher priority
+        for other in LANES[: LANES.index(lane) + 1]:
+            if self._queues[other]:
+                return False
+        return True
+
+    def _admit(self, lane: str, waited: float):
+        self._active += 1
+        stats = self._stats[lane]
+        stats["active"] += 1
+        stats["admitted"] += 1
+        stats["wait_total"] += waited
+        stats["wait_max"] = max(stats["wait_max"], waited)
+
+    def _enqueue(self, lane: str, wake: Callable[[], Any]) -> Optional[_Waiter]:
+        """Admits immediately (returns None) or queues a waiter."""
+        if lane not in self._queues:
+            raise ValueError(f"Unknown LLM lane '{lane}'. Use one of {LANES}.")
+        with self._lock:
+            if self._can_admit(lane):
+                self._admit(lane, 0.0)
+                return None
+            waiter = _Waiter(lane, wake)
+            self._queues[lane].append(waiter)
+            return waiter
+
+    def release(self, lane: str):
+        with self._lock:
+            self._active -= 1
+            self._stats[lane]["active"] -= 1
+            for next_lane in LANES:
+                queue = self._queues[next_lane]
+                if queue and self._active < self.max_concurrency:
+                    waiter = queue.popleft()
+                    waiter.granted = True
+                    self._admit(next_lane, time.monotonic() - waiter.enqueued_at)
+                    waiter.wake()
+                    break
+
+    # ---------- threads ----------
+
+    @contextmanager
+    def slot(self, lane: Optional[str] = None):
+        lane = lane or current_lane()
+        event = threading.Event()
+        waiter = self._enqueue(lane, event.set)
+        if waiter is not None:
+            event.wait()
+        try:
+            yield
+        finally:
+            self.release(lane)
+
+    # ---------- asyncio ----------
+
+    @asynccontextmanager
+    async def slot_async(self, lane: Optional[str] = None):
+        lane = lane or current_lane()
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+
+        def _resolve():
+            if not fut.done():
+                fut.set_result(None)
+
+        waiter = self._enqueue(lane, lambda: loop.call_soon_threadsafe(_resolve))
+        if waiter is not None:
+            try:
+                await fut
+            except asyncio.CancelledError:
+                with self._lock:
+                    granted = waiter.granted
+                    if not granted:
+                        self._queues[lane].remove(waiter)
+                if granted:
+                    # Slot was handed to us just as we were cancelled: pass it on
+                    self.release(lane)
+                raise
+        try:
+            yield
+        finally:
+            self.release(lane)
+
+    # ---------- observability ----------
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lanes = {}
+            for lane in LANES:
+                s = self._stats[lane]
+                lanes[lane] = {
+                    "queued": len(self._queues[lane]),
+                    "active": s["active"],
+                    "admitted": s["admitted"],
+                    "avg_wait_ms": round(1000 * s["wait_total"] / s["admitted"], 2) if s["admitted"] else 0.0,
+                    "max_wait_ms": round(1000 * s["wait_max"], 2),
+                }
+            return {"max_concurrency": self.max_concurrency, "active": self._active, "lanes": lanes}
+
+
+# Process-wide gate in front of Ollama
+gate = PriorityGate()
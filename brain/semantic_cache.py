@@ -0,0 +1,225 @@
+# brain/semantic_cache.py
+
+import logging
+import os
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from brain.cache import CACHE_TTL
+
+# Initialize logger
+logger = logging.getLogger(__name__)
+
+# ================= CONFIG =================
+
+SEMANTIC_CACHE_ENABLED = os.getenv("LLM_SEMANTIC_CACHE", "false").lower() == "true"
+SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("LLM_SEMANTIC_CACHE_MAX_ENTRIES", "2000"))  # per namespace
+
+def _normalize(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+def _default_embed(text: str) -> Optional[np.ndarray]:
+    # Same MiniLM encoder the memory store already loaded; imported lazily so the
+    # LLM path does not pull in Chroma unless the semantic tier is used
+    from memory.vector_store import embedder
+    if embedder is None:
+        return None
+    return np.asarray(embedder.encode(text), dtype=np.float32)
+
+# ================= INDEX =================
+
+class _Index:
+    """Fixed-capacity matrix of unit vectors for one namespace (model + template version)."""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.vectors: Optional[np.ndarray] = None
+        self.texts: List[str] = []
+        self.responses: List[str] = []
+        self.expires_at = np.zeros(capacity)
+        self.last_access = np.zeros(capacity)
+        self.exact: Dict[str, int] = {}  # normalized text -> slot
+        self.stats = {"lookups": 0, "hits_exact": 0, "hits_semantic": 0, "misses": 0,
+                      "stores": 0, "evictions": 0, "expired": 0, "similarity_total": 0.0}
+
+    def __len__(self):
+        return len(self.texts)
+
+    def _slot_for_insert(self, dim: int) -> int:
+        if self.vectors is None:
+            self.vectors = np.zeros((self.capacity, dim), dtype=np.float32)
+        if len(self.texts) < self.capacity:
+            self.texts.append("")
+            self.responses.append("")
+            return len(self.texts) - 1
+        # Full: reuse the least recently used slot
+        slot = int(np.argmin(self.last_access))
+        self.exact.pop(self.texts[slot], None)
+        self.stats["evictions"] += 1
+        return slot
+
+    def put(self, text: str, vector: np.ndarray, response: str, ttl: int):
+        now = time.time()
+        slot = self.exact.get(text)
+        if slot is None:
+            slot = self._slot_for_insert(vector.shape[0])
+        self.vectors[slot] = vector
+        self.texts[slot] = text
+        self.responses[slot] = response
+        self.expires_at[slot] = now + ttl if ttl else np.inf
+        self.last_access[slot] = now
+        self.exact[text] = slot
+        self.stats["stores"] += 1
+
+    def _expire(self, slot: int):
+        # Expired slots stay allocated but become the next eviction victim
+        self.exact.pop(self.texts[slot], None)
+        self.vectors[slot] = 0.0
+        self.texts[slot] = ""
+        self.last_access[slot] = 0.0
+        self.stats["expired"] += 1
+
+    def hit(self, slot: int, kind: str, similarity: float = 1.0) -> Optional[str]:
+        now = time.time()
+        if self.expires_at[slot] <= now:
+            self._expire(slot)
+            return None
+        self.last_access[slot] = now
+        self.stats[f"hits_{kind}"] += 1
+        self.stats["similarity_total"] += similarity
+        return self.responses[slot]
+
+    def nearest(self, vector: np.ndarray):
+        n = len(self.texts)
+        scores = self.vectors[:n] @ vector
+        slot = int(np.argmax(scores))
+        return slot, float(scores[slot])
+
+# ================= ENGINE =================
+
+class SemanticCache:
+    """
+    Near-duplicate tier behind the exact-match LLM cache.
+    Call sites store the *variable* part of their prompt (task, goal, context) under a
+    namespace that pins the model and template version; a later prompt whose variable
+    part embeds within `threshold` cosine similarity reuses the answer.
+
+    Whitespace/case-only differences are matched exactly without embedding at all.
+    Each namespace is bounded to `max_entries` with LRU eviction and the LLM cache TTL.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = SEMANTIC_CACHE_MAX_ENTRIES,
+        ttl: int = CACHE_TTL,
+        embed_fn: Callable[[str], Optional[np.ndarray]] = _default_embed,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.embed_fn = embed_fn
+        self._indexes: Dict[str, _Index] = {}
+        self._lock = threading.Lock()
+
+    def _embed(self, text: str) -> Optional[np.ndarray]:
+        try:
+            vector = self.embed_fn(text)
+        except Exception as e:
+            logger.warning(f"Semantic cache embedding failed: {e}")
+            return None
+        if vector is None:
+            return None
+        norm = np.linalg.norm(vector)
+        return (vector / norm).astype(np.float32) if norm else None
+
+    def _index(self, namespace: str) -> _Index:
+        index = self._indexes.get(namespace)
+        if index is None:
+            index = self._indexes[namespace] = _Index(self.max_entries)
+        return index
+
+    def get(self, text: str, namespace: str, threshold: float) -> Optional[str]:
+        key = _normalize(text)
+        with self._lock:
+            index = self._index(namespace)
+            index.stats["lookups"] += 1
+            slot = index.exact.get(key)
+            if slot is not None:
+                response = index.hit(slot, "exact")
+                if response is not None:
+                    return response
+            empty = len(index.exact) == 0
+
+        if empty:
+            with self._lock:
+                index.stats["misses"] += 1
+            return None
+
+        # Encode outside the lock; MiniLM takes a few ms per prompt
+        vector = self._embed(key)
+
+        with self._lock:
+            if vector is not None and len(index):
+                slot, similarity = index.nearest(vector)
+                if similarity >= threshold and index.texts[slot]:
+                    response = index.hit(slot, "semantic", similarity)
+                    if response is not None:
+                        logger.info(f"Semantic cache hit ({similarity:.3f}) in {namespace}")
+                        return response
+            index.stats["misses"] += 1
+            return None
+
+    def set(self, text: str, response: str, namespace: str):
+        key = _normalize(text)
+        vector = self._embed(key)
+        if vector is None:
+            return
+        with self._lock:
+            self._index(namespace).put(key, vector, response, self.ttl)
+
+    def clear(self):
+        with self._lock:
+            self._indexes.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-namespace (i.e. per model + template) counters and hit rate."""
+        with self._lock:
+            out = {}
+            for namespace, index in self._indexes.items():
+                s = dict(index.stats)
+                hits = s["hits_exact"] + s["hits_semantic"]
+                similarity_total = s.pop("similarity_total")
+                s["entries"] = len(index.exact)
+                s["hit_rate"] = round(hits / s["lookups"], 4) if s["lookups"] else 0.0
+                s["avg_hit_similarity"] = round(similarity_total / hits, 4) if hits else 0.0
+                out[namespace] = s
+            return out
+
+# ================= MODULE API =================
+
+_semantic_cache: Optional[SemanticCache] = None
+_semantic_lock = threading.Lock()
+
+def get_semantic_cache() -> Optional[SemanticCache]:
+    """None when the tier is disabled (LLM_SEMANTIC_CACHE unset)."""
+    global _semantic_cache
+    if not SEMANTIC_CACHE_ENABLED and _semantic_cache is None:
+        return None
+    if _semantic_cache is None:
+        with _semantic_lock:
+            if _semantic_cache is None:
+                _semantic_cache = SemanticCache()
+    return _semantic_cache
+
+def set_semantic_cache(cache: Optional[SemanticCache]):
+    """Install a specific instance (tests, or enabling the tier at runtime)."""
+    global _semantic_cache
+    with _semantic_lock:
+        _semantic_cache = cache
+
+def semantic_cache_stats() -> Dict[str, Any]:
+    cache = get_semantic_cache()
+    return cache.stats() if cache is not None else {}
@@ -0,0 +1,176 @@
+# brain/structured.py
+
+import json
+import logging
+import re
+from typing import Any, Dict, Optional, Type
+
+from pydantic import BaseModel
+
+# Initialize logger
+logger = logging.getLogger(__name__)
+
+_PY_LITERALS = {"True": "true", "False": "false", "None": "null"}
+_SMART_QUOTES = str.maketrans({"“": '"', "”": '"', "‘": "'", "’": "'"})
+
+
+class StructuredOutputError(ValueError):
+    """The LLM output contained no JSON object that could be parsed and validated."""
+
+
+def repair_json(text: str) -> str:
+    """
+    Fixes the defects local models commonly produce, outside of string literals:
+    trailing commas, Python literals (True/False/None), smart quotes, and output cut
+    off before the closing brackets.
+    """
+    text = text.translate(_SMART_QUOTES)
+    out = []
+    closers = []
+    in_string = False
+    escape = False
+    i = 0
+
+    while i < len(text):
+        ch = text[i]
+        if in_string:
+            out.append(ch)
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_string = False
+            i += 1
+            continue
+
+        if ch == '"':
+            in_string = True
+        elif ch in "{[":
+            closers.append("}" if ch == "{" else "]")
+        elif ch in "}]":
+            # Drop a trailing comma before the closer
+            while out and out[-1].isspace():
+                out.pop()
+            if out and out[-1] == ",":
+                out.pop()
+            if closers:
+                closers.pop()
+        elif ch.isalpha():
+            word = re.match(r"[A-Za-z]+", text[i:]).group(0)
+            out.append(_PY_LITERALS.get(word, word))
+            i += len(word)
+            continue
+
+        out.append(ch)
+        i += 1
+
+    # Truncated output: close the open string and any open containers
+    if in_string:
+        out.append('"')
+    repaired = "".join(out).rstrip()
+    if closers and repaired.endswith(","):
+        repaired = repaired[:-1]
+    return repaired + "".join(reversed(closers))
+
+
+def _loads(candidate: str) -> Optional[Dict[str, Any]]:
+    """json.loads, falling back to repair_json. None unless the result is an object."""
+    try:
+        data = json.loads(candidate)
+    except json.JSONDecodeError:
+        try:
+            data = json.loads(repair_json(candidate))
+        except json.JSONDecodeError:
+            return None
+        logger.debug("Repaired malformed JSON from LLM output")
+    return data if isinstance(data, dict) else None
+
+
+class JSONObjectExtractor:
+    """
+    Incremental scanner for the first complete, parseable top-level JSON object in a
+    token stream. Prose and markdown fences around the object are ignored; a brace-
+    delimited fragment that does not parse is skipped and scanning continues.
+
+    feed(token) returns True as soon as the object is complete, which lets a streaming
+    caller stop the generation there.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.value: Optional[Dict[str, Any]] = None
+        self._start = None
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._pos = 0
+
+    @property
+    def complete(self) -> bool:
+        return self.value is not None
+
+    def feed(self, chunk: str) -> bool:
+        if self.value is not None:
+            return True
+        self.text += chunk
+
+        while self._pos < len(self.text):
+            ch = self.text[self._pos]
+            self._pos += 1
+
+            if self._start is None:
+                if ch == "{":
+                    self._start = self._pos - 1
+                    self._depth = 1
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    candidate = self.text[self._start:self._pos]
+                    value = _loads(candidate)
+                    if value is not None:
+                        self.value = value
+                        return True
+                    # Not an object after all (e.g. "{placeholder}" in prose); keep scanning
+                    self._pos = self._start + 1
+                    self._start = None
+        return False
+
+    def partial(self) -> Optional[Dict[str, Any]]:
+        """Best effort for output that ended mid-object: repair from the first '{'."""
+        start = self.text.find("{")
+        if start == -1:
+            return None
+        return _loads(self.text[start:])
+
+
+def parse_json_object(text: str, schema: Optional[Type[BaseModel]] = None):
+    """
+    Extracts the JSON object from an LLM answer (fences/prose tolerated, common defects
+    repaired) and validates it against `schema` when given.
+    Returns the schema instance, or a dict without a schema.
+    Raises StructuredOutputError (a ValueError) or pydantic's ValidationError.
+    """
+    extractor = JSONObjectExtractor()
+    extractor.feed(text or "")
+    data = extractor.value if extractor.complete else extractor.partial()
+
+    if data is None:
+        raise StructuredOutputError(f"No JSON object found in LLM output: {(text or '')[:200]!r}")
+
+    if schema is None:
+        return data
+    return schema.model_validate(data)
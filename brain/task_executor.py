@@ -36,8 +36,9 @@ def run_atomic_task(task: str, extra_context: Optional[Dict[str, Any]] = None) -
 
     print(f"\n🚀 STARTING ATOMIC TASK: {task}\n")
 
-    # 1️⃣ MEMORY RECALL
-    context_block = fetch_context(task)
+    # 1️⃣ MEMORY RECALL (scoped to the goal's org when known)
+    org_id = (extra_context or {}).get("org_id")
+    context_block = fetch_context(task, org_id=org_id)
     
     # Merge Extra Context if provided
     if extra_context:
@@ -68,7 +69,8 @@ def run_atomic_task(task: str, extra_context: Optional[Dict[str, Any]] = None) -
                 "memory_type": "knowledge",
                 "tags": ["research", "web_search"],
                 "score": 1.0,
-                "source_task": task
+                "source_task": task,
+                "org_id": org_id
             }
         )
         
@@ -137,7 +139,8 @@ def run_atomic_task(task: str, extra_context: Optional[Dict[str, Any]] = None) -
                         "memory_type": "mistake",
                         "tags": ["failure", "max_retries"],
                         "score": verdict["score"],
-                        "source_task": task
+                        "source_task": task,
+                        "org_id": org_id
                     }
                 )
                 return {"success": False, "verdict": verdict}
@@ -164,7 +167,8 @@ def run_atomic_task(task: str, extra_context: Optional[Dict[str, Any]] = None) -
                     "memory_type": memory_decision.get("memory_type", "knowledge"),
                     "tags": memory_decision.get("tags", []),
                     "score": verdict["score"],
-                    "source_task": task
+                    "source_task": task,
+                    "org_id": org_id
                 }
             )
 
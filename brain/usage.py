@@ -0,0 +1,211 @@
+# brain/usage.py
+
+import atexit
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from brain.scheduler import current_lane
+
+# Initialize logger
+logger = logging.getLogger(__name__)
+
+# ================= CONFIG =================
+
+USAGE_BATCH_SIZE = int(os.getenv("LLM_USAGE_BATCH_SIZE", "100"))        # Rows per INSERT batch
+USAGE_FLUSH_INTERVAL = float(os.getenv("LLM_USAGE_FLUSH_INTERVAL", "5"))  # Seconds between background flushes
+USAGE_MAX_PENDING = int(os.getenv("LLM_USAGE_MAX_PENDING", "10000"))     # Oldest rows dropped beyond this
+
+# ================= TAGS =================
+
+_usage_tags: ContextVar[Dict[str, Any]] = ContextVar("llm_usage_tags", default={})
+
+
+def current_tags() -> Dict[str, Any]:
+    return _usage_tags.get()
+
+
+@contextmanager
+def usage_tags(**tags):
+    """
+    Tags every LLM call made inside the block (call_site, org_id, goal_id, user_id).
+    Nested blocks add to the outer tags; works as a decorator too:
+
+        @usage_tags(call_site="planner")
+        def _run_planner(...): ...
+    """
+    token = _usage_tags.set({**_usage_tags.get(), **{k: v for k, v in tags.items() if v is not None}})
+    try:
+        yield
+    finally:
+        _usage_tags.reset(token)
+
+# ================= SINK =================
+
+class UsageSink:
+    """
+    Batched, non-blocking writer into UsageLog.
+    record() only appends to an in-memory buffer; a daemon thread inserts batches every
+    `flush_interval` seconds or as soon as `batch_size` rows are pending. If the DB falls
+    behind, the oldest rows are dropped (and counted) instead of blocking LLM calls.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = USAGE_BATCH_SIZE,
+        flush_interval: float = USAGE_FLUSH_INTERVAL,
+        max_pending: int = USAGE_MAX_PENDING,
+    ):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._pending: deque = deque()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._schema_ready = False
+        self.stats = {"recorded": 0, "written": 0, "dropped": 0, "batches": 0, "errors": 0}
+
+    def record(self, row: Dict[str, Any]):
+        with self._lock:
+            if len(self._pending) >= self.max_pending:
+                self._pending.popleft()
+                self.stats["dropped"] += 1
+            self._pending.append(row)
+            self.stats["recorded"] += 1
+            full = len(self._pending) >= self.batch_size
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True, name="llm-usage-sink")
+                self._thread.start()
+        if full:
+            self._wake.set()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def flush(self) -> int:
+        """Writes everything pending. Returns the number of rows written."""
+        with self._flush_lock:
+            with self._lock:
+                rows, self._pending = list(self._pending), deque()
+            if not rows:
+                return 0
+
+            from api.database import SessionLocal, ensure_columns
+            from api.models import UsageLog
+
+            db = SessionLocal()
+            try:
+                if not self._schema_ready:
+                    ensure_columns(UsageLog)
+                    self._schema_ready = True
+                for start in range(0, len(rows), self.batch_size):
+                    db.bulk_insert_mappings(UsageLog, rows[start:start + self.batch_size])
+                    self.stats["batches"] += 1
+                db.commit()
+                self.stats["written"] += len(rows)
+                return len(rows)
+            except Exception as e:
+                db.rollback()
+                self.stats["errors"] += 1
+                logger.error(f"Usage sink failed to write {len(rows)} rows: {e}")
+                return 0
+            finally:
+                db.close()
+
+
+sink = UsageSink()
+atexit.register(sink.flush)
+
+# ================= RECORDING =================
+
+def _estimate_tokens(text: str) -> int:
+    """~4 characters per token, for answers without Ollama's counters (cache hits, cancelled streams)."""
+    return (len(text) + 3) // 4 if text else 0
+
+
+def record_llm_call(
+    prompt: str,
+    output: str,
+    outcome: str,
+    started: float,
+    payload: Optional[Dict[str, Any]] = None,
+):
+    """
+    outcome: miss (generated), hit (exact cache), semantic (semantic cache),
+    coalesced (shared another caller's generation). Only misses cost GPU time.
+    """
+    payload = payload or {}
+    tags = _usage_tags.get()
+    prompt_tokens = payload.get("prompt_eval_count") or _estimate_tokens(prompt)
+    completion_tokens = payload.get("eval_count") or _estimate_tokens(output)
+
+    sink.record({
+        "user_id": tags.get("user_id"),
+        "action": "llm_call",
+        "tokens": prompt_tokens + completion_tokens,
+        "cost": 0.0,
+        "timestamp": datetime.utcnow(),
+        "call_site": tags.get("call_site", "unknown"),
+        "org_id": tags.get("org_id"),
+        "goal_id": tags.get("goal_id"),
+        "lane": current_lane(),
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "latency_ms": round((time.perf_counter() - started) * 1000, 2),
+        "cache_outcome": outcome,
+    })
+
+# ================= AGGREGATES =================
+
+GROUP_FIELDS = ("call_site", "org_id", "goal_id", "lane", "cache_outcome")
+
+
+def usage_summary(db, group_by: str = "call_site", since: Optional[datetime] = None) -> List[Dict[str, Any]]:
+    """Per-group totals over llm_call rows; `gpu_*` only counts generated (miss) calls."""
+    from sqlalchemy import case, func
+    from api.models import UsageLog
+
+    if group_by not in GROUP_FIELDS:
+        raise ValueError(f"group_by must be one of {GROUP_FIELDS}")
+
+    sink.flush()
+    key = getattr(UsageLog, group_by)
+    generated = UsageLog.cache_outcome == "miss"
+    query = db.query(
+        key.label("group"),
+        func.count(UsageLog.id),
+        func.sum(UsageLog.prompt_tokens),
+        func.sum(UsageLog.completion_tokens),
+        func.sum(case((generated, UsageLog.prompt_tokens + UsageLog.completion_tokens), else_=0)),
+        func.sum(case((generated, UsageLog.latency_ms), else_=0.0)),
+        func.sum(case((generated, 1), else_=0)),
+        func.avg(UsageLog.latency_ms),
+    ).filter(UsageLog.action == "llm_call")
+    if since is not None:
+        query = query.filter(UsageLog.timestamp >= since)
+
+    rows = []
+    for group, calls, prompt_tokens, completion_tokens, gpu_tokens, gpu_ms, misses, avg_ms in query.group_by(key):
+        rows.append({
+            group_by: group,
+            "calls": calls,
+            "prompt_tokens": prompt_tokens or 0,
+            "completion_tokens": completion_tokens or 0,
+            "gpu_tokens": gpu_tokens or 0,
+            "gpu_seconds": round((gpu_ms or 0.0) / 1000, 2),
+            "avg_latency_ms": round(avg_ms or 0.0, 1),
+            "cache_hit_rate": round(1 - (misses or 0) / calls, 4) if calls else 0.0,
+        })
+    rows.sort(key=lambda r: r["gpu_seconds"], reverse=True)
+    return rows
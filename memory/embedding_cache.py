@@ -0,0 +1,229 @@
+# memory/embedding_cache.py
+
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+# Initialize logger
+logger = logging.getLogger(__name__)
+
+# ================= CONFIG =================
+
+EMBED_CACHE_SIZE = int(os.getenv("MEMORY_EMBED_CACHE_SIZE", "4096"))          # In-memory LRU entries
+EMBED_CACHE_DB = os.getenv("MEMORY_EMBED_CACHE_DB", "logs/embedding_cache.db")  # "" disables the disk tier
+EMBED_CACHE_MAX_ROWS = int(os.getenv("MEMORY_EMBED_CACHE_MAX_ROWS", "200000"))
+
+def _normalize(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip()
+
+def embedding_key(model_name: str, text: str) -> str:
+    """Content address of an embedding: same model + same (whitespace-normalized) text."""
+    return hashlib.sha256(f"{model_name}\0{_normalize(text)}".encode()).hexdigest()
+
+# ================= CACHE =================
+
+class EmbeddingCache:
+    """
+    Bounded embedding cache in front of an encoder, called as encode_fn(texts, batch_size)
+    (e.g. SentenceTransformer.encode).
+    - Tier 1: in-process LRU of float32 vectors.
+    - Tier 2 (optional): SQLite file, so restarts do not re-embed known memories/objectives.
+    Misses of one call are encoded together in a single batched encode.
+    """
+
+    def __init__(
+        self,
+        encode_fn: Callable[[List[str], int], Any],
+        model_name: str,
+        max_items: int = EMBED_CACHE_SIZE,
+        path: Optional[str] = EMBED_CACHE_DB,
+        max_rows: int = EMBED_CACHE_MAX_ROWS,
+    ):
+        self.encode_fn = encode_fn
+        self.model_name = model_name
+        self.max_items = max_items
+        self.max_rows = max_rows
+        self._lock = threading.RLock()
+        self._lru: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self.counters = {"lookups": 0, "hits_memory": 0, "hits_disk": 0, "misses": 0,
+                         "encode_calls": 0, "encode_seconds": 0.0}
+
+        self._conn = None
+        self._rows = 0  # Disk tier row count, kept in process instead of a COUNT(*) per write
+        if path:
+            try:
+                if path != ":memory:":
+                    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+                self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                self._conn.execute("PRAGMA synchronous=NORMAL")
+                self._conn.execute("""
+                    CREATE TABLE IF NOT EXISTS embeddings (
+                        key         TEXT PRIMARY KEY,
+                        vector      BLOB NOT NULL,
+                        last_access REAL NOT NULL
+                    )
+                """)
+                self._conn.execute("CREATE INDEX IF NOT EXISTS ix_embeddings_last_access ON embeddings (last_access)")
+                self._rows = self._count_rows()
+            except sqlite3.Error as e:
+                logger.warning(f"Embedding cache disk tier disabled ({path}): {e}")
+                self._conn = None
+
+    # ---------- tiers ----------
+
+    def _remember(self, key: str, vector: np.ndarray):
+        self._lru[key] = vector
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_items:
+            self._lru.popitem(last=False)
+
+    def _load(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        if self._conn is None or not keys:
+            return {}
+        found = {}
+        for start in range(0, len(keys), 500):
+            batch = keys[start:start + 500]
+            rows = self._conn.execute(
+                f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(batch))})", batch
+            ).fetchall()
+            found.update({key: np.frombuffer(blob, dtype=np.float32) for key, blob in rows})
+        if found:
+            self._conn.executemany(
+                "UPDATE embeddings SET last_access = ? WHERE key = ?", [(time.time(), key) for key in found]
+            )
+        return found
+
+    def _count_rows(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def _store(self, items: Dict[str, np.ndarray]):
+        if self._conn is None or not items:
+            return
+        now = time.time()
+        keys = list(items)
+        self._conn.execute("BEGIN")
+        try:
+            # Replaced keys do not grow the table: count the new ones (primary key lookups)
+            existing = 0
+            for start in range(0, len(keys), 500):
+                batch = keys[start:start + 500]
+                existing += self._conn.execute(
+                    f"SELECT COUNT(*) FROM embeddings WHERE key IN ({','.join('?' * len(batch))})", batch
+                ).fetchone()[0]
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, last_access) VALUES (?, ?, ?)",
+                [(key, vector.astype(np.float32).tobytes(), now) for key, vector in items.items()]
+            )
+            self._conn.execute("COMMIT")
+        except sqlite3.Error:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._rows += len(keys) - existing
+
+        if self._rows > self.max_rows:
+            # Other processes may share the file: re-count before evicting (rare, so cheap)
+            self._rows = self._count_rows()
+            if self._rows > self.max_rows:
+                evicted = self._conn.execute(
+                    "DELETE FROM embeddings WHERE key IN (SELECT key FROM embeddings ORDER BY last_access ASC LIMIT ?)",
+                    (self._rows - int(self.max_rows * 0.9),)
+                ).rowcount
+                self._rows -= evicted
+
+    # ---------- public API ----------
+
+    def encode(self, texts: List[str], batch_size: int = 64) -> np.ndarray:
+        """Embeddings for `texts` (rows in input order), encoding only the ones not cached."""
+        keys = [embedding_key(self.model_name, t) for t in texts]
+        distinct = list(dict.fromkeys(keys))
+        vectors: Dict[str, np.ndarray] = {}
+        tier: Dict[str, str] = {}
+
+        with self._lock:
+            for key in distinct:
+                if key in self._lru:
+                    self._lru.move_to_end(key)
+                    vectors[key], tier[key] = self._lru[key], "hits_memory"
+
+            on_disk = self._load([k for k in distinct if k not in vectors])
+            for key, vector in on_disk.items():
+                self._remember(key, vector)
+                vectors[key], tier[key] = vector, "hits_disk"
+
+        # Encode each distinct miss once, outside the lock
+        missing = [k for k in distinct if k not in vectors]
+        elapsed = 0.0
+        if missing:
+            text_for = dict(zip(keys, texts))
+            started = time.perf_counter()
+            encoded = np.asarray(
+                self.encode_fn([text_for[k] for k in missing], batch_size), dtype=np.float32
+            )
+            elapsed = time.perf_counter() - started
+            fresh = dict(zip(missing, encoded))
+            vectors.update(fresh)
+
+        with self._lock:
+            self.counters["lookups"] += len(keys)
+            for key in keys:
+                self.counters[tier.get(key, "misses")] += 1
+            if missing:
+                self.counters["encode_calls"] += 1
+                self.counters["encode_seconds"] += elapsed
+                for key, vector in fresh.items():
+                    self._remember(key, vector)
+                try:
+                    self._store(fresh)
+                except sqlite3.Error as e:
+                    logger.warning(f"Embedding cache write failed: {e}")
+
+        if not keys:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.stack([vectors[k] for k in keys])
+
+    def seed(self, texts: List[str], vectors) -> int:
+        """Stores known embeddings of `texts` (e.g. from a memory snapshot) without encoding."""
+        items = {embedding_key(self.model_name, t): np.asarray(v, dtype=np.float32) for t, v in zip(texts, vectors)}
+        with self._lock:
+            for key, vector in items.items():
+                self._remember(key, vector)
+            try:
+                self._store(items)
+            except sqlite3.Error as e:
+                logger.warning(f"Embedding cache write failed: {e}")
+        return len(items)
+
+    def encode_one(self, text: str) -> np.ndarray:
+        return self.encode([text])[0]
+
+    def clear(self):
+        with self._lock:
+            self._lru.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM embeddings")
+                self._rows = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            c = self.counters
+            hits = c["hits_memory"] + c["hits_disk"]
+            # Saved time = cache hits x observed encoder cost per text
+            per_text = c["encode_seconds"] / c["misses"] if c["misses"] else 0.0
+            return {
+                **c,
+                "encode_seconds": round(c["encode_seconds"], 4),
+                "memory_entries": len(self._lru),
+                "disk_enabled": self._conn is not None,
+                "disk_rows": self._rows,
+                "hit_rate": round(hits / c["lookups"], 4) if c["lookups"] else 0.0,
+                "encoder_seconds_saved": round(hits * per_text, 4),
+            }
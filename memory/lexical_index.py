@@ -0,0 +1,146 @@
+# memory/lexical_index.py
+
+import heapq
+import math
+import re
+import threading
+from collections import Counter, defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# ================= CONFIG =================
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+RRF_K = 60  # Reciprocal rank fusion constant (rank offset)
+
+# Identifiers with inner punctuation stay whole ("vector_store.py", "HTTP-503", "goal_id:42")
+_TOKEN = re.compile(r"[a-z0-9_]+(?:[./:\-][a-z0-9_]+)*")
+_PARTS = re.compile(r"[./:\-]")
+
+def normalize_tag(tag: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "_", tag.strip().lower()).strip("_")
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased terms; compound identifiers are indexed whole and by their parts."""
+    terms = []
+    for token in _TOKEN.findall(text.lower()):
+        terms.append(token)
+        parts = _PARTS.split(token)
+        if len(parts) > 1:
+            terms.extend(p for p in parts if p)
+    return terms
+
+# ================= BM25 =================
+
+class BM25Index:
+    """
+    Incremental inverted index with Okapi BM25 scoring.
+    Documents carry the same scope fields as the vector store (org_id, memory_type, tags),
+    so lexical candidates are filtered the same way as `where` filters the vector query.
+    """
+
+    def __init__(self, k1: float = BM25_K1, b: float = BM25_B):
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.RLock()
+        self._postings: Dict[str, Dict[str, int]] = defaultdict(dict)  # term -> {doc_id: tf}
+        self._doc_terms: Dict[str, Counter] = {}
+        self._doc_len: Dict[str, int] = {}
+        self._scope: Dict[str, Tuple[Optional[int], str, frozenset]] = {}
+        self._total_len = 0
+
+    def __len__(self):
+        return len(self._doc_terms)
+
+    def add(self, doc_id: str, text: str, meta: Optional[Dict[str, Any]] = None):
+        meta = meta or {}
+        terms = Counter(tokenize(text or ""))
+        tags = frozenset(normalize_tag(t) for t in str(meta.get("tags", "")).split(",") if t.strip())
+        with self._lock:
+            if doc_id in self._doc_terms:
+                self.remove(doc_id)
+            self._doc_terms[doc_id] = terms
+            self._doc_len[doc_id] = sum(terms.values())
+            self._scope[doc_id] = (meta.get("org_id"), str(meta.get("memory_type", "")), tags)
+            self._total_len += self._doc_len[doc_id]
+            for term, tf in terms.items():
+                self._postings[term][doc_id] = tf
+
+    def add_many(self, ids: Iterable[str], texts: Iterable[str], metadatas: Iterable[Dict[str, Any]]):
+        with self._lock:
+            for doc_id, text, meta in zip(ids, texts, metadatas):
+                self.add(doc_id, text, meta)
+
+    def remove(self, doc_id: str):
+        with self._lock:
+            terms = self._doc_terms.pop(doc_id, None)
+            if terms is None:
+                return
+            self._scope.pop(doc_id, None)
+            self._total_len -= self._doc_len.pop(doc_id, 0)
+            for term in terms:
+                posting = self._postings.get(term)
+                if posting is not None:
+                    posting.pop(doc_id, None)
+                    if not posting:
+                        del self._postings[term]
+
+    def clear(self):
+        with self._lock:
+            self._postings.clear()
+            self._doc_terms.clear()
+            self._doc_len.clear()
+            self._scope.clear()
+            self._total_len = 0
+
+    def _in_scope(self, doc_id: str, org_id, memory_types, tags) -> bool:
+        doc_org, doc_type, doc_tags = self._scope[doc_id]
+        if org_id is not None and doc_org != org_id:
+            return False
+        if memory_types and doc_type not in memory_types:
+            return False
+        if tags and not doc_tags & {normalize_tag(t) for t in tags}:
+            return False
+        return True
+
+    def search(
+        self,
+        query: str,
+        k: int = 10,
+        org_id: Optional[int] = None,
+        memory_types: Optional[Sequence[str]] = None,
+        tags: Optional[Sequence[str]] = None,
+    ) -> List[Tuple[str, float]]:
+        """Top-k (doc_id, bm25 score) for the query terms, best first."""
+        terms = set(tokenize(query))
+        with self._lock:
+            n = len(self._doc_terms)
+            if not n or not terms:
+                return []
+            avg_len = self._total_len / n
+            scores: Dict[str, float] = defaultdict(float)
+            for term in terms:
+                posting = self._postings.get(term)
+                if not posting:
+                    continue
+                idf = math.log(1 + (n - len(posting) + 0.5) / (len(posting) + 0.5))
+                for doc_id, tf in posting.items():
+                    norm = tf + self.k1 * (1 - self.b + self.b * self._doc_len[doc_id] / avg_len)
+                    scores[doc_id] += idf * tf * (self.k1 + 1) / norm
+
+            return heapq.nlargest(
+                k,
+                ((doc_id, score) for doc_id, score in scores.items()
+                 if self._in_scope(doc_id, org_id, memory_types, tags)),
+                key=lambda item: item[1],
+            )
+
+# ================= FUSION =================
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[str]], k: int = RRF_K) -> List[Tuple[str, float]]:
+    """Fuses ranked id lists: score(id) = sum over lists of 1 / (k + rank). Best first."""
+    fused: Dict[str, float] = defaultdict(float)
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            fused[doc_id] += 1.0 / (k + rank)
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)
@@ -1,8 +1,11 @@
 
-import json
 import logging
 from typing import Dict, Any
 from brain.model import ask_llm
+from brain.usage import usage_tags
+from brain.structured import JSONObjectExtractor, parse_json_object
+from api.schema import MemoryDecision
+from pydantic import ValidationError
 
 # Initialize logger
 logger = logging.getLogger(__name__)
@@ -33,6 +36,7 @@ OUTPUT SCHEMA:
 }}
 """
 
+@usage_tags(call_site="memory_agent")
 def decide_memory(task: str, plan_goal: str, execution_result: Dict[str, Any], verdict: Dict[str, Any]) -> Dict[str, Any]:
     """
     Decides whether to store memory based on verdict and content.
@@ -90,20 +94,10 @@ def decide_memory(task: str, plan_goal: str, execution_result: Dict[str, Any], v
     )
 
     try:
-        response = ask_llm(prompt)
+        response = ask_llm(prompt, stop_when=JSONObjectExtractor)
         
-        # Parse JSON
-        clean_json = response.strip()
-        if clean_json.startswith("```json"):
-            clean_json = clean_json[7:]
-        if clean_json.endswith("```"):
-            clean_json = clean_json[:-3]
-            
-        data = json.loads(clean_json.strip())
-        
-        # Fallback/Safety Checks
-        if "decision" not in data:
-            data["decision"] = "SKIP"
+        # Parse JSON (a missing "decision" defaults to SKIP in the schema)
+        data = parse_json_object(response, MemoryDecision).model_dump()
             
         # Enforce Deterministic Overrides if needed
         # (e.g. if we really wanted to force STORE on > 0.9, we could override here, 
@@ -111,7 +105,7 @@ def decide_memory(task: str, plan_goal: str, execution_result: Dict[str, Any], v
         
         return data
 
-    except json.JSONDecodeError:
+    except (ValidationError, ValueError):
         logger.error("Memory Agent returned invalid JSON")
         return {"decision": "SKIP", "reason": "LLM JSON Error"}
     except Exception as e:
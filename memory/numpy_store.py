@@ -0,0 +1,551 @@
+# memory/numpy_store.py
+
+import json
+import logging
+import math
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional, Protocol, Sequence, Tuple
+
+import numpy as np
+
+# Initialize logger
+logger = logging.getLogger(__name__)
+
+# ================= CONFIG =================
+
+NUMPY_STORE_DIR = os.getenv("MEMORY_NUMPY_DIR", "logs/vector_memory_np")
+IVF_THRESHOLD = int(os.getenv("MEMORY_IVF_THRESHOLD", "10000"))   # Exact search below this many vectors
+IVF_NPROBE = int(os.getenv("MEMORY_IVF_NPROBE", "8"))              # Inverted lists scanned per query
+QUANTIZATION = os.getenv("MEMORY_QUANTIZATION", "none")            # none | int8 (fixed when a store is created)
+RERANK_FACTOR = int(os.getenv("MEMORY_RERANK_FACTOR", "4"))        # int8: k x this candidates re-ranked at float32; 0 = keep no float32
+SCAN_CHUNK = 16384                                                 # Rows dequantized per block during a scan
+IVF_TRAIN_ITERS = 10
+IVF_SAMPLES_PER_LIST = 64
+INITIAL_CAPACITY = 1024
+_SQL_CHUNK = 900  # Stay under SQLite's bound-parameter limit
+
+# ================= BACKEND INTERFACE =================
+
+class VectorCollection(Protocol):
+    """
+    What memory.vector_store needs from a vector backend: the subset of Chroma's Collection
+    API it calls. Results use Chroma's shapes (query returns one list per query embedding).
+    """
+
+    def add(self, ids: List[str], embeddings: Any, documents: Optional[List[str]] = None,
+            metadatas: Optional[List[Dict[str, Any]]] = None) -> None: ...
+
+    def query(self, query_embeddings: Any, n_results: int = 10,
+              where: Optional[Dict[str, Any]] = None) -> Dict[str, Any]: ...
+
+    def get(self, ids: Optional[List[str]] = None, where: Optional[Dict[str, Any]] = None,
+            include: Optional[List[str]] = None) -> Dict[str, Any]: ...
+
+    def update(self, ids: List[str], metadatas: Optional[List[Dict[str, Any]]] = None) -> None: ...
+
+    def delete(self, ids: Optional[List[str]] = None) -> None: ...
+
+    def count(self) -> int: ...
+
+# ================= WHERE FILTERS =================
+
+def _compare(op, value, operand) -> bool:
+    if op == "$eq":
+        return value == operand
+    if op == "$ne":
+        return value != operand
+    if op == "$in":
+        return value in operand
+    if op == "$nin":
+        return value not in operand
+    if value is None:
+        return False
+    if op == "$gt":
+        return value > operand
+    if op == "$gte":
+        return value >= operand
+    if op == "$lt":
+        return value < operand
+    if op == "$lte":
+        return value <= operand
+    raise ValueError(f"Unsupported where operator: {op}")
+
+def matches(meta: Dict[str, Any], where: Optional[Dict[str, Any]]) -> bool:
+    """Evaluates a Chroma-style `where` clause ($and / $or / $eq / $ne / $in / $nin / $gt(e) / $lt(e))."""
+    if not where:
+        return True
+    for key, cond in where.items():
+        if key == "$and":
+            if not all(matches(meta, c) for c in cond):
+                return False
+        elif key == "$or":
+            if not any(matches(meta, c) for c in cond):
+                return False
+        elif isinstance(cond, dict):
+            value = meta.get(key)
+            if not all(_compare(op, value, operand) for op, operand in cond.items()):
+                return False
+        elif key not in meta or meta[key] != cond:
+            return False
+    return True
+
+# ================= QUANTIZATION =================
+
+def quantize_int8(vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Symmetric per-vector int8 scalar quantization: vector ~= codes * scale."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    scales = np.abs(vectors).max(axis=1) / 127
+    scales[scales == 0] = 1.0
+    codes = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+# ================= NUMPY COLLECTION =================
+
+def _nearest(vectors: np.ndarray, centroids: np.ndarray, chunk: int = 8192) -> np.ndarray:
+    """Index of the nearest centroid (L2) for each row."""
+    c_norms = np.einsum("ij,ij->i", centroids, centroids)
+    out = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), chunk):
+        block = np.asarray(vectors[start:start + chunk])
+        out[start:start + chunk] = np.argmin(c_norms[None, :] - 2 * block @ centroids.T, axis=1)
+    return out
+
+class NumpyCollection:
+    """
+    Zero-dependency vector backend (see VectorCollection).
+    - Embeddings: memory-mapped matrices, `<name>.f32` (float32) and, with quantization="int8",
+      `<name>.i8` (int8 codes + per-vector scale). Slots of deleted rows are reused.
+    - Ids, documents, metadata: SQLite (`<name>.db`); metadata is also kept in-process for filtering.
+    - Search: exact L2 (one matmul for a batch of queries) below `ivf_threshold` vectors;
+      above it an IVF coarse quantizer (k-means, sqrt(n) lists) scans the `nprobe` nearest lists.
+    - int8: scans read the codes (4x smaller than float32); the best k x `rerank_factor`
+      candidates are re-ranked against the float32 rows. rerank_factor=0 keeps no float32
+      copy at all (smallest store, approximate ranking).
+    Quantization and whether float32 is kept are fixed when the store is created.
+    path=None keeps everything in memory.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = NUMPY_STORE_DIR,
+        name: str = "long_term_memory",
+        ivf_threshold: int = IVF_THRESHOLD,
+        nprobe: int = IVF_NPROBE,
+        quantization: str = QUANTIZATION,
+        rerank_factor: int = RERANK_FACTOR,
+    ):
+        if quantization not in ("none", "int8"):
+            raise ValueError(f"Unsupported quantization: {quantization}")
+        self.name = name
+        self.path = path
+        self.ivf_threshold = ivf_threshold
+        self.nprobe = nprobe
+        self.quantization = quantization
+        self.rerank_factor = rerank_factor
+        self.keep_float = quantization == "none" or rerank_factor > 0
+        self.stats = {"queries": 0, "ivf_queries": 0, "ivf_fallbacks": 0, "ivf_trainings": 0, "reranked": 0}
+        self._lock = threading.RLock()
+        self._dim: Optional[int] = None
+        self._capacity = 0
+        self._n_slots = 0          # High-water mark of used slots
+        self._vectors = None       # (capacity, dim) float32, unless int8 without re-ranking
+        self._codes = None         # (capacity, dim) int8, with int8 quantization
+        self._scales = np.zeros(0, dtype=np.float32)
+        self._sq_norms = np.zeros(0, dtype=np.float32)
+        self._alive = np.zeros(0, dtype=bool)
+        self._assign = np.zeros(0, dtype=np.int32)   # IVF list per slot (-1: none)
+        self._ids: List[Optional[str]] = []
+        self._metas: List[Optional[Dict[str, Any]]] = []
+        self._slots: Dict[str, int] = {}
+        self._free: List[int] = []
+        self._centroids: Optional[np.ndarray] = None
+        self._trained_on = 0
+
+        if path:
+            os.makedirs(path, exist_ok=True)
+        self._conn = sqlite3.connect(self._file("db") if path else ":memory:", check_same_thread=False)
+        if path:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._conn:
+            self._conn.execute("CREATE TABLE IF NOT EXISTS info (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS memories (
+                    slot     INTEGER PRIMARY KEY,
+                    id       TEXT UNIQUE NOT NULL,
+                    document TEXT,
+                    metadata TEXT NOT NULL,
+                    sq_norm  REAL,
+                    scale    REAL
+                )
+            """)
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(memories)")}
+            for column in ("sq_norm", "scale"):
+                if column not in columns:
+                    self._conn.execute(f"ALTER TABLE memories ADD COLUMN {column} REAL")
+        self._load()
+
+    def _file(self, suffix: str) -> str:
+        return os.path.join(self.path, f"{self.name}.{suffix}")
+
+    # ---------- storage ----------
+
+    def _load(self):
+        info = dict(self._conn.execute("SELECT key, value FROM info"))
+        if "dim" not in info:
+            return
+        self._dim = int(info["dim"])
+        stored = (info.get("quantization", "none"), info.get("keep_float", "1") == "1")
+        if stored != (self.quantization, self.keep_float):
+            logger.warning(
+                f"Vector store {self.name} was created with quantization={stored[0]}, keep_float={stored[1]}; "
+                f"keeping that (requested quantization={self.quantization}, keep_float={self.keep_float})"
+            )
+            self.quantization, self.keep_float = stored
+
+        rows = self._conn.execute("SELECT slot, id, metadata, sq_norm, scale FROM memories").fetchall()
+        self._n_slots = max((row[0] for row in rows), default=-1) + 1
+        self._reserve(self._n_slots)
+        for slot, memory_id, meta, sq_norm, scale in rows:
+            self._ids[slot] = memory_id
+            self._metas[slot] = json.loads(meta)
+            self._slots[memory_id] = slot
+            self._alive[slot] = True
+            self._sq_norms[slot] = sq_norm if sq_norm is not None else np.nan
+            self._scales[slot] = scale if scale is not None else 1.0
+        self._free = [slot for slot in range(self._n_slots) if not self._alive[slot]]
+        missing = np.flatnonzero(np.isnan(self._sq_norms[:self._n_slots]))
+        if len(missing):
+            # Rows written before norms were stored
+            block = self._rows(missing)
+            self._sq_norms[missing] = np.einsum("ij,ij->i", block, block)
+
+        if self.path and os.path.exists(self._file("centroids.npy")):
+            centroids = np.load(self._file("centroids.npy"))
+            if centroids.ndim == 2 and centroids.shape[1] == self._dim:
+                self._set_centroids(centroids)
+        self._maybe_train()
+        logger.info(f"NumPy vector store loaded: {len(self._slots)} vectors (dim {self._dim}, {self.quantization}) from {self.path}")
+
+    def _grow(self, matrix, suffix: str, dtype, capacity: int):
+        if self.path:
+            file = self._file(suffix)
+            if matrix is not None:
+                matrix.flush()
+            with open(file, "ab") as f:
+                f.truncate(capacity * self._dim * np.dtype(dtype).itemsize)
+            return np.memmap(file, dtype=dtype, mode="r+", shape=(capacity, self._dim))
+        grown = np.zeros((capacity, self._dim), dtype=dtype)
+        if matrix is not None:
+            grown[:self._capacity] = matrix[:self._capacity]
+        return grown
+
+    def _reserve(self, n: int):
+        """Grows the vector matrices (and per-slot arrays) to hold at least n slots."""
+        if self._capacity and n <= self._capacity:
+            return
+        capacity = max(n, 2 * self._capacity, INITIAL_CAPACITY)
+        if self.path:
+            for suffix, itemsize in (("f32", 4), ("i8", 1)):
+                if os.path.exists(self._file(suffix)):
+                    capacity = max(capacity, os.path.getsize(self._file(suffix)) // (self._dim * itemsize))
+
+        if self.keep_float:
+            self._vectors = self._grow(self._vectors, "f32", np.float32, capacity)
+        if self.quantization == "int8":
+            self._codes = self._grow(self._codes, "i8", np.int8, capacity)
+        grow = capacity - self._capacity
+        self._scales = np.concatenate([self._scales, np.ones(grow, dtype=np.float32)])
+        self._sq_norms = np.concatenate([self._sq_norms, np.zeros(grow, dtype=np.float32)])
+        self._alive = np.concatenate([self._alive, np.zeros(grow, dtype=bool)])
+        self._assign = np.concatenate([self._assign, np.full(grow, -1, dtype=np.int32)])
+        self._ids.extend([None] * grow)
+        self._metas.extend([None] * grow)
+        self._capacity = capacity
+
+    def _flush(self):
+        for matrix in (self._vectors, self._codes):
+            if isinstance(matrix, np.memmap):
+                matrix.flush()
+
+    def _store(self, slots: np.ndarray, vectors: np.ndarray):
+        if self._vectors is not None:
+            self._vectors[slots] = vectors
+        if self._codes is not None:
+            codes, scales = quantize_int8(vectors)
+            self._codes[slots] = codes
+            self._scales[slots] = scales
+        self._sq_norms[slots] = np.einsum("ij,ij->i", vectors, vectors)
+        if self._centroids is not None:
+            self._assign[slots] = _nearest(vectors, self._centroids)
+
+    def _rows(self, slots) -> np.ndarray:
+        """float32 rows (dequantized when no float32 copy is kept)."""
+        if self._vectors is not None:
+            return np.asarray(self._vectors[slots], dtype=np.float32)
+        if self._codes is None:  # Nothing stored yet: the dimension is unknown
+            return np.zeros((len(slots), 0), dtype=np.float32)
+        return self._codes[slots].astype(np.float32) * self._scales[slots, None]
+
+    def _scan(self, slots, queries: np.ndarray) -> np.ndarray:
+        """Dot products rows x queries, reading int8 codes when quantized (in blocks, to bound memory)."""
+        if self._codes is None:
+            return np.asarray(self._vectors[slots]) @ queries.T
+        if isinstance(slots, slice):
+            slots = np.arange(*slots.indices(self._capacity))
+        out = np.empty((len(slots), len(queries)), dtype=np.float32)
+        for start in range(0, len(slots), SCAN_CHUNK):
+            block = slots[start:start + SCAN_CHUNK]
+            out[start:start + SCAN_CHUNK] = (self._codes[block].astype(np.float32) @ queries.T) * self._scales[block, None]
+        return out
+
+    def storage_bytes(self) -> Dict[str, int]:
+        """Bytes held per stored vector: `scan` is what every query reads, `total` includes the re-rank copy."""
+        if not self._dim:
+            return {"scan_per_vector": 0, "total_per_vector": 0}
+        # + 4 bytes of squared norm per vector, + 4 of scale for int8
+        scan = self._dim + 8 if self._codes is not None else self._dim * 4 + 4
+        total = scan + (self._dim * 4 if self._codes is not None and self._vectors is not None else 0)
+        return {"scan_per_vector": scan, "total_per_vector": total}
+
+    def _documents(self, slots: Sequence[int]) -> Dict[int, Optional[str]]:
+        docs: Dict[int, Optional[str]] = {}
+        for start in range(0, len(slots), _SQL_CHUNK):
+            chunk = list(slots[start:start + _SQL_CHUNK])
+            marks = ",".join("?" * len(chunk))
+            docs.update(self._conn.execute(f"SELECT slot, document FROM memories WHERE slot IN ({marks})", chunk))
+        return docs
+
+    def _result(self, slots: Sequence[int], include: Sequence[str]) -> Dict[str, Any]:
+        slots = [int(s) for s in slots]
+        docs = self._documents(slots) if "documents" in include and slots else {}
+        return {
+            "ids": [self._ids[s] for s in slots],
+            "documents": [docs.get(s) for s in slots] if "documents" in include else None,
+            "metadatas": [dict(self._metas[s]) for s in slots] if "metadatas" in include else None,
+            "embeddings": self._rows(slots) if "embeddings" in include else None,
+        }
+
+    # ---------- IVF ----------
+
+    def _set_centroids(self, centroids: np.ndarray):
+        self._centroids = centroids.astype(np.float32)
+        self._assign[:] = -1
+        slots = np.flatnonzero(self._alive[:self._n_slots])
+        for start in range(0, len(slots), SCAN_CHUNK):
+            block = slots[start:start + SCAN_CHUNK]
+            self._assign[block] = _nearest(self._rows(block), self._centroids)
+        self._trained_on = len(slots)
+
+    def _maybe_train(self):
+        # Retrain whenever the corpus has doubled since the last training
+        count = len(self._slots)
+        if count < self.ivf_threshold or (self._centroids is not None and count < 2 * self._trained_on):
+            return
+        slots = np.flatnonzero(self._alive[:self._n_slots])
+        n_lists = int(min(max(8, math.sqrt(count)), 4096))
+        rng = np.random.default_rng(0)
+        sample = self._rows(np.sort(rng.choice(slots, size=min(count, n_lists * IVF_SAMPLES_PER_LIST), replace=False)))
+        centroids = sample[rng.choice(len(sample), size=n_lists, replace=False)].copy()
+        for _ in range(IVF_TRAIN_ITERS):
+            labels = _nearest(sample, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            counts = np.bincount(labels, minlength=n_lists)
+            filled = counts > 0
+            centroids[filled] = sums[filled] / counts[filled, None]
+
+        self._set_centroids(centroids)
+        if self.path:
+            np.save(self._file("centroids.npy"), self._centroids)
+        self.stats["ivf_trainings"] += 1
+        logger.info(f"IVF index trained: {n_lists} lists over {count} vectors")
+
+    # ---------- collection API ----------
+
+    def count(self) -> int:
+        return len(self._slots)
+
+    def add(self, ids, embeddings, documents=None, metadatas=None):
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        if vectors.ndim != 2 or len(vectors) != len(ids):
+            raise ValueError(f"Expected {len(ids)} embeddings, got shape {vectors.shape}")
+        documents = documents if documents is not None else [None] * len(ids)
+        metadatas = metadatas if metadatas is not None else [None] * len(ids)
+
+        with self._lock:
+            if self._dim is None:
+                self._dim = vectors.shape[1]
+                with self._conn:
+                    self._conn.executemany("INSERT OR REPLACE INTO info (key, value) VALUES (?, ?)", [
+                        ("dim", str(self._dim)),
+                        ("quantization", self.quantization),
+                        ("keep_float", "1" if self.keep_float else "0"),
+                    ])
+            elif vectors.shape[1] != self._dim:
+                raise ValueError(f"Embedding dimension {vectors.shape[1]} does not match collection dimension {self._dim}")
+
+            batch = set()  # Duplicates within this call; stored ids are checked in _slots
+            fresh = []
+            for i, memory_id in enumerate(ids):
+                if memory_id in self._slots or memory_id in batch:
+                    logger.warning(f"Add of existing embedding ID: {memory_id}")
+                    continue
+                batch.add(memory_id)
+                fresh.append(i)
+            if not fresh:
+                return
+
+            reused = self._free[:len(fresh)]
+            del self._free[:len(reused)]
+            new = list(range(self._n_slots, self._n_slots + len(fresh) - len(reused)))
+            self._reserve(self._n_slots + len(new))
+            self._n_slots += len(new)
+            slots = np.array(reused + new, dtype=np.int64)
+
+            self._store(slots, vectors[fresh])
+            self._flush()
+            self._alive[slots] = True
+
+            rows = []
+            for slot, i in zip(slots.tolist(), fresh):
+                meta = dict(metadatas[i] or {})
+                self._ids[slot] = ids[i]
+                self._metas[slot] = meta
+                self._slots[ids[i]] = slot
+                rows.append((slot, ids[i], documents[i], json.dumps(meta),
+                             float(self._sq_norms[slot]), float(self._scales[slot])))
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT INTO memories (slot, id, document, metadata, sq_norm, scale) VALUES (?, ?, ?, ?, ?, ?)", rows
+                )
+
+            self._maybe_train()
+
+    def get(self, ids=None, where=None, limit=None, offset=None, include=None):
+        include = include or ["metadatas", "documents"]
+        with self._lock:
+            if ids is not None:
+                slots = [self._slots[i] for i in ids if i in self._slots]
+            else:
+                slots = np.flatnonzero(self._alive[:self._n_slots]).tolist()
+            if where:
+                slots = [s for s in slots if matches(self._metas[s], where)]
+            slots = slots[offset or 0:]
+            if limit is not None:
+                slots = slots[:limit]
+            return self._result(slots, include)
+
+    def update(self, ids, metadatas=None, documents=None, embeddings=None):
+        """Merges metadata (like Chroma) and replaces documents / embeddings of existing ids."""
+        vectors = np.asarray(embeddings, dtype=np.float32) if embeddings is not None else None
+        with self._lock:
+            rows = []
+            for i, memory_id in enumerate(ids):
+                slot = self._slots.get(memory_id)
+                if slot is None:
+                    logger.warning(f"Update of nonexistent embedding ID: {memory_id}")
+                    continue
+                if metadatas is not None and metadatas[i]:
+                    self._metas[slot].update(metadatas[i])
+                if vectors is not None:
+                    self._store(np.array([slot]), vectors[i:i + 1])
+                document = documents[i] if documents is not None else None
+                rows.append((json.dumps(self._metas[slot]), document,
+                             float(self._sq_norms[slot]), float(self._scales[slot]), slot))
+            if vectors is not None:
+                self._flush()
+            with self._conn:
+                self._conn.executemany(
+                    "UPDATE memories SET metadata = ?, document = COALESCE(?, document), sq_norm = ?, scale = ? WHERE slot = ?",
+                    rows
+                )
+
+    def delete(self, ids=None, where=None):
+        with self._lock:
+            targets = list(ids or [])
+            if where:
+                targets += self.get(where=where, include=[])["ids"]
+            slots = [self._slots.pop(i) for i in dict.fromkeys(targets) if i in self._slots]
+            if not slots:
+                return
+            for slot in slots:
+                self._ids[slot] = None
+                self._metas[slot] = None
+            self._alive[slots] = False
+            self._assign[slots] = -1
+            self._free.extend(slots)
+            with self._conn:
+                for start in range(0, len(slots), _SQL_CHUNK):
+                    chunk = slots[start:start + _SQL_CHUNK]
+                    self._conn.execute(f"DELETE FROM memories WHERE slot IN ({','.join('?' * len(chunk))})", chunk)
+
+    def _top_k(self, distances: np.ndarray, candidates: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        k = min(k, len(candidates))
+        if k <= 0:
+            return candidates[:0], distances[:0]
+        top = np.argpartition(distances, k - 1)[:k] if k < len(candidates) else np.arange(len(candidates))
+        top = top[np.argsort(distances[top], kind="stable")]
+        return candidates[top], np.maximum(distances[top], 0)
+
+    def _rank(self, query: np.ndarray, candidates: np.ndarray, products: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        distances = self._sq_norms[candidates] - 2 * products + query @ query
+        if self._codes is None or self._vectors is None or self.rerank_factor <= 0:
+            return self._top_k(distances, candidates, k)
+        # Quantized distances pick the shortlist; float32 rows decide the final order
+        shortlist, _ = self._top_k(distances, candidates, k * self.rerank_factor)
+        self.stats["reranked"] += len(shortlist)
+        exact = self._sq_norms[shortlist] - 2 * (self._rows(shortlist) @ query) + query @ query
+        return self._top_k(exact, shortlist, k)
+
+    def _search_ivf(self, query: np.ndarray, k: int, mask: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        self.stats["ivf_queries"] += 1
+        c_dist = np.einsum("ij,ij->i", self._centroids, self._centroids) - 2 * self._centroids @ query
+        probes = np.argpartition(c_dist, min(self.nprobe, len(c_dist)) - 1)[:self.nprobe]
+        candidates = np.flatnonzero(mask & np.isin(self._assign[:self._n_slots], probes))
+        if len(candidates) < k and mask.sum() > len(candidates):
+            # Too few (filtered) vectors in the probed lists: scan everything that passes the filter
+            self.stats["ivf_fallbacks"] += 1
+            candidates = np.flatnonzero(mask)
+        return self._rank(query, candidates, self._scan(candidates, query[None, :])[:, 0], k)
+
+    def query(self, query_embeddings, n_results=10, where=None, include=None):
+        include = include or ["metadatas", "documents", "distances"]
+        queries = np.atleast_2d(np.asarray(query_embeddings, dtype=np.float32))
+        out = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        with self._lock:
+            self.stats["queries"] += len(queries)
+            n = self._n_slots
+            if not n:
+                for key in out:
+                    out[key] = [[] for _ in queries]
+                return out
+            if queries.shape[1] != self._dim:
+                raise ValueError(f"Query dimension {queries.shape[1]} does not match collection dimension {self._dim}")
+
+            mask = self._alive[:n].copy()
+            if where:
+                mask &= np.fromiter((m is not None and matches(m, where) for m in self._metas[:n]), dtype=bool, count=n)
+
+            if self._centroids is not None:
+                hits = [self._search_ivf(q, n_results, mask) for q in queries]
+            else:
+                # Exact: one (n x queries) product for the whole batch
+                candidates = np.flatnonzero(mask)
+                products = self._scan(slice(0, n), queries)
+                hits = [self._rank(q, candidates, products[candidates, j], n_results) for j, q in enumerate(queries)]
+
+            for slots, distances in hits:
+                result = self._result(slots, include)
+                out["ids"].append(result["ids"])
+                out["documents"].append(result["documents"])
+                out["metadatas"].append(result["metadatas"])
+                out["distances"].append(distances.tolist())
+            return out
+
+    def close(self):
+        with self._lock:
+            self._flush()
+            self._conn.close()
@@ -1,20 +1,22 @@
 
 # memory/recall.py
 
-from typing import List, Dict
-from memory.vector_store import recall
+from typing import List, Dict, Optional
+from memory.vector_store import hybrid_recall
 import logging
 
 # Initialize logger
 logger = logging.getLogger(__name__)
 
-def fetch_context(task: str) -> str:
+def fetch_context(task: str, org_id: Optional[int] = None) -> str:
     """
     Retrieves context for the Planner.
     Fetches top memories, prioritizes them, and formats them as a string block.
+    Hybrid (vector + BM25) retrieval, so exact identifiers and error strings in the task match.
+    org_id: only this org's memories are searched (None = all).
     """
     try:
-        memories = recall(task, k=5)
+        memories = hybrid_recall(task, k=5, org_id=org_id)
         
         if not memories:
             return ""
@@ -0,0 +1,77 @@
+# memory/recall_cache.py
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Tuple
+
+# ================= CONFIG =================
+
+RECALL_CACHE_SIZE = int(os.getenv("MEMORY_RECALL_CACHE_SIZE", "512"))   # Cached recall results (0 disables)
+
+def recall_key(kind: str, query: str, k: int, org_id: Optional[int] = None,
+               memory_types: Optional[Sequence[str]] = None, tags: Optional[Sequence[str]] = None) -> Tuple:
+    """(kind, query, k, filters); filter lists are order-insensitive."""
+    return (
+        kind, query, k,
+        int(org_id) if org_id is not None else None,
+        tuple(sorted(memory_types)) if memory_types else (),
+        tuple(sorted(tags)) if tags else (),
+    )
+
+# ================= CACHE =================
+
+class RecallCache:
+    """
+    LRU of recall results, valid for one store generation.
+    Every write to the store (add, eviction, reload) calls invalidate(), which bumps the
+    generation and drops all entries, so a cached result is always what the store would return.
+    Results computed while a write landed are discarded: put() takes the generation read
+    before the query.
+    """
+
+    def __init__(self, max_items: int = RECALL_CACHE_SIZE):
+        self.max_items = max_items
+        self.generation = 0
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, Tuple[List[str], List[Dict[str, Any]]]]" = OrderedDict()
+        self.counters = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    def get(self, key: Hashable) -> Optional[Tuple[List[str], List[Dict[str, Any]]]]:
+        """(memory ids, memories) or None. Memories are copies, safe to modify."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.counters["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.counters["hits"] += 1
+            ids, memories = entry
+            return list(ids), [dict(m) for m in memories]
+
+    def put(self, key: Hashable, ids: List[str], memories: List[Dict[str, Any]], generation: int):
+        if self.max_items <= 0:
+            return
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._entries[key] = (list(ids), [dict(m) for m in memories])
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_items:
+                self._entries.popitem(last=False)
+
+    def invalidate(self):
+        with self._lock:
+            self.generation += 1
+            self.counters["invalidations"] += 1
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.counters["hits"] + self.counters["misses"]
+            return {
+                **self.counters,
+                "generation": self.generation,
+                "size": len(self._entries),
+                "hit_rate": round(self.counters["hits"] / lookups, 4) if lookups else 0.0,
+            }
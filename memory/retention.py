@@ -0,0 +1,179 @@
+# memory/retention.py
+
+import json
+import logging
+import math
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Initialize logger
+logger = logging.getLogger(__name__)
+
+# ================= CONFIG =================
+
+MEMORY_BUDGET = int(os.getenv("MEMORY_BUDGET", "1000"))                     # Max memories kept in the vector store
+COMPACT_TO = float(os.getenv("MEMORY_COMPACT_TO", "0.9"))                    # Fraction of budget left after compaction
+EVICTION_MODE = os.getenv("MEMORY_EVICTION_MODE", "archive")                 # archive | delete
+ARCHIVE_PATH = os.getenv("MEMORY_ARCHIVE_PATH", "logs/memory_archive.jsonl")
+RECENCY_HALF_LIFE_DAYS = float(os.getenv("MEMORY_HALF_LIFE_DAYS", "30"))
+
+# Strategies generalize best; mistakes are kept over plain knowledge so failures aren't repeated
+TYPE_WEIGHTS = {"strategy": 1.0, "mistake": 0.8, "knowledge": 0.7}
+DEFAULT_TYPE_WEIGHT = 0.5
+
+# ================= SCORING =================
+
+def _parse_time(value: Any) -> Optional[float]:
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+def memory_value(entry: Dict[str, Any], now: Optional[float] = None) -> float:
+    """
+    Retention value of a memory: type weight x verdict score x recency, boosted by recall hits.
+    Recency decays by half every RECENCY_HALF_LIFE_DAYS since the last time the memory was
+    created or recalled; each order of magnitude of hits roughly doubles the value.
+    """
+    now = now or time.time()
+    age_days = max(0.0, now - max(entry["created"], entry["last_hit"])) / 86400
+    recency = 0.5 ** (age_days / RECENCY_HALF_LIFE_DAYS)
+    score = entry["score"] if entry["score"] is not None else 0.5
+    type_weight = TYPE_WEIGHTS.get(entry["type"], DEFAULT_TYPE_WEIGHT)
+    return type_weight * (0.4 + 0.6 * score) * (0.25 + 0.75 * recency) * (1 + math.log1p(entry["hits"]))
+
+# ================= LEDGER =================
+
+class MemoryLedger:
+    """
+    In-process mirror of what the vector store holds: id -> created, score, type, recall hits.
+    Loaded from the collection once (one round trip), then kept current by add/recall/evict,
+    so counting and eviction decisions never query Chroma.
+    Recall hits are counted here and written back to the store's metadata in batches
+    (pending_hits); hits recorded after the last write-back are lost on a crash.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._dirty = set()  # Ids with hits not yet written back to the store
+        self._source = None
+        self.stats = {"hits": 0, "evicted": 0, "archived": 0, "compactions": 0}
+
+    def sync(self, collection, on_load: Optional[Callable[[List[str], List[Dict[str, Any]], List[str]], None]] = None) -> "MemoryLedger":
+        """
+        (Re)loads the ledger if it does not mirror `collection` yet.
+        on_load(ids, metadatas, documents) sees every stored memory once per load
+        (e.g. to migrate metadata or build secondary indexes).
+        """
+        with self._lock:
+            if self._source is collection:
+                return self
+            self._entries = {}
+            self._dirty = set()
+            self._source = collection
+            if collection is not None:
+                data = collection.get(include=["metadatas", "documents"] if on_load else ["metadatas"])
+                if on_load is not None:
+                    on_load(data["ids"], data["metadatas"], data["documents"])
+                self.add(data["ids"], data["metadatas"])
+            return self
+
+    def add(self, ids: List[str], metadatas: List[Dict[str, Any]]):
+        untimed = 0
+        with self._lock:
+            for memory_id, meta in zip(ids, metadatas):
+                meta = meta or {}
+                score = meta.get("score")
+                created = _parse_time(meta.get("timestamp"))
+                if created is None:
+                    # Unknown age counts as the oldest, not the newest: first to decay
+                    created, untimed = 0.0, untimed + 1
+                self._entries[memory_id] = {
+                    "created": created,
+                    "score": float(score) if isinstance(score, (int, float)) else None,
+                    "type": str(meta.get("memory_type", "unknown")).lower(),
+                    "hits": int(meta.get("hits", 0) or 0),
+                    "last_hit": _parse_time(meta.get("last_hit")) or 0.0,
+                }
+        if untimed:
+            logger.warning(f"{untimed} memories have no valid timestamp; ranked as the oldest for retention")
+
+    def record_hits(self, ids: List[str]):
+        now = time.time()
+        with self._lock:
+            for memory_id in ids:
+                entry = self._entries.get(memory_id)
+                if entry is not None:
+                    entry["hits"] += 1
+                    entry["last_hit"] = now
+                    self._dirty.add(memory_id)
+                    self.stats["hits"] += 1
+
+    def pending_hits(self) -> Tuple[List[str], List[Dict[str, Any]]]:
+        """
+        (ids, metadata patches) of memories recalled since the last call, for writing
+        hits / last_hit back to the store; the pending set is cleared.
+        """
+        with self._lock:
+            ids = [memory_id for memory_id in self._dirty if memory_id in self._entries]
+            self._dirty = set()
+            patches = [{
+                "hits": self._entries[memory_id]["hits"],
+                "last_hit": datetime.fromtimestamp(self._entries[memory_id]["last_hit"]).isoformat(),
+            } for memory_id in ids]
+        return ids, patches
+
+    def remove(self, ids: List[str]):
+        with self._lock:
+            for memory_id in ids:
+                self._entries.pop(memory_id, None)
+                self._dirty.discard(memory_id)
+
+    def count(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, memory_id: str) -> bool:
+        return memory_id in self._entries
+
+    def hits(self, memory_id: str) -> int:
+        entry = self._entries.get(memory_id)
+        return entry["hits"] if entry else 0
+
+    def lowest_value(self, n: int) -> List[str]:
+        """Ids of the n lowest-value memories."""
+        if n <= 0:
+            return []
+        now = time.time()
+        with self._lock:
+            ranked = sorted(
+                (memory_value(entry, now), memory_id)
+                for memory_id, entry in self._entries.items()
+            )
+        return [memory_id for _, memory_id in ranked[:n]]
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            by_type: Dict[str, int] = {}
+            for entry in self._entries.values():
+                by_type[entry["type"]] = by_type.get(entry["type"], 0) + 1
+            return {**self.stats, "count": len(self._entries), "by_type": by_type}
+
+# ================= ARCHIVE =================
+
+def archive_memories(ids: List[str], documents: List[str], metadatas: List[Dict[str, Any]], hits: List[int],
+                     path: Optional[str] = None) -> int:
+    """Appends evicted memories to a JSONL archive (re-importable with add_memories)."""
+    path = path or ARCHIVE_PATH
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    archived_at = datetime.now().isoformat()
+    with open(path, "a") as f:
+        for memory_id, doc, meta, hit_count in zip(ids, documents, metadatas, hits):
+            f.write(json.dumps({
+                "id": memory_id, "summary": doc, "meta": meta or {},
+                "hits": hit_count, "archived_at": archived_at
+            }) + "\n")
+    return len(ids)
@@ -0,0 +1,110 @@
+# memory/snapshot.py
+
+import json
+import struct
+import sys
+import zlib
+from datetime import datetime
+from typing import Any, Dict, List, NamedTuple
+
+import numpy as np
+
+# ================= FORMAT =================
+#
+#   magic "WEIONMEM" | uint32 version | uint64 header length | header (JSON)
+#   | zero padding to a 64-byte boundary
+#   | embeddings: float32, count x dim, C order (memory-mappable)
+#   | records: zlib-compressed JSON list of {"id", "document", "metadata"}
+
+MAGIC = b"WEIONMEM"
+VERSION = 1
+ALIGN = 64
+_PREFIX = struct.Struct("<8sIQ")
+
+class Snapshot(NamedTuple):
+    header: Dict[str, Any]
+    ids: List[str]
+    documents: List[str]
+    metadatas: List[Dict[str, Any]]
+    embeddings: np.ndarray  # (count, dim) float32, memory-mapped when read with mmap=True
+
+def _data_offset(header_len: int) -> int:
+    end = _PREFIX.size + header_len
+    return (end + ALIGN - 1) // ALIGN * ALIGN
+
+def write_snapshot(path: str, model_name: str, ids: List[str], documents: List[str],
+                   metadatas: List[Dict[str, Any]], embeddings) -> int:
+    """Writes one snapshot file; returns its size in bytes."""
+    if ids:
+        vectors = np.ascontiguousarray(np.asarray(embeddings, dtype=np.float32).reshape(len(ids), -1))
+    else:
+        vectors = np.zeros((0, 0), dtype=np.float32)
+    records = zlib.compress(json.dumps([
+        {"id": memory_id, "document": doc, "metadata": meta or {}}
+        for memory_id, doc, meta in zip(ids, documents, metadatas)
+    ]).encode())
+    header = json.dumps({
+        "model": model_name,
+        "dim": int(vectors.shape[1]),
+        "count": len(ids),
+        "dtype": "float32",
+        "records_bytes": len(records),
+        "exported_at": datetime.now().isoformat(),
+    }).encode()
+
+    offset = _data_offset(len(header))
+    with open(path, "wb") as f:
+        f.write(_PREFIX.pack(MAGIC, VERSION, len(header)))
+        f.write(header)
+        f.write(b"\0" * (offset - _PREFIX.size - len(header)))
+        f.write(vectors.tobytes())
+        f.write(records)
+        return f.tell()
+
+def read_header(path: str) -> Dict[str, Any]:
+    with open(path, "rb") as f:
+        magic, version, header_len = _PREFIX.unpack(f.read(_PREFIX.size))
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a memory snapshot")
+        if version != VERSION:
+            raise ValueError(f"Unsupported memory snapshot version {version} (expected {VERSION})")
+        header = json.loads(f.read(header_len))
+    header["data_offset"] = _data_offset(header_len)
+    return header
+
+def read_snapshot(path: str, mmap: bool = True) -> Snapshot:
+    """Reads a snapshot; embeddings are memory-mapped from the file unless mmap=False."""
+    header = read_header(path)
+    count, dim, offset = header["count"], header["dim"], header["data_offset"]
+    vector_bytes = count * dim * 4
+    if mmap and vector_bytes:
+        embeddings = np.memmap(path, dtype=np.float32, mode="r", offset=offset, shape=(count, dim))
+    else:
+        with open(path, "rb") as f:
+            f.seek(offset)
+            embeddings = np.frombuffer(f.read(vector_bytes), dtype=np.float32).reshape(count, dim)
+
+    with open(path, "rb") as f:
+        f.seek(offset + vector_bytes)
+        records = json.loads(zlib.decompress(f.read(header["records_bytes"])))
+    if len(records) != count:
+        raise ValueError(f"Corrupt memory snapshot {path}: {len(records)} records for {count} embeddings")
+    return Snapshot(
+        header,
+        [r["id"] for r in records],
+        [r["document"] for r in records],
+        [r["metadata"] for r in records],
+        embeddings,
+    )
+
+if __name__ == "__main__":
+    # python -m memory.snapshot export memory.snap
+    # python -m memory.snapshot import memory.snap [--replace]
+    from memory.vector_store import export_memory, import_memory
+
+    if len(sys.argv) < 3 or sys.argv[1] not in ("export", "import"):
+        sys.exit("usage: python -m memory.snapshot export|import PATH [--replace]")
+    if sys.argv[1] == "export":
+        print(f"Exported {export_memory(sys.argv[2])} memories to {sys.argv[2]}")
+    else:
+        print(f"Imported {import_memory(sys.argv[2], replace='--replace' in sys.argv)} memories from {sys.argv[2]}")
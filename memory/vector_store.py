@@ -1,13 +1,29 @@
 
 # memory/vector_store.py
 
-import chromadb
-# from chromadb.config import Settings
+try:
+    import chromadb
+    # from chromadb.config import Settings
+except Exception as e:  # Missing or broken native deps: the NumPy backend takes over
+    chromadb = None
+    _chromadb_error = e
 from sentence_transformers import SentenceTransformer
+import atexit
 import os
 import logging
+import threading
+import uuid
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
+
+from memory.embedding_cache import EmbeddingCache
+from memory.snapshot import read_snapshot, write_snapshot
+from memory.recall_cache import RecallCache, recall_key
+from memory.numpy_store import NumpyCollection, NUMPY_STORE_DIR
+from memory.lexical_index import BM25Index, normalize_tag, reciprocal_rank_fusion
+from memory.retention import MemoryLedger, archive_memories, MEMORY_BUDGET, COMPACT_TO, EVICTION_MODE
 
 # Initialize logger
 logger = logging.getLogger(__name__)
@@ -16,112 +32,587 @@ logger = logging.getLogger(__name__)
 
 PERSIST_DIR = "logs/vector_memory"
 COLLECTION_NAME = "long_term_memory"
-MAX_MEMORIES = 1000   # hard safety limit
+EMBED_MODEL_NAME = "all-MiniLM-L6-v2"
+DEFAULT_ORG_ID = 1    # Same default as the SQL models' org_id
+ENCODE_BATCH_SIZE = int(os.getenv("MEMORY_ENCODE_BATCH_SIZE", "64"))            # Sentences per encoder forward pass
+WRITE_BUFFER_SIZE = int(os.getenv("MEMORY_WRITE_BUFFER_SIZE", "32"))            # Buffered memories per flush
+WRITE_BUFFER_INTERVAL = float(os.getenv("MEMORY_WRITE_BUFFER_INTERVAL", "2"))   # Max seconds a buffered memory waits
+HYBRID_CANDIDATES = int(os.getenv("MEMORY_HYBRID_CANDIDATES", "20"))           # Per-retriever candidates fused by hybrid_recall
+SNAPSHOT_BATCH_SIZE = 1000                                                       # Memories per insert when importing a snapshot
+VECTOR_BACKEND = os.getenv("MEMORY_VECTOR_BACKEND", "auto")                      # auto (Chroma, else NumPy) | chroma | numpy
 
 os.makedirs(PERSIST_DIR, exist_ok=True)
 
 # ================= EMBEDDING MODEL =================
 
 try:
-    embedder = SentenceTransformer("all-MiniLM-L6-v2")
+    embedder = SentenceTransformer(EMBED_MODEL_NAME)
 except Exception as e:
     logger.error(f"Failed to load embedding model: {e}")
     embedder = None
 
-# ================= CHROMA CLIENT =================
+# Recall queries (e.g. the same goal objectives every arbitration cycle) and re-ingested
+# summaries are embedded once; the encoder is looked up per call
+embedding_cache = EmbeddingCache(
+    lambda texts, batch_size: embedder.encode(texts, batch_size=batch_size),
+    EMBED_MODEL_NAME
+)
 
-try:
-    # Use PersistentClient for disk storage (Chroma v0.4+)
-    client = chromadb.PersistentClient(path=PERSIST_DIR)
-    
-    collection = client.get_or_create_collection(
-        name=COLLECTION_NAME
-    )
-except Exception as e:
-    logger.error(f"Failed to initialize ChromaDB: {e}")
-    client = None
-    collection = None
+def embed(texts: List[str]):
+    """Embeddings (numpy rows) for texts, through the embedding cache."""
+    return embedding_cache.encode(texts, batch_size=ENCODE_BATCH_SIZE)
+
+def embedding_cache_stats() -> Dict[str, Any]:
+    return embedding_cache.stats()
+
+# ================= VECTOR BACKEND =================
+
+# `collection` is any memory.numpy_store.VectorCollection: a Chroma collection, or the
+# built-in NumPy store when Chroma is unavailable (or MEMORY_VECTOR_BACKEND=numpy)
+client = None
+collection = None
+backend = None
+
+if VECTOR_BACKEND in ("auto", "chroma"):
+    if chromadb is None:
+        logger.error(f"Failed to import ChromaDB: {_chromadb_error}")
+    else:
+        try:
+            # Use PersistentClient for disk storage (Chroma v0.4+)
+            client = chromadb.PersistentClient(path=PERSIST_DIR)
+
+            collection = client.get_or_create_collection(
+                name=COLLECTION_NAME
+            )
+            backend = "chroma"
+        except Exception as e:
+            logger.error(f"Failed to initialize ChromaDB: {e}")
+            client = None
+
+if collection is None and VECTOR_BACKEND in ("auto", "numpy"):
+    try:
+        collection = NumpyCollection(NUMPY_STORE_DIR, name=COLLECTION_NAME)
+        backend = "numpy"
+        if VECTOR_BACKEND == "auto":
+            logger.warning(f"Vector memory using the built-in NumPy backend ({NUMPY_STORE_DIR})")
+    except Exception as e:
+        logger.error(f"Failed to initialize NumPy vector store: {e}")
+
+# ================= RETENTION =================
+
+# Count, type, score and recall hits of every stored memory, mirrored in-process
+ledger = MemoryLedger()
+_write_lock = threading.RLock()
+
+# BM25 over memory documents, next to the vector index; rebuilt whenever the ledger
+# (re)loads and updated incrementally by add/compact
+lexical_index = BM25Index()
+
+# Recall results keyed by (query, k, filters), valid until the next write to the store
+recall_cache = RecallCache()
+
+def _on_load(ids: List[str], metadatas: List[Dict[str, Any]], documents: List[str]):
+    recall_cache.invalidate()
+    _backfill_scope(ids, metadatas)
+    lexical_index.clear()
+    lexical_index.add_many(ids, documents, metadatas)
+
+def _ledger() -> MemoryLedger:
+    return ledger.sync(collection, on_load=_on_load)
+
+def compact(n: int) -> int:
+    """
+    Evicts the n lowest-value memories (see memory.retention.memory_value), archiving
+    them first unless MEMORY_EVICTION_MODE=delete. Returns the number evicted.
+    """
+    if not collection:
+        return 0
+
+    with _write_lock:
+        book = _ledger()
+        save_hits()
+        victims = book.lowest_value(n)
+        if not victims:
+            return 0
+        try:
+            if EVICTION_MODE == "archive":
+                data = collection.get(ids=victims, include=["documents", "metadatas"])
+                archive_memories(data["ids"], data["documents"], data["metadatas"], [book.hits(i) for i in data["ids"]])
+                book.stats["archived"] += len(data["ids"])
+            collection.delete(ids=victims)
+        except Exception as e:
+            logger.error(f"Memory compaction failed: {e}")
+            return 0
+        finally:
+            recall_cache.invalidate()
+
+        book.remove(victims)
+        for memory_id in victims:
+            lexical_index.remove(memory_id)
+        book.stats["evicted"] += len(victims)
+        book.stats["compactions"] += 1
+        logger.info(f"Memory compaction evicted {len(victims)} memories ({book.count()} left, budget {MEMORY_BUDGET})")
+        return len(victims)
+
+def save_hits() -> int:
+    """
+    Writes recall hits recorded since the last save into the memories' metadata (one
+    batched update), so retention keeps them across restarts. Runs on every compaction
+    and at exit. Returns the number of memories updated.
+    """
+    if not collection:
+        return 0
+    with _write_lock:
+        ids, patches = ledger.pending_hits()
+        if not ids:
+            return 0
+        try:
+            collection.update(ids=ids, metadatas=patches)
+        except Exception as e:
+            logger.error(f"Failed to save recall hits: {e}")
+            return 0
+        return len(ids)
+
+def _make_room(incoming: int):
+    # Compact down to COMPACT_TO of the budget so eviction runs once per batch of adds,
+    # not on every add near the limit
+    book = _ledger()
+    if book.count() + incoming <= MEMORY_BUDGET:
+        return
+    compact(book.count() + incoming - int(MEMORY_BUDGET * COMPACT_TO))
+
+def recall_cache_stats() -> Dict[str, Any]:
+    return recall_cache.stats()
+
+def retention_stats() -> Dict[str, Any]:
+    return {**_ledger().summary(), "budget": MEMORY_BUDGET, "eviction_mode": EVICTION_MODE}
+
+def backend_stats() -> Dict[str, Any]:
+    stats = {"backend": backend, **getattr(collection, "stats", {})}
+    if hasattr(collection, "storage_bytes"):
+        stats.update(quantization=collection.quantization, **collection.storage_bytes())
+    return stats
 
 # ================= ADD MEMORY =================
 
-def add_memory(summary: str, meta: Dict[str, Any]):
+def _tag_key(tag: str) -> str:
+    return "tag_" + normalize_tag(tag)
+
+def _scope_meta(meta: Dict[str, Any]) -> Dict[str, Any]:
+    # Chroma metadata values must be str / int / float / bool, so tag lists are joined, and each
+    # tag is also stored as a flat `tag_<name>: True` key that `where` filters can match
+    safe_meta = meta.copy()
+    tags = safe_meta.get("tags")
+    if isinstance(tags, str):
+        tags = [t for t in tags.split(",") if t.strip()]
+    if isinstance(tags, list):
+        safe_meta["tags"] = ",".join(tags)
+        safe_meta.update({_tag_key(t): True for t in tags if _tag_key(t) != "tag_"})
+
+    safe_meta["org_id"] = int(safe_meta.get("org_id") or DEFAULT_ORG_ID)
+    return safe_meta
+
+def _flatten_meta(meta: Dict[str, Any]) -> Dict[str, Any]:
+    safe_meta = _scope_meta(meta)
+    safe_meta["timestamp"] = datetime.now().isoformat()
+    return safe_meta
+
+def _backfill_scope(ids: List[str], metadatas: List[Dict[str, Any]]):
+    """Memories stored before org/tag scoping get org_id (default org) and tag_ keys once."""
+    stale = [(i, m or {}) for i, m in zip(ids, metadatas) if "org_id" not in (m or {})]
+    if not stale:
+        return
+    try:
+        scoped = [_scope_meta(m) for _, m in stale]
+        collection.update(ids=[i for i, _ in stale], metadatas=scoped)
+        for (_, meta), new_meta in zip(stale, scoped):
+            meta.update(new_meta)
+        logger.info(f"Backfilled org/tag metadata on {len(stale)} memories")
+    except Exception as e:
+        logger.error(f"Failed to backfill memory metadata: {e}")
+
+def add_memories(items: List[Tuple[str, Dict[str, Any]]]) -> int:
     """
-    Store high-quality distilled memory.
-    Vectorizes the summary. Stores other info in metadata.
+    Store many memories at once: one batched encode and one collection insert.
+    items: (summary, meta) pairs. Returns the number of memories stored.
     """
     if not collection or not embedder:
         logger.warning("Vector Store not initialized. Skipping memory storage.")
-        return
+        return 0
 
-    if not summary or not summary.strip():
-        return
+    items = [(summary, meta) for summary, meta in items if summary and summary.strip()]
+    if not items:
+        return 0
 
-    # Safety: prevent memory explosion
-    if collection.count() >= MAX_MEMORIES:
-        logger.warning("Memory limit reached. Skipping.")
-        return
+    # A single batch larger than the whole budget keeps its first MEMORY_BUDGET items
+    if len(items) > MEMORY_BUDGET:
+        logger.warning(f"Memory budget is {MEMORY_BUDGET}. Storing {MEMORY_BUDGET} of {len(items)} memories.")
+        items = items[:MEMORY_BUDGET]
 
     try:
-        embedding = embedder.encode(summary).tolist()
-        
-        # Ensure metadata is flat (Chroma restriction on some versions, but Dict/List usually ok in newer. 
-        # Safest is simple types).
-        # Convert tags list to string for safety if needed, or keep if supported. 
-        # Chroma supports string, int, float, bool. Lists/Dicts might be tricky in metadata.
-        # Let's join tags.
-        
-        safe_meta = meta.copy()
-        if "tags" in safe_meta and isinstance(safe_meta["tags"], list):
-            safe_meta["tags"] = ",".join(safe_meta["tags"])
-            
-        safe_meta["timestamp"] = datetime.now().isoformat()
-        
-        collection.add(
-            documents=[summary],
-            embeddings=[embedding],
-            metadatas=[safe_meta],
-            ids=[f"mem_{datetime.now().timestamp()}"]
-        )
-        logger.info(f"Memory Stored: {summary[:50]}...")
-        
+        summaries = [summary for summary, _ in items]
+        embeddings = embed(summaries).tolist()
+        metadatas = [_flatten_meta(meta) for _, meta in items]
+        # Random ids: concurrent batches (write buffer, task executor) never collide
+        ids = [f"mem_{uuid.uuid4().hex}" for _ in items]
+
+        with _write_lock:
+            # Evict low-value memories instead of refusing new ones once the budget is reached
+            _make_room(len(items))
+            collection.add(
+                documents=summaries,
+                embeddings=embeddings,
+                metadatas=metadatas,
+                ids=ids
+            )
+            recall_cache.invalidate()
+            ledger.add(ids, metadatas)
+            lexical_index.add_many(ids, summaries, metadatas)
+        logger.info(f"Memories Stored: {len(items)} (first: {summaries[0][:50]}...)")
+        return len(items)
+
     except Exception as e:
-        logger.error(f"Failed to add memory: {e}")
+        logger.error(f"Failed to add memories: {e}")
+        return 0
+
+def add_memory(summary: str, meta: Dict[str, Any], buffered: bool = False):
+    """
+    Store high-quality distilled memory.
+    Vectorizes the summary. Stores other info in metadata.
+    buffered: queue it in the write buffer (flushed in batches) instead of writing now.
+    """
+    if buffered:
+        write_buffer.add(summary, meta)
+        return
+
+    add_memories([(summary, meta)])
+
+# ================= WRITE BUFFER =================
+
+class MemoryWriteBuffer:
+    """
+    Collects memories from add_memory(..., buffered=True) and writes them with add_memories,
+    as soon as `max_items` are pending or `flush_interval` seconds after the first one.
+    Buffered memories become visible to recall after the flush.
+    """
+
+    def __init__(self, max_items: int = WRITE_BUFFER_SIZE, flush_interval: float = WRITE_BUFFER_INTERVAL):
+        self.max_items = max_items
+        self.flush_interval = flush_interval
+        self._pending: List[Tuple[str, Dict[str, Any]]] = []
+        self._lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+
+    def add(self, summary: str, meta: Dict[str, Any]):
+        with self._lock:
+            self._pending.append((summary, meta))
+            full = len(self._pending) >= self.max_items
+            if not full and self._timer is None:
+                self._timer = threading.Timer(self.flush_interval, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+        if full:
+            self.flush()
+
+    def flush(self) -> int:
+        with self._lock:
+            items, self._pending = self._pending, []
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        return add_memories(items) if items else 0
+
+    def __len__(self):
+        return len(self._pending)
+
+
+write_buffer = MemoryWriteBuffer()
+atexit.register(write_buffer.flush)
+atexit.register(save_hits)
 
 # ================= RECALL MEMORY =================
 
-def recall(query: str, k: int = 5) -> List[Dict[str, Any]]:
+def _format_memories(documents: List[str], metadatas: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    memories = []
+    for doc, meta in zip(documents, metadatas):
+        meta = meta or {}
+        memories.append({
+            "summary": doc,
+            "type": meta.get("memory_type", "unknown"),
+            "tags": meta.get("tags", ""),
+            "score": meta.get("score"),
+            "source_task": meta.get("source_task")
+        })
+    return memories
+
+def _cached_recall(key: Tuple) -> Optional[List[Dict[str, Any]]]:
+    cached = recall_cache.get(key)
+    if cached is None:
+        return None
+    ids, memories = cached
+    ledger.record_hits(ids)
+    return memories
+
+def _recalled(key: Tuple, ids: List[str], memories: List[Dict[str, Any]], generation: int) -> List[Dict[str, Any]]:
+    ledger.record_hits(ids)
+    recall_cache.put(key, ids, memories, generation)
+    return memories
+
+def memory_filter(
+    org_id: Optional[int] = None,
+    memory_types: Optional[List[str]] = None,
+    tags: Optional[List[str]] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    Chroma `where` clause scoping a recall: one org, any of `memory_types`, any of `tags`.
+    Applied inside the vector query, so other tenants' memories are never ranked.
+    """
+    conditions = []
+    if org_id is not None:
+        conditions.append({"org_id": int(org_id)})
+    if memory_types:
+        conditions.append({"memory_type": {"$in": list(memory_types)}})
+    if tags:
+        tag_conditions = [{_tag_key(t): True} for t in tags]
+        conditions.append(tag_conditions[0] if len(tag_conditions) == 1 else {"$or": tag_conditions})
+
+    if not conditions:
+        return None
+    return conditions[0] if len(conditions) == 1 else {"$and": conditions}
+
+def recall(
+    query: str,
+    k: int = 5,
+    org_id: Optional[int] = None,
+    memory_types: Optional[List[str]] = None,
+    tags: Optional[List[str]] = None
+) -> List[Dict[str, Any]]:
     """
     Recall top-k relevant memories for current task.
     Returns list of dicts: {text, metadata, distance}
+    org_id / memory_types / tags: see memory_filter. None searches all memories.
     """
     if not collection or not embedder:
         return []
 
-    if collection.count() == 0:
+    if _ledger().count() == 0:
         return []
 
+    key = recall_key("vector", query, k, org_id, memory_types, tags)
+    cached = _cached_recall(key)
+    if cached is not None:
+        return cached
+
     try:
-        query_embedding = embedder.encode(query).tolist()
+        generation = recall_cache.generation
+        query_embedding = embed([query])[0].tolist()
 
         results = collection.query(
             query_embeddings=[query_embedding],
-            n_results=k
+            n_results=k,
+            where=memory_filter(org_id, memory_types, tags)
         )
 
-        memories = []
         if results and results["documents"]:
-            for i, doc in enumerate(results["documents"][0]):
-                meta = results["metadatas"][0][i]
-                memories.append({
-                    "summary": doc,
-                    "type": meta.get("memory_type", "unknown"),
-                    "tags": meta.get("tags", ""),
-                    "score": meta.get("score"),
-                    "source_task": meta.get("source_task")
-                })
-        
-        return memories
+            memories = _format_memories(results["documents"][0], results["metadatas"][0])
+            return _recalled(key, results["ids"][0], memories, generation)
+        return []
         
     except Exception as e:
         logger.error(f"Failed to recall memory: {e}")
         return []
+
+def recall_many(
+    queries: List[str],
+    k: int = 5,
+    org_id: Optional[int] = None,
+    memory_types: Optional[List[str]] = None,
+    tags: Optional[List[str]] = None
+) -> List[List[Dict[str, Any]]]:
+    """
+    Recall top-k memories for several queries at once: one batched encode and one
+    multi-embedding collection query. Returns one list per query, in input order.
+    Filters as in recall.
+    """
+    if not queries or not collection or not embedder:
+        return [[] for _ in queries]
+
+    if _ledger().count() == 0:
+        return [[] for _ in queries]
+
+    try:
+        # Identical queries (e.g. goals sharing an objective) are searched once,
+        # and queries answered since the last write not at all
+        distinct = list(dict.fromkeys(queries))
+        keys = {query: recall_key("vector", query, k, org_id, memory_types, tags) for query in distinct}
+        by_query = {}
+        for query in distinct:
+            cached = _cached_recall(keys[query])
+            if cached is not None:
+                by_query[query] = cached
+
+        misses = [query for query in distinct if query not in by_query]
+        if misses:
+            generation = recall_cache.generation
+            results = collection.query(
+                query_embeddings=embed(misses).tolist(),
+                n_results=k,
+                where=memory_filter(org_id, memory_types, tags)
+            )
+            for i, query in enumerate(misses):
+                memories = _format_memories(results["documents"][i], results["metadatas"][i])
+                by_query[query] = _recalled(keys[query], results["ids"][i], memories, generation)
+        return [by_query[query] for query in queries]
+
+    except Exception as e:
+        logger.error(f"Failed to recall memories: {e}")
+        return [[] for _ in queries]
+
+def hybrid_recall(
+    query: str,
+    k: int = 5,
+    org_id: Optional[int] = None,
+    memory_types: Optional[List[str]] = None,
+    tags: Optional[List[str]] = None,
+    candidates: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """
+    Recall that also matches exact identifiers, file names and error strings: the top
+    `candidates` of the vector query and of the BM25 index are fused with reciprocal
+    rank fusion. Filters as in recall. Without an embedding model it is lexical-only.
+    """
+    if not collection:
+        return []
+
+    book = _ledger()
+    if book.count() == 0:
+        return []
+
+    candidates = min(candidates or max(HYBRID_CANDIDATES, k), book.count())
+    key = recall_key(f"hybrid:{candidates}", query, k, org_id, memory_types, tags)
+    cached = _cached_recall(key)
+    if cached is not None:
+        return cached
+
+    try:
+        generation = recall_cache.generation
+        found: Dict[str, Tuple[str, Dict[str, Any]]] = {}
+        rankings = []
+
+        if embedder is not None:
+            results = collection.query(
+                query_embeddings=[embed([query])[0].tolist()],
+                n_results=candidates,
+                where=memory_filter(org_id, memory_types, tags)
+            )
+            vector_ids = results["ids"][0]
+            found.update(zip(vector_ids, zip(results["documents"][0], results["metadatas"][0])))
+            rankings.append(vector_ids)
+
+        lexical = lexical_index.search(query, candidates, org_id=org_id, memory_types=memory_types, tags=tags)
+        rankings.append([memory_id for memory_id, _ in lexical])
+
+        top = [memory_id for memory_id, _ in reciprocal_rank_fusion(rankings)[:k]]
+        missing = [memory_id for memory_id in top if memory_id not in found]
+        if missing:
+            data = collection.get(ids=missing, include=["documents", "metadatas"])
+            found.update(zip(data["ids"], zip(data["documents"], data["metadatas"])))
+
+        top = [memory_id for memory_id in top if memory_id in found]
+        memories = _format_memories([found[i][0] for i in top], [found[i][1] for i in top])
+        return _recalled(key, top, memories, generation)
+
+    except Exception as e:
+        logger.error(f"Failed to recall memory (hybrid): {e}")
+        return []
+
+# ================= SNAPSHOTS =================
+
+def _embedding_dim() -> Optional[int]:
+    """Dimension of this node's embeddings: the model's, else that of the vectors already stored."""
+    if embedder is not None:
+        try:
+            dim = embedder.get_sentence_embedding_dimension()
+            if isinstance(dim, int):
+                return dim
+        except Exception:
+            pass
+    data = collection.get(limit=1, include=["embeddings"])
+    if len(data["ids"]):
+        return len(data["embeddings"][0])
+    return None
+
+def export_memory(path: str) -> int:
+    """
+    Writes every stored memory (document, metadata, embedding) to one snapshot file
+    (see memory.snapshot). Recall hits go into the metadata, so retention carries over.
+    Returns the number of memories exported.
+    """
+    if not collection:
+        logger.warning("Vector Store not initialized. Nothing to export.")
+        return 0
+
+    with _write_lock:
+        book = _ledger()
+        data = collection.get(include=["documents", "metadatas", "embeddings"])
+    ids = list(data["ids"])
+    metadatas = [{**(meta or {}), "hits": book.hits(memory_id)} for memory_id, meta in zip(ids, data["metadatas"])]
+    size = write_snapshot(path, EMBED_MODEL_NAME, ids, list(data["documents"]), metadatas, data["embeddings"])
+    logger.info(f"Exported {len(ids)} memories to {path} ({size / 1024:.0f} KiB)")
+    return len(ids)
+
+def import_memory(path: str, replace: bool = False) -> int:
+    """
+    Loads a snapshot written by export_memory without re-encoding anything.
+    The snapshot must come from the same embedding model and dimension (ValueError otherwise).
+    Memories already stored (same id) are skipped; replace=True drops the current store first.
+    Beyond MEMORY_BUDGET the lowest-value memories of the snapshot are left out.
+    Returns the number of memories imported.
+    """
+    snap = read_snapshot(path)
+    header = snap.header
+    if header["model"] != EMBED_MODEL_NAME:
+        raise ValueError(f"Snapshot was embedded with {header['model']}, this node uses {EMBED_MODEL_NAME}")
+    if not collection:
+        logger.warning("Vector Store not initialized. Skipping memory import.")
+        return 0
+    dim = _embedding_dim()
+    if snap.ids and dim is not None and dim != header["dim"]:
+        raise ValueError(f"Snapshot embeddings have dimension {header['dim']}, this node uses {dim}")
+
+    with _write_lock:
+        book = _ledger()
+        if replace:
+            existing = list(collection.get(include=[])["ids"])
+            if existing:
+                collection.delete(ids=existing)
+            book.remove(existing)
+            lexical_index.clear()
+            recall_cache.invalidate()
+
+        keep = [i for i, memory_id in enumerate(snap.ids) if memory_id not in book]
+        if len(keep) > MEMORY_BUDGET:
+            ranking = MemoryLedger()
+            ranking.add([snap.ids[i] for i in keep], [snap.metadatas[i] for i in keep])
+            dropped = set(ranking.lowest_value(len(keep) - MEMORY_BUDGET))
+            logger.warning(f"Memory budget is {MEMORY_BUDGET}. Leaving out {len(dropped)} lowest-value memories of the snapshot.")
+            keep = [i for i in keep if snap.ids[i] not in dropped]
+        if not keep:
+            return 0
+
+        _make_room(len(keep))
+        for start in range(0, len(keep), SNAPSHOT_BATCH_SIZE):
+            rows = keep[start:start + SNAPSHOT_BATCH_SIZE]
+            ids = [snap.ids[i] for i in rows]
+            documents = [snap.documents[i] for i in rows]
+            metadatas = [_scope_meta(snap.metadatas[i]) for i in rows]
+            embeddings = np.asarray(snap.embeddings[rows])
+            collection.add(ids=ids, embeddings=embeddings, documents=documents, metadatas=metadatas)
+            recall_cache.invalidate()
+            book.add(ids, metadatas)
+            lexical_index.add_many(ids, documents, metadatas)
+            # Re-ingesting the same summaries later reuses these embeddings
+            embedding_cache.seed(documents, embeddings)
+
+    logger.info(f"Imported {len(keep)} memories from {path} (exported {header.get('exported_at')})")
+    return len(keep)
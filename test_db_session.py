@@ -0,0 +1,157 @@
+# test_db_session.py
+import sys
+import os
+import tempfile
+import threading
+from unittest.mock import patch
+
+from sqlalchemy import Column, Integer, String, text
+from sqlalchemy.orm import Query, declarative_base, sessionmaker
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from api import database
+from api.database import create_db_engine, session_scope
+from api.models import Base, PriorityWeights, UserPreference
+
+ScratchBase = declarative_base()
+
+class Note(ScratchBase):
+    __tablename__ = "notes"
+    id = Column(Integer, primary_key=True)
+    body = Column(String)
+
+def _engine(tmp, profile="production"):
+    engine = create_db_engine(f"sqlite:///{os.path.join(tmp, 'test.db')}", profile=profile)
+    ScratchBase.metadata.create_all(bind=engine)
+    return engine
+
+def test_production_profile_pragmas():
+    print("\n--- Test: SQLite Production Profile ---")
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = _engine(tmp)
+        with engine.connect() as conn:
+            assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+            assert conn.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+            assert conn.execute(text("PRAGMA busy_timeout")).scalar() == database.SQLITE_BUSY_TIMEOUT_MS
+            assert conn.execute(text("PRAGMA cache_size")).scalar() == -database.SQLITE_CACHE_SIZE_KB
+        assert engine.pool.size() == database.DB_POOL_SIZE
+        engine.dispose()
+
+        plain = create_db_engine(f"sqlite:///{os.path.join(tmp, 'plain.db')}", profile="default")
+        with plain.connect() as conn:
+            assert conn.execute(text("PRAGMA journal_mode")).scalar() == "delete"
+        plain.dispose()
+    print("✅ WAL, synchronous=NORMAL, busy timeout and cache size applied per connection")
+
+def test_session_scope_shares_and_rolls_back():
+    print("\n--- Test: Shared Session Scope ---")
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = _engine(tmp)
+        Base.metadata.create_all(bind=engine, tables=[PriorityWeights.__table__])
+        factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        opened = []
+
+        def counting_session(**kw):
+            opened.append(kw)
+            return factory(**kw)
+
+        with patch("api.database.SessionLocal", side_effect=counting_session):
+            from autonomy.weight_updater import get_current_weights
+
+            with session_scope() as outer:
+                outer.add(Note(body="kept"))
+                with session_scope() as inner:
+                    assert inner is outer
+                weights = get_current_weights()  # Joins the outer session
+            assert len(opened) == 1
+            assert weights.impact is not None  # Still readable after the scope closed
+
+            try:
+                with session_scope() as db:
+                    db.add(Note(body="discarded"))
+                    raise RuntimeError("boom")
+            except RuntimeError:
+                pass
+
+            with session_scope() as db:
+                bodies = [n.body for n in db.query(Note).all()]
+                assert db.query(PriorityWeights).count() == 1
+        engine.dispose()
+
+    assert bodies == ["kept"]
+    print("✅ Nested scopes share one session, commit once, roll back on error")
+
+def test_concurrent_writers_wait_for_lock():
+    print("\n--- Test: Concurrent Writers ---")
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = _engine(tmp)
+        factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        errors = []
+
+        def writer(n):
+            try:
+                for i in range(25):
+                    with session_scope() as db:
+                        db.add(Note(body=f"{n}-{i}"))
+            except Exception as e:
+                errors.append(e)
+
+        with patch("api.database.SessionLocal", factory):
+            threads = [threading.Thread(target=writer, args=(n,)) for n in range(8)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+
+            with session_scope() as db:
+                count = db.query(Note).count()
+        engine.dispose()
+
+    assert not errors, errors
+    assert count == 8 * 25
+    print("✅ 8 threads x 25 commits without 'database is locked'")
+
+def test_joined_helper_failures_keep_outer_session_usable():
+    print("\n--- Test: Helper Failures Inside A Shared Scope ---")
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = _engine(tmp)
+        # evolution_directives is missing on purpose: recording a directive fails
+        Base.metadata.create_all(bind=engine, tables=[UserPreference.__table__])
+        factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        with factory() as db:
+            db.add(UserPreference(user_id="u", pref_risk_tolerance=0.9))
+            db.commit()
+
+        real_first = Query.first
+        lookups = []
+
+        def racing_first(query):
+            # The first lookup misses, as if another decision inserted the row right after it
+            lookups.append(query)
+            return None if len(lookups) == 1 else real_first(query)
+
+        with patch("api.database.SessionLocal", factory):
+            from autonomy.meta_cognition_engine import record_evolution_directive
+            from autonomy.preference_engine import get_user_preference
+
+            with session_scope() as db:
+                db.add(Note(body="decision"))
+                with patch.object(Query, "first", racing_first):
+                    pref = get_user_preference("u")
+                record_evolution_directive("META", "RULE_TIGHTEN", "test", 0.8)
+                db.add(Note(body="after"))
+
+            with session_scope() as db:
+                bodies = [n.body for n in db.query(Note).order_by(Note.id).all()]
+        engine.dispose()
+
+    assert pref.pref_risk_tolerance == 0.9  # The concurrently created row, not a fallback
+    assert bodies == ["decision", "after"]
+    print("✅ Failed helper writes roll back to their savepoint, the decision still commits")
+
+if __name__ == "__main__":
+    test_production_profile_pragmas()
+    test_session_scope_shares_and_rolls_back()
+    test_concurrent_writers_wait_for_lock()
+    test_joined_helper_failures_keep_outer_session_usable()
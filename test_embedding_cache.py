@@ -0,0 +1,100 @@
+# test_embedding_cache.py
+import sys
+import os
+import tempfile
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from memory.embedding_cache import EmbeddingCache, embedding_key
+from memory.recall_cache import RecallCache
+from tests.support.memory_stub import MemoryStubNode
+
+def _encoder():
+    calls = []
+
+    def encode(texts, batch_size):
+        calls.append(list(texts))
+        return np.stack([np.full(4, len(t), dtype=np.float32) for t in texts])
+
+    return encode, calls
+
+def test_key_is_model_and_normalized_text():
+    print("\n--- Test: Content Address ---")
+    assert embedding_key("m", "Ship  the\nrelease ") == embedding_key("m", "Ship the release")
+    assert embedding_key("m", "Ship the release") != embedding_key("other", "Ship the release")
+    print("✅ Whitespace-insensitive, model-scoped keys")
+
+def test_lru_and_batching():
+    print("\n--- Test: LRU Tier ---")
+    encode, calls = _encoder()
+    cache = EmbeddingCache(encode, "m", max_items=2, path=None)
+
+    vectors = cache.encode(["a", "bb", "a"])
+    assert vectors.shape == (3, 4) and vectors[0][0] == 1 and vectors[1][0] == 2
+    assert calls == [["a", "bb"]]  # one batch, duplicates encoded once
+
+    cache.encode(["bb"])
+    cache.encode(["ccc"])        # evicts "a" (least recently used)
+    cache.encode(["a"])
+    assert calls[-1] == ["a"]
+
+    stats = cache.stats()
+    print(f"Stats: {stats}")
+    assert stats["lookups"] == 6 and stats["hits_memory"] == 1 and stats["misses"] == 5
+    print("✅ Misses batched, hits served from LRU, bounded size")
+
+def test_disk_tier_survives_restart():
+    print("\n--- Test: Disk Tier ---")
+    path = os.path.join(tempfile.mkdtemp(), "emb.db")
+    encode, calls = _encoder()
+    EmbeddingCache(encode, "m", path=path).encode(["persist me", "and me"])
+
+    restarted = EmbeddingCache(encode, "m", path=path)
+    vectors = restarted.encode(["persist me", "new"])
+    assert vectors[0][0] == len("persist me")
+    assert calls[-1] == ["new"]
+    stats = restarted.stats()
+    assert stats["hits_disk"] == 1 and stats["encoder_seconds_saved"] >= 0
+    print("✅ Embeddings reloaded from SQLite after restart")
+
+def test_disk_tier_row_budget():
+    print("\n--- Test: Disk Tier Row Budget ---")
+    path = os.path.join(tempfile.mkdtemp(), "emb.db")
+    encode, _ = _encoder()
+    cache = EmbeddingCache(encode, "m", max_items=0, path=path, max_rows=10)
+    cache.encode([f"text {i}" for i in range(8)])
+    cache.seed(["text 0", "text 1"], np.ones((2, 4)))   # Replaced rows do not count twice
+    assert cache.stats()["disk_rows"] == 8
+
+    cache.encode([f"more {i}" for i in range(4)])        # 12 > 10: evict down to 9
+    counted = cache._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+    assert cache.stats()["disk_rows"] == counted == 9
+    assert EmbeddingCache(encode, "m", path=path).stats()["disk_rows"] == 9
+
+    cache.clear()
+    assert cache.stats()["disk_rows"] == 0
+    print("✅ Row count tracked in process, eviction keeps the disk tier bounded")
+
+def test_recall_reuses_query_embedding():
+    print("\n--- Test: Recall Uses Cache ---")
+    from memory import vector_store
+
+    # Recall result cache off, so every recall reaches the embedding cache
+    with MemoryStubNode(recall_cache=RecallCache(max_items=0)) as node:
+        vector_store.add_memory("COMPLETED GOAL: Launch the beta", {"memory_type": "knowledge"})
+        for _ in range(5):
+            assert vector_store.recall("Launch the beta", k=1)
+        vector_store.add_memory("COMPLETED GOAL: Launch the beta", {"memory_type": "knowledge"})
+
+    assert node.embedder.encode.call_count == 2  # one summary + one query, reused afterwards
+    assert node.embedding_cache.stats()["hit_rate"] > 0.7
+    print("✅ Repeated recall / re-ingestion skip the encoder")
+
+if __name__ == "__main__":
+    test_key_is_model_and_normalized_text()
+    test_lru_and_batching()
+    test_disk_tier_survives_restart()
+    test_disk_tier_row_budget()
+    test_recall_reuses_query_embedding()
@@ -0,0 +1,88 @@
+# test_hybrid_recall.py
+import sys
+import os
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from memory import vector_store
+from memory.lexical_index import BM25Index, tokenize, reciprocal_rank_fusion
+from tests.support.memory_stub import MemoryStubNode
+
+def test_tokenize_keeps_identifiers():
+    print("\n--- Test: Tokenizer ---")
+    terms = tokenize("Fix ImportError in memory/vector_store.py (HTTP-503)")
+    assert "memory/vector_store.py" in terms and "vector_store" in terms and "py" in terms
+    assert "http-503" in terms and "503" in terms and "importerror" in terms
+    print("✅ Compound identifiers indexed whole and by parts")
+
+def test_bm25_ranking_and_scope():
+    print("\n--- Test: BM25 Index ---")
+    index = BM25Index()
+    index.add("a", "Goal FAILED: timeout contacting payments API", {"org_id": 1, "memory_type": "mistake", "tags": "payments"})
+    index.add("b", "Goal COMPLETED: payments API migrated", {"org_id": 1, "memory_type": "strategy", "tags": "payments"})
+    index.add("c", "Quarterly report drafted", {"org_id": 2, "memory_type": "knowledge", "tags": "reports"})
+
+    assert [d for d, _ in index.search("FAILED payments")][0] == "a"
+    assert [d for d, _ in index.search("payments", memory_types=["strategy"])] == ["b"]
+    assert index.search("report", org_id=1) == []
+    assert [d for d, _ in index.search("report", tags=["Reports"])] == ["c"]
+
+    index.add("a", "Goal COMPLETED after retry", {"org_id": 1, "memory_type": "strategy"})
+    index.remove("c")
+    assert [d for d, _ in index.search("FAILED")] == []
+    assert index.search("report") == [] and len(index) == 2
+    print("✅ BM25 ranks, filters and updates incrementally")
+
+def test_rrf_fusion():
+    print("\n--- Test: Reciprocal Rank Fusion ---")
+    fused = reciprocal_rank_fusion([["x", "y", "z"], ["y", "w"]])
+    assert fused[0][0] == "y"
+    assert {d for d, _ in fused} == {"x", "y", "z", "w"}
+    print("✅ Ids ranked well by both retrievers come first")
+
+def test_hybrid_recall_finds_exact_identifiers():
+    print("\n--- Test: Hybrid Recall ---")
+    with MemoryStubNode():
+        vector_store.add_memories(
+            [(f"General note {i} about planning and prioritization", {"memory_type": "knowledge", "org_id": 1}) for i in range(30)]
+        )
+        vector_store.add_memories([
+            ("Task FAILED with KeyError 'goal_id' in brain/goal_engine.py", {"memory_type": "mistake", "org_id": 1}),
+            ("Task FAILED with KeyError 'goal_id' in brain/goal_engine.py", {"memory_type": "mistake", "org_id": 2}),
+        ])
+
+        found = vector_store.hybrid_recall("KeyError goal_engine.py", k=3, org_id=1)
+        other_org = vector_store.hybrid_recall("KeyError goal_engine.py", k=3, org_id=3)
+        hits = vector_store.ledger.stats["hits"]
+
+    assert found[0]["summary"].startswith("Task FAILED with KeyError")
+    assert sum(m["summary"].startswith("Task FAILED") for m in found) == 1
+    assert other_org == []
+    assert hits == 3
+    print("✅ Exact identifiers recalled through the lexical index, scoped by org")
+
+def test_lexical_index_rebuilt_on_load():
+    print("\n--- Test: Lexical Index Load ---")
+    node = MemoryStubNode()
+    collection = node.collection
+    collection.add(
+        ids=["legacy_1"], documents=["Deploy blocked by E1234 license check"],
+        embeddings=[np.random.rand(8).tolist()], metadatas=[{"memory_type": "knowledge"}]
+    )
+    with node:
+        found = vector_store.hybrid_recall("E1234", k=1)
+        vector_store.compact(1)
+        after = vector_store.lexical_index.search("E1234")
+
+    assert [m["summary"] for m in found] == ["Deploy blocked by E1234 license check"]
+    assert after == []
+    print("✅ Existing memories indexed on first load, evictions removed")
+
+if __name__ == "__main__":
+    test_tokenize_keeps_identifiers()
+    test_bm25_ranking_and_scope()
+    test_rrf_fusion()
+    test_hybrid_recall_finds_exact_identifiers()
+    test_lexical_index_rebuilt_on_load()
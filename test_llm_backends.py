@@ -0,0 +1,109 @@
+# test_llm_backends.py
+import sys
+import os
+import json
+import tempfile
+import time
+from unittest.mock import patch
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from brain.llm_backends import Cassette, FakeBackend, RecordingBackend, ReplayBackend, create_backend
+from brain.llm_client import LLMTransportError, OllamaClient, set_client
+from brain.ollama_stub import OllamaStubServer
+
+VALID_PLAN = json.dumps({
+    "goal": "Summarize errors",
+    "confidence": 0.9,
+    "steps": [{"step_id": 1, "action": "respond_user", "input": {"message": "done"}}]
+})
+
+def _plan_twice():
+    """Planner with one in-conversation retry, then a plain ask_llm call."""
+    from agents.planner import make_plan
+    from brain.model import ask_llm
+    plan = make_plan("Summarize the error logs", context="PAST LEARNINGS: none")
+    answer = ask_llm("Say hello")
+    return plan.model_dump(), answer
+
+def test_record_then_replay_offline():
+    print("\n--- Test: Record / Replay ---")
+    path = os.path.join(tempfile.mkdtemp(), "cassette.jsonl.gz")
+    replies = iter(["not json at all", VALID_PLAN, "hello there"])
+
+    with patch("brain.model.get_cached", return_value=None), patch("brain.model.set_cache"):
+        with OllamaStubServer(responder=lambda p: next(replies), delay=0.05) as stub:
+            recorder = RecordingBackend(OllamaClient(host=stub.url), path)
+            set_client(recorder)
+            try:
+                recorded = _plan_twice()
+            finally:
+                set_client(None)
+        assert recorder.stats["recorded"] == 3
+        assert len(Cassette(path)) == 3
+
+        # Server is gone: replay must serve the same conversation, retry included
+        replayer = ReplayBackend(path, latency_scale=1.0)
+        set_client(replayer)
+        try:
+            started = time.perf_counter()
+            replayed = _plan_twice()
+            elapsed = time.perf_counter() - started
+        finally:
+            set_client(None)
+
+    print(f"Replay stats: {replayer.stats}, elapsed {elapsed * 1000:.1f}ms")
+    assert replayed == recorded
+    assert replayer.stats["hits"] == 3 and replayer.stats["misses"] == 0
+    # Recorded latency simulated (3 calls x ~50ms server delay)
+    assert replayer.stats["model_seconds"] >= 0.15
+    assert elapsed >= 0.15
+    print("✅ Recorded run replayed without a model, timings preserved")
+
+def test_replay_miss():
+    print("\n--- Test: Cassette Miss ---")
+    path = os.path.join(tempfile.mkdtemp(), "empty.jsonl.gz")
+    try:
+        ReplayBackend(path).generate("unknown prompt")
+        assert False, "expected LLMTransportError"
+    except LLMTransportError:
+        pass
+    fallback = ReplayBackend(path, fallback=FakeBackend())
+    assert fallback.generate("unknown prompt")["response"]
+    assert fallback.stats["misses"] == 1
+    print("✅ Misses raise, or go to the fallback backend")
+
+def test_fake_backend_runs_pipeline():
+    print("\n--- Test: Fake Model Pipeline ---")
+    from brain.task_executor import run_atomic_task
+    from autonomy.task_decomposer import decompose_goal
+
+    backend = FakeBackend()
+    set_client(backend)
+    try:
+        with patch("brain.model.get_cached", return_value=None), patch("brain.model.set_cache"):
+            decomposition = decompose_goal("Prepare the quarterly reliability review")
+            result = run_atomic_task("Analyze deployment report")
+    finally:
+        set_client(None)
+
+    assert len(decomposition["tasks"]) == 3
+    assert result["success"] is True
+    assert result["memory_decision"]["decision"] in ("STORE", "SKIP")
+    assert backend.stats["requests"] >= 4  # plan, analyze_text, summarize, memory decision
+    print(f"✅ Schema-valid synthetic answers drive the full loop ({backend.stats['requests']} calls)")
+
+def test_factory():
+    assert isinstance(create_backend("fake"), FakeBackend)
+    try:
+        create_backend("nope")
+        assert False, "expected ValueError"
+    except ValueError:
+        pass
+    print("✅ LLM_BACKEND factory")
+
+if __name__ == "__main__":
+    test_record_then_replay_offline()
+    test_replay_miss()
+    test_fake_backend_runs_pipeline()
+    test_factory()
@@ -0,0 +1,103 @@
+# test_llm_cache.py
+import sys
+import os
+import json
+import time
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from brain.cache import LLMCache, _hash, cache_namespace
+
+def test_tiers_and_namespaces():
+    print("\n--- Test: Hot/Disk Tiers & Namespaces ---")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "cache.db")
+        cache = LLMCache(path=path, hot_size=2)
+
+        ns_v1 = cache_namespace("qwen2.5:7b", "v1")
+        ns_v2 = cache_namespace("qwen2.5:7b", "v2")
+        cache.set("plan this", "PLAN A", ns_v1)
+
+        assert cache.get("plan this", ns_v1) == "PLAN A"
+        # Same prompt, different template version / model -> miss
+        assert cache.get("plan this", ns_v2) is None
+        assert cache.get("plan this", cache_namespace("llama3", "v1")) is None
+
+        stats = cache.stats()
+        print(f"Stats: {stats}")
+        assert stats["hits_hot"] == 1 and stats["misses"] == 2
+        cache.close()
+
+        # Re-open: hot tier is empty, answer comes from SQLite
+        cache = LLMCache(path=path, hot_size=2)
+        assert cache.get("plan this", ns_v1) == "PLAN A"
+        assert cache.stats()["hits_disk"] == 1
+        cache.close()
+    print("✅ Tiers and namespaces behave")
+
+def test_lru_and_ttl_eviction():
+    print("\n--- Test: LRU & TTL Eviction ---")
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = LLMCache(path=os.path.join(tmp, "cache.db"), max_entries=10, hot_size=0)
+
+        for i in range(10):
+            cache.set(f"prompt {i}", f"answer {i}")
+        # Touch prompt 0 so it becomes most-recently-used
+        assert cache.get("prompt 0") == "answer 0"
+
+        cache.set("prompt 10", "answer 10")  # Over budget -> evict down to 90%
+        stats = cache.stats()
+        print(f"Stats: {stats}")
+        assert stats["entries"] <= 9
+        assert stats["evictions"] >= 2
+        assert cache.get("prompt 0") == "answer 0", "Recently used entry must survive"
+        assert cache.get("prompt 1") is None, "Least recently used entry must be evicted"
+
+        cache.set("short lived", "bye", ttl=1)
+        time.sleep(1.1)
+        assert cache.get("short lived") is None
+        assert cache.stats()["expired"] == 1
+
+        # Byte budget
+        small = LLMCache(path=os.path.join(tmp, "small.db"), max_bytes=100, hot_size=0)
+        for i in range(10):
+            small.set(f"p{i}", "x" * 30)
+        assert small.stats()["bytes"] <= 100
+        small.close()
+        cache.close()
+    print("✅ Budgets enforced")
+
+def test_legacy_migration():
+    print("\n--- Test: Legacy JSON Migration ---")
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy = os.path.join(tmp, "llm_cache")
+        os.makedirs(legacy)
+        with open(os.path.join(legacy, f"{_hash('old prompt')}.json"), "w") as f:
+            json.dump({"response": "old answer"}, f)
+        with open(os.path.join(legacy, "broken.json"), "w") as f:
+            f.write("{not json")
+
+        for i in range(300):
+            with open(os.path.join(legacy, f"{_hash(f'bulk {i}')}.json"), "w") as f:
+                json.dump({"response": f"answer {i}"}, f)
+
+        cache = LLMCache(path=os.path.join(tmp, "cache.db"))
+        statements = []
+        cache._conn.set_trace_callback(statements.append)
+        imported = cache.migrate_json(legacy, remove=True)
+        cache._conn.set_trace_callback(None)
+        assert imported == 301
+        assert cache.get("old prompt") == "old answer" and cache.get("bulk 299") == "answer 299"
+        assert cache.stats()["entries"] == 301
+        inserts = [i for i, sql in enumerate(statements) if sql.startswith("INSERT")]
+        assert statements.count("BEGIN") == 1 and statements.count("COMMIT") == 1
+        assert statements.index("BEGIN") < inserts[0] and inserts[-1] < statements.index("COMMIT")
+        assert os.listdir(legacy) == ["broken.json"]  # Unreadable files are left in place
+        cache.close()
+    print("✅ Legacy files imported under the default namespace, in one transaction")
+
+if __name__ == "__main__":
+    test_tiers_and_namespaces()
+    test_lru_and_ttl_eviction()
+    test_legacy_migration()
@@ -0,0 +1,101 @@
+# test_llm_client.py
+import sys
+import os
+from unittest.mock import patch
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from brain.llm_client import LLMBackend, OllamaClient, LLMTransportError, set_client
+from brain.ollama_stub import OllamaStubServer
+
+def test_connection_reuse():
+    print("\n--- Test: Pooled Keep-Alive Connections ---")
+
+    with OllamaStubServer() as stub:
+        client = OllamaClient(host=stub.url, model="stub-model")
+
+        for i in range(5):
+            result = client.generate(f"prompt {i}")
+            assert result["response"] == f"ECHO: prompt {i}"
+
+        print(f"Stats: {client.stats}")
+        # 5 sequential requests should ride on a single TCP connection
+        assert client.stats["connections_opened"] == 1
+        assert client.stats["connections_reused"] == 4
+        assert len(stub.client_addresses) == 1
+
+        # Model keep-alive is forwarded so Ollama keeps weights resident
+        payload = stub.requests[-1]["payload"]
+        assert payload["keep_alive"] == client.keep_alive
+        assert payload["stream"] is False
+
+        client.close()
+    print("✅ Single connection reused across calls")
+
+def test_transport_errors():
+    print("\n--- Test: Transport Errors ---")
+
+    def broken(payload):
+        raise RuntimeError("model crashed")
+
+    with OllamaStubServer(responder=broken) as stub:
+        client = OllamaClient(host=stub.url)
+        try:
+            client.generate("hello")
+            assert False, "HTTP 500 should raise"
+        except LLMTransportError as e:
+            print(f"Raised: {e}")
+            assert "500" in str(e)
+        client.close()
+
+    # Nothing listening -> connection error surfaces as LLMTransportError
+    client = OllamaClient(host="http://127.0.0.1:9", connect_timeout=0.5)
+    try:
+        client.list_models()
+        assert False, "Unreachable host should raise"
+    except LLMTransportError as e:
+        print(f"Raised: {e}")
+    print("✅ Errors surfaced as LLMTransportError")
+
+def test_ask_llm_uses_http():
+    print("\n--- Test: ask_llm / run_llm over HTTP ---")
+    from brain.model import ask_llm
+    from api.ollama_client import run_llm
+
+    with OllamaStubServer(responder=lambda p: '{"decision": "SKIP"}') as stub:
+        set_client(OllamaClient(host=stub.url))
+        try:
+            with patch("brain.model.get_cached", return_value=None), patch("brain.model.set_cache") as mock_set:
+                assert ask_llm("Should I store this?") == '{"decision": "SKIP"}'
+                assert mock_set.called
+            assert run_llm("hi") == '{"decision": "SKIP"}'
+            assert len(stub.client_addresses) == 1
+        finally:
+            set_client(None)
+    print("✅ Both call sites share the pooled client")
+
+def test_backends_checked_at_creation():
+    print("\n--- Test: Backend Interface ---")
+    from brain.llm_backends import FakeBackend, RecordingBackend, ReplayBackend
+    from brain.llm_pool import EndpointPool
+
+    class GenerateOnly(LLMBackend):
+        def generate(self, prompt, model=None, system=None, context=None, options=None):
+            return {"response": prompt}
+
+    try:
+        GenerateOnly()
+        assert False, "A backend without generate_stream / list_models must not be created"
+    except TypeError as e:
+        print(f"Raised: {e}")
+        assert "generate_stream" in str(e) and "list_models" in str(e)
+
+    for backend in (OllamaClient, EndpointPool, RecordingBackend, ReplayBackend, FakeBackend):
+        assert not backend.__abstractmethods__, backend
+    print("✅ Incomplete backends rejected when created, shipped backends complete")
+
+if __name__ == "__main__":
+    test_connection_reuse()
+    test_transport_errors()
+    test_ask_llm_uses_http()
+    test_backends_checked_at_creation()
@@ -0,0 +1,110 @@
+# test_llm_coalesce.py
+import sys
+import os
+import asyncio
+import threading
+from unittest.mock import patch
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from brain import metrics
+from brain.coalesce import SingleFlight
+from brain.llm_client import OllamaClient, set_client
+from brain.ollama_stub import OllamaStubServer
+
+def test_threaded_callers_share_one_generation():
+    print("\n--- Test: Threaded Single-Flight ---")
+    from brain.model import ask_llm
+
+    metrics.reset()
+    with OllamaStubServer(delay=0.3) as stub:
+        set_client(OllamaClient(host=stub.url))
+        results = []
+        try:
+            # Empty cache so every caller reaches the in-flight check
+            with patch("brain.model.get_cached", return_value=None), patch("brain.model.set_cache"):
+                threads = [
+                    threading.Thread(target=lambda: results.append(ask_llm("same planner prompt")))
+                    for _ in range(8)
+                ]
+                for t in threads:
+                    t.start()
+                for t in threads:
+                    t.join()
+        finally:
+            set_client(None)
+
+        generate_calls = [r for r in stub.requests if r["path"] == "/api/generate"]
+        print(f"Ollama calls: {len(generate_calls)}, metrics: {metrics.snapshot()}")
+        assert len(generate_calls) == 1
+        assert results == ["ECHO: same planner prompt"] * 8
+        assert metrics.get("llm.coalesced_waits") == 7
+    print("✅ 8 concurrent callers -> 1 generation")
+
+def test_async_and_thread_callers_coalesce():
+    print("\n--- Test: Async + Thread Single-Flight ---")
+    flight = SingleFlight("test")
+    calls = []
+    release = threading.Event()
+
+    def slow_generation():
+        calls.append(1)
+        release.wait(2)
+        return "answer"
+
+    async def leader():
+        return await flight.do_async("k", lambda: asyncio.to_thread(slow_generation))
+
+    async def scenario():
+        task = asyncio.create_task(leader())
+        await asyncio.sleep(0.05)
+        # A threaded caller and more async callers join the in-flight call
+        thread_result = asyncio.to_thread(flight.do, "k", slow_generation)
+        waiters = [flight.do_async("k", lambda: asyncio.to_thread(slow_generation)) for _ in range(3)]
+        gathered = asyncio.gather(task, thread_result, *waiters)
+        await asyncio.sleep(0.05)
+        release.set()
+        return await gathered
+
+    metrics.reset()
+    results = asyncio.run(scenario())
+    print(f"Results: {results}")
+    assert results == ["answer"] * 5
+    assert len(calls) == 1
+    assert metrics.get("test.coalesced_waits") == 4
+    assert flight.in_flight() == 0
+    print("✅ Mixed callers share one flight")
+
+def test_errors_propagate_to_waiters():
+    print("\n--- Test: Error Propagation ---")
+    flight = SingleFlight("test")
+    started = threading.Event()
+    errors = []
+
+    def failing():
+        started.set()
+        threading.Event().wait(0.2)
+        raise RuntimeError("ollama down")
+
+    def caller():
+        try:
+            flight.do("k", failing)
+        except RuntimeError as e:
+            errors.append(str(e))
+
+    leader = threading.Thread(target=caller)
+    leader.start()
+    started.wait(1)
+    follower = threading.Thread(target=caller)
+    follower.start()
+    leader.join()
+    follower.join()
+
+    assert errors == ["ollama down", "ollama down"]
+    assert flight.in_flight() == 0
+    print("✅ Waiters receive the leader's exception")
+
+if __name__ == "__main__":
+    test_threaded_callers_share_one_generation()
+    test_async_and_thread_callers_coalesce()
+    test_errors_propagate_to_waiters()
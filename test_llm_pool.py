@@ -0,0 +1,125 @@
+# test_llm_pool.py
+import sys
+import os
+import time
+import threading
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from brain.llm_client import LLMTransportError
+from brain.llm_pool import CircuitBreaker, EndpointPool, MIN_SAMPLES, MIN_TIMEOUT
+from brain.ollama_stub import OllamaStubServer
+
+def _generate_paths(stub):
+    return [r for r in stub.requests if r["path"] == "/api/generate"]
+
+def test_least_outstanding_routing():
+    print("\n--- Test: Least-Outstanding Routing ---")
+    with OllamaStubServer(delay=0.2) as a, OllamaStubServer(delay=0.2) as b:
+        pool = EndpointPool([a.url, b.url])
+        results = []
+        threads = [threading.Thread(target=lambda i=i: results.append(pool.generate(f"p{i}"))) for i in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        pool.close()
+
+        print(f"a={len(_generate_paths(a))} b={len(_generate_paths(b))}")
+        assert len(results) == 4
+        assert len(_generate_paths(a)) == 2 and len(_generate_paths(b)) == 2
+    print("✅ Concurrent calls spread across hosts")
+
+def test_failover_and_circuit_breaker():
+    print("\n--- Test: Failover + Circuit Breaker ---")
+    dead = OllamaStubServer().start()
+    dead_url = dead.url
+    dead.stop()  # Port now refuses connections
+
+    with OllamaStubServer() as alive:
+        pool = EndpointPool([dead_url, alive.url], failure_threshold=2, cooldown=0.3)
+        for i in range(6):
+            assert pool.generate(f"q{i}")["response"] == f"ECHO: q{i}"
+
+        stats = pool.stats
+        dead_stats = stats["endpoints"][0]
+        print(f"Pool stats: {stats}")
+        # Only the first two calls tried the dead host before its circuit opened
+        assert dead_stats["failures"] == 2
+        assert dead_stats["state"] == "open"
+        assert stats["failovers"] == 2
+
+        # After the cooldown exactly one probe goes to the dead host, which re-opens it
+        time.sleep(0.35)
+        pool.generate("probe")
+        assert pool.stats["endpoints"][0]["failures"] == 3
+        assert pool.stats["endpoints"][0]["state"] == "open"
+        pool.close()
+    print("✅ Calls fail over, breaker opens and half-open probe re-trips")
+
+def test_health_check_recovers_endpoint():
+    print("\n--- Test: Health Check ---")
+    with OllamaStubServer() as a, OllamaStubServer() as b:
+        pool = EndpointPool([a.url, b.url], cooldown=60)
+        pool.endpoints[0].breaker.trip()
+        assert not pool.endpoints[0].breaker.available()
+        pool.check_health()
+        assert pool.endpoints[0].breaker.state == CircuitBreaker.CLOSED
+        pool.close()
+
+    pool = EndpointPool([a.url])  # servers are stopped now
+    pool.check_health()
+    assert pool.endpoints[0].breaker.state == CircuitBreaker.OPEN
+    try:
+        pool.generate("x")
+        assert False, "expected LLMTransportError"
+    except LLMTransportError:
+        pass
+    pool.close()
+    print("✅ Pings open dead hosts and close recovered ones")
+
+def test_adaptive_timeout():
+    print("\n--- Test: Adaptive Timeout ---")
+    pool = EndpointPool(["http://127.0.0.1:9"], timeout=120)
+    ep = pool.endpoints[0]
+    assert ep.timeout() == 120  # not enough samples yet
+    ep.latencies.extend([1.0] * (MIN_SAMPLES - 1) + [10.0])
+    assert ep.p95() == 10.0
+    assert ep.timeout() == 40.0
+    ep.latencies.clear()
+    ep.latencies.extend([0.5] * MIN_SAMPLES)
+    assert ep.timeout() == MIN_TIMEOUT
+    pool.close()
+    print("✅ Timeout follows p95 within bounds")
+
+def test_hedged_request():
+    print("\n--- Test: Hedging ---")
+    with OllamaStubServer(delay=1.0, token_delay=0.01, responder=lambda p: "slow " * 200) as slow, \
+         OllamaStubServer(responder=lambda p: "fast answer") as fast:
+        pool = EndpointPool([slow.url, fast.url], hedge=True, hedge_after=0.05)
+
+        started = time.perf_counter()
+        result = pool.generate("hello")
+        elapsed = time.perf_counter() - started
+        print(f"Hedged answer in {elapsed * 1000:.0f}ms: {result['response']!r}")
+
+        assert result["response"] == "fast answer"
+        assert elapsed < 0.8
+        assert pool.stats["hedges"] == 1
+        assert pool.stats["endpoints"][1]["hedges_won"] == 1
+
+        # The losing request on the slow host is cancelled once it starts answering
+        deadline = time.time() + 3
+        while slow.cancelled == 0 and time.time() < deadline:
+            time.sleep(0.05)
+        assert slow.cancelled == 1
+        assert pool.stats["endpoints"][0]["outstanding"] == 0
+        pool.close()
+    print("✅ Slow call re-issued to a second host, loser cancelled")
+
+if __name__ == "__main__":
+    test_least_outstanding_routing()
+    test_failover_and_circuit_breaker()
+    test_health_check_recovers_endpoint()
+    test_adaptive_timeout()
+    test_hedged_request()
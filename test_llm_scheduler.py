@@ -0,0 +1,138 @@
+# test_llm_scheduler.py
+import sys
+import os
+import asyncio
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from brain.scheduler import PriorityGate, llm_lane, current_lane
+
+def test_interactive_overtakes_background():
+    print("\n--- Test: Priority Lanes (threads) ---")
+    gate = PriorityGate(max_concurrency=1)
+    order = []
+    hold = threading.Event()
+
+    def worker(lane, name):
+        with gate.slot(lane):
+            order.append(name)
+
+    def holder():
+        with gate.slot("background"):
+            hold.wait(2)
+
+    h = threading.Thread(target=holder)
+    h.start()
+    time.sleep(0.05)
+
+    # A burst of background work queues first...
+    threads = [threading.Thread(target=worker, args=("background", f"bg{i}")) for i in range(3)]
+    for t in threads:
+        t.start()
+    time.sleep(0.05)
+    # ...then an interactive request arrives
+    interactive = threading.Thread(target=worker, args=("interactive", "query"))
+    interactive.start()
+    time.sleep(0.05)
+
+    stats = gate.stats()
+    print(f"Stats while saturated: {stats}")
+    assert stats["lanes"]["background"]["queued"] == 3
+    assert stats["lanes"]["interactive"]["queued"] == 1
+
+    hold.set()
+    for t in threads + [interactive, h]:
+        t.join()
+
+    print(f"Admission order: {order}")
+    assert order[0] == "query", "Interactive request must be admitted before queued background work"
+    stats = gate.stats()
+    assert stats["active"] == 0
+    assert stats["lanes"]["interactive"]["max_wait_ms"] > 0
+    print("✅ Interactive lane served first")
+
+def test_async_slots_and_cancellation():
+    print("\n--- Test: Async Slots & Cancellation ---")
+    gate = PriorityGate(max_concurrency=2)
+    peak = {"now": 0, "max": 0}
+
+    async def call(lane):
+        async with gate.slot_async(lane):
+            peak["now"] += 1
+            peak["max"] = max(peak["max"], peak["now"])
+            await asyncio.sleep(0.02)
+            peak["now"] -= 1
+
+    async def scenario():
+        await asyncio.gather(*[call("background") for _ in range(6)], *[call("interactive") for _ in range(2)])
+
+        # A queued waiter that gets cancelled must not leak a slot
+        async with gate.slot_async("goal"):
+            async with gate.slot_async("goal"):
+                pending = asyncio.create_task(call("background"))
+                await asyncio.sleep(0.01)
+                pending.cancel()
+        try:
+            await pending
+        except asyncio.CancelledError:
+            pass
+
+    asyncio.run(scenario())
+    stats = gate.stats()
+    print(f"Peak concurrency: {peak['max']}, stats: {stats}")
+    assert peak["max"] == 2
+    assert stats["active"] == 0
+    assert all(l["queued"] == 0 for l in stats["lanes"].values())
+    print("✅ Concurrency bounded, cancellation clean")
+
+def test_lane_context():
+    print("\n--- Test: Lane Context ---")
+    assert current_lane() == "goal"
+
+    async def inner():
+        return await asyncio.to_thread(current_lane)
+
+    async def scenario():
+        with llm_lane("background"):
+            return await inner()
+
+    assert asyncio.run(scenario()) == "background", "to_thread workers inherit the lane"
+    assert current_lane() == "goal"
+    print("✅ Lane propagates into worker threads")
+
+def test_async_calls_match_sync_calls():
+    print("\n--- Test: ask_llm_async Token Sink & Early Stop ---")
+    from brain.llm_client import OllamaClient, set_client
+    from brain.model import ask_llm_async, set_token_sink
+    from brain.ollama_stub import OllamaStubServer
+    from brain.structured import JSONObjectExtractor
+
+    answer = '{"ok": true} ' + " ".join(["chatter"] * 200)
+    seen = []
+
+    async def ask():
+        with llm_lane("background"):
+            return await ask_llm_async("json please", stop_when=JSONObjectExtractor, use_cache=False)
+
+    with OllamaStubServer(responder=lambda p: answer, token_delay=0.002) as stub:
+        set_client(OllamaClient(host=stub.url))
+        set_token_sink(lambda token, lane: seen.append((token, lane)))
+        try:
+            output = asyncio.run(ask())
+        finally:
+            set_token_sink(None)
+            set_client(None)
+
+    print(f"Generated {len(output.split())} words instead of {len(answer.split())}")
+    assert output.startswith('{"ok": true}') and output.count("chatter") < 10
+    assert "".join(t for t, _ in seen).strip() == output
+    assert {lane for _, lane in seen} == {"background"}
+    print("✅ Async calls feed the token sink in their lane and honour stop_when")
+
+if __name__ == "__main__":
+    test_interactive_overtakes_background()
+    test_async_slots_and_cancellation()
+    test_lane_context()
+    test_async_calls_match_sync_calls()
@@ -0,0 +1,180 @@
+# test_llm_streaming.py
+import sys
+import os
+import time
+import asyncio
+from unittest.mock import patch
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from brain.llm_client import OllamaClient, set_client
+from brain.ollama_stub import OllamaStubServer
+
+ANSWER = "first principles means reasoning from fundamental truths upward"
+
+def _wait_for(predicate, timeout=2.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.02)
+    return False
+
+def test_stream_chunks_and_reuse():
+    print("\n--- Test: Streaming Chunks ---")
+    with OllamaStubServer(responder=lambda p: ANSWER) as stub:
+        client = OllamaClient(host=stub.url)
+        stream = client.generate_stream("explain")
+        tokens = [c["response"] for c in stream if not c.get("done")]
+        print(f"Tokens: {tokens}")
+        assert len(tokens) > 1
+        assert "".join(tokens) == ANSWER
+        assert stream.final.get("eval_count") == len(tokens)
+
+        # Fully drained stream hands its socket back to the pool
+        client.generate("again")
+        assert client.stats["connections_opened"] == 1
+        client.close()
+    print("✅ Tokens streamed, connection reused")
+
+def test_early_close_cancels_upstream():
+    print("\n--- Test: Cancel on Disconnect ---")
+    from brain.model import stream_llm, stream_llm_async
+
+    with OllamaStubServer(responder=lambda p: ANSWER * 20, token_delay=0.01) as stub:
+        set_client(OllamaClient(host=stub.url))
+        try:
+            with patch("brain.model.get_cached", return_value=None), patch("brain.model.set_cache") as mock_set:
+                # Sync consumer stops after two tokens
+                gen = stream_llm("long answer")
+                received = [next(gen), next(gen)]
+                gen.close()
+                assert _wait_for(lambda: stub.cancelled == 1), "Upstream generation should be aborted"
+
+                # Async consumer (SSE / WebSocket handler) stops after two tokens
+                async def consume():
+                    agen = stream_llm_async("long answer async")
+                    got = [await agen.__anext__(), await agen.__anext__()]
+                    await agen.aclose()
+                    return got
+
+                received += asyncio.run(consume())
+                assert _wait_for(lambda: stub.cancelled == 2)
+                assert not mock_set.called, "Partial answers must not be cached"
+        finally:
+            set_client(None)
+        print(f"Received before disconnect: {received}")
+    print("✅ Abandoned streams stop generation")
+
+def test_sse_endpoint_and_token_sink():
+    print("\n--- Test: SSE /query/stream & Token Sink ---")
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from api.routes import router
+    from brain.model import ask_llm, set_token_sink
+
+    app = FastAPI()
+    app.include_router(router)
+
+    with OllamaStubServer(responder=lambda p: ANSWER) as stub:
+        set_client(OllamaClient(host=stub.url))
+        try:
+            with patch("brain.model.get_cached", return_value=None), patch("brain.model.set_cache"):
+                with TestClient(app) as http:
+                    resp = http.post("/query/stream", json={"input": "explain"})
+                    assert resp.headers["content-type"].startswith("text/event-stream")
+                    events = [e for e in resp.text.split("\n\n") if e]
+                    print(f"SSE events: {len(events)}")
+                    assert events[0].startswith("event: token")
+                    assert events[-1].startswith("event: done")
+
+                # Agent calls forward their tokens to the registered sink
+                seen = []
+                set_token_sink(lambda token, lane: seen.append((token, lane)))
+                try:
+                    assert ask_llm("planner prompt") == ANSWER
+                finally:
+                    set_token_sink(None)
+                assert "".join(t for t, _ in seen) == ANSWER
+                assert seen[0][1] == "goal"
+        finally:
+            set_client(None)
+    print("✅ SSE and log forwarding stream tokens")
+
+def test_interactive_queries_bypass_cache():
+    print("\n--- Test: Interactive Queries Skip The Response Cache ---")
+    from api.ollama_client import run_llm_async, stream_llm_interactive
+
+    async def ask_twice():
+        answers = [await run_llm_async("same question") for _ in range(2)]
+        streamed = "".join([token async for token in stream_llm_interactive("same question")])
+        return answers, streamed
+
+    with OllamaStubServer(responder=lambda p: ANSWER) as stub:
+        set_client(OllamaClient(host=stub.url))
+        try:
+            with patch("brain.model.get_cached", return_value="stale answer") as mock_get, \
+                 patch("brain.model.set_cache") as mock_set:
+                answers, streamed = asyncio.run(ask_twice())
+        finally:
+            set_client(None)
+        generations = len(stub.requests)
+
+    assert answers == [ANSWER, ANSWER] and streamed == ANSWER
+    assert generations == 3
+    assert not mock_get.called and not mock_set.called
+    print("✅ /query and streams generate every time, nothing is cached")
+
+def test_websocket_disconnect_closes_stream():
+    print("\n--- Test: /ws/query Closed Socket ---")
+    from starlette.websockets import WebSocketDisconnect, WebSocketState
+    from api import server
+
+    closed = []
+
+    async def tokens(prompt):
+        try:
+            for token in ANSWER.split():
+                yield token
+        finally:
+            closed.append(prompt)
+
+    class ClosingSocket:
+        # The client goes away after two tokens: the next send raises like Starlette's does
+        client_state = application_state = WebSocketState.CONNECTED
+
+        def __init__(self):
+            self.sent = []
+
+        async def accept(self):
+            pass
+
+        async def receive_json(self):
+            if self.sent:
+                raise WebSocketDisconnect()
+            return {"input": "explain"}
+
+        async def send_json(self, message):
+            if len(self.sent) == 2:
+                self.application_state = WebSocketState.DISCONNECTED
+                raise RuntimeError('Cannot call "send" once a close message has been sent.')
+            self.sent.append(message)
+
+    async def handle():
+        socket = ClosingSocket()
+        await server.websocket_query(socket)
+        return socket.sent, list(closed)  # Before the loop gets a chance to finalize anything
+
+    with patch("api.server.stream_llm_interactive", tokens):
+        sent, closed_on_return = asyncio.run(handle())
+
+    assert [m["data"] for m in sent] == ANSWER.split()[:2]
+    assert closed_on_return == ["explain"]
+    print("✅ Send on a closed socket ends the handler and closes the token stream at once")
+
+if __name__ == "__main__":
+    test_stream_chunks_and_reuse()
+    test_early_close_cancels_upstream()
+    test_sse_endpoint_and_token_sink()
+    test_interactive_queries_bypass_cache()
+    test_websocket_disconnect_closes_stream()
@@ -0,0 +1,123 @@
+# test_llm_usage.py
+import sys
+import contextvars
+import os
+import tempfile
+import threading
+import time
+from unittest.mock import patch
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.orm import sessionmaker
+
+from brain.usage import UsageSink, usage_tags, current_tags, usage_summary
+from brain.llm_backends import FakeBackend
+from brain.llm_client import set_client
+
+def _temp_db():
+    path = os.path.join(tempfile.mkdtemp(), "usage.db")
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    return engine, sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def test_usage_tags_nest_and_decorate():
+    print("\n--- Test: Usage Tags ---")
+
+    @usage_tags(call_site="planner")
+    def site():
+        return dict(current_tags())
+
+    with usage_tags(goal_id=7, org_id=None):
+        assert site() == {"goal_id": 7, "call_site": "planner"}
+        assert current_tags() == {"goal_id": 7}
+    assert current_tags() == {}
+    print("✅ Tags nest, skip None and reset on exit")
+
+def test_sink_batches_and_migrates_old_table():
+    print("\n--- Test: Batched Usage Sink ---")
+    engine, Session = _temp_db()
+    # Pre-existing usage_logs table without the per-call columns
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE usage_logs (id INTEGER PRIMARY KEY, user_id VARCHAR, action VARCHAR, "
+            "tokens INTEGER, cost FLOAT, timestamp DATETIME)"
+        ))
+
+    sink = UsageSink(batch_size=10, flush_interval=60, max_pending=25)
+    with patch("api.database.engine", engine), patch("api.database.SessionLocal", Session):
+        started = time.perf_counter()
+        for i in range(30):
+            sink.record({"action": "llm_call", "call_site": "planner", "prompt_tokens": i})
+        record_ms = (time.perf_counter() - started) * 1000
+        assert sink.stats["dropped"] == 5  # bounded buffer, oldest dropped
+
+        # The background thread was woken by a full batch
+        deadline = time.time() + 3
+        while sink.stats["written"] == 0 and time.time() < deadline:
+            time.sleep(0.02)
+        sink.flush()
+
+    columns = {c["name"] for c in inspect(engine).get_columns("usage_logs")}
+    assert {"call_site", "lane", "latency_ms", "cache_outcome"} <= columns
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM usage_logs")).scalar() == 25
+    print(f"Stats: {sink.stats}, record() for 30 rows took {record_ms:.2f}ms")
+    assert sink.stats["written"] == 25 and sink.stats["batches"] >= 3
+    print("✅ Rows buffered, batch-inserted off-thread, table migrated")
+
+def test_llm_calls_accounted_per_call_site():
+    print("\n--- Test: Per-Call-Site Accounting ---")
+    from brain import model
+
+    engine, Session = _temp_db()
+    store = {}
+    sink = UsageSink(batch_size=1000, flush_interval=60)
+    backend = FakeBackend(latency=0.1)
+    set_client(backend)
+    try:
+        with patch("api.database.engine", engine), patch("api.database.SessionLocal", Session), \
+             patch("brain.usage.sink", sink), \
+             patch("brain.model.get_cached", side_effect=lambda p, ns=None: store.get((ns, p))), \
+             patch("brain.model.set_cache", side_effect=lambda p, r, ns=None, ttl=None: store.__setitem__((ns, p), r)):
+            with usage_tags(call_site="actions.summarize", goal_id=3, org_id=2):
+                # Two concurrent identical prompts: one generation, one coalesced follower
+                threads = [
+                    threading.Thread(target=contextvars.copy_context().run, args=(model.ask_llm, "Summarize the following text: abc"))
+                    for _ in range(2)
+                ]
+                for t in threads:
+                    t.start()
+                for t in threads:
+                    t.join()
+                model.ask_llm("Summarize the following text: abc")  # exact cache hit
+
+            with usage_tags(call_site="critic"):
+                model.ask_llm("Critique this answer")
+
+            db = Session()
+            try:
+                by_site = {r["call_site"]: r for r in usage_summary(db, group_by="call_site")}
+                by_outcome = {r["cache_outcome"]: r for r in usage_summary(db, group_by="cache_outcome")}
+                by_goal = {r["goal_id"]: r for r in usage_summary(db, group_by="goal_id")}
+            finally:
+                db.close()
+    finally:
+        set_client(None)
+
+    print(f"By call site: {by_site}")
+    assert backend.stats["requests"] == 2
+    summarize = by_site["actions.summarize"]
+    assert summarize["calls"] == 3
+    assert abs(summarize["cache_hit_rate"] - 2 / 3) < 0.01
+    assert summarize["prompt_tokens"] > 0 and summarize["completion_tokens"] > 0
+    assert summarize["gpu_seconds"] >= 0.1
+    assert by_site["critic"]["calls"] == 1
+    assert set(by_outcome) == {"miss", "coalesced", "hit"}
+    assert by_goal[3]["calls"] == 3
+    print("✅ Calls tagged by site/goal with tokens, latency and cache outcome")
+
+if __name__ == "__main__":
+    test_usage_tags_nest_and_decorate()
+    test_sink_batches_and_migrates_old_table()
+    test_llm_calls_accounted_per_call_site()
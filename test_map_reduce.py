@@ -0,0 +1,120 @@
+# test_map_reduce.py
+import sys
+import os
+import json
+import threading
+import time
+from unittest.mock import patch
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from brain.chunking import split_text, map_concurrent
+from brain.llm_backends import FakeBackend
+from brain.llm_client import set_client
+
+def _document(sections=12, words=120, edit=None):
+    parts = []
+    for i in range(sections):
+        body = " ".join(f"word{i}_{j}." if j % 15 == 14 else f"word{i}_{j}" for j in range(words))
+        if i == edit:
+            body += " An inserted sentence changes this section."
+        parts.append(f"## Section {i}\n\n{body}")
+    return "\n\n".join(parts)
+
+def test_structure_aware_split():
+    print("\n--- Test: Structure-Aware Split ---")
+    doc = _document()
+    chunks = split_text(doc, max_chars=3000)
+    print(f"{len(doc)} chars -> {len(chunks)} chunks: {[len(c) for c in chunks]}")
+    assert len(chunks) > 1
+    assert all(len(c) <= 3000 for c in chunks)
+    # Chunks start on section headings, never mid-section
+    assert all(c.startswith("## Section") for c in chunks)
+
+    # One long paragraph with no structure still splits, on sentences
+    sentence_chunks = split_text("This is a sentence. " * 500, max_chars=1000)
+    assert all(len(c) <= 1000 and c.rstrip().endswith(".") for c in sentence_chunks)
+
+    # An edit in one section leaves most chunks byte-identical
+    edited = split_text(_document(edit=7), max_chars=3000)
+    unchanged = len(set(chunks) & set(edited))
+    print(f"Chunks unchanged after edit: {unchanged}/{len(edited)}")
+    assert unchanged >= len(edited) - 2
+    print("✅ Content-defined, structure-aware chunks")
+
+def test_map_concurrent_respects_limit_and_lane():
+    print("\n--- Test: Concurrent Map ---")
+    from brain.scheduler import current_lane, llm_lane
+
+    active, peak, lanes = [0], [0], []
+    lock = threading.Lock()
+
+    def work(x):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+            lanes.append(current_lane())
+        time.sleep(0.02)
+        with lock:
+            active[0] -= 1
+        return x * 2
+
+    with patch("brain.chunking.LLM_MAX_CONCURRENCY", 3), llm_lane("background"):
+        assert map_concurrent(work, list(range(9))) == [x * 2 for x in range(9)]
+    assert peak[0] == 3
+    assert set(lanes) == {"background"}
+    print("✅ Order kept, concurrency bounded, lane propagated")
+
+def test_map_reduce_actions_with_chunk_cache():
+    print("\n--- Test: Map-Reduce Actions ---")
+    from autonomy.actions import analyze_text, summarize
+
+    store = {}
+    backend = FakeBackend()
+    set_client(backend)
+    try:
+        with patch("brain.model.get_cached", side_effect=lambda p, ns=None: store.get((ns, p))), \
+             patch("brain.model.set_cache", side_effect=lambda p, r, ns=None, ttl=None: store.__setitem__((ns, p), r)), \
+             patch("autonomy.actions.split_text", side_effect=lambda t: split_text(t, max_chars=3000)):
+            result = summarize(_document())
+            first_calls = backend.stats["requests"]
+            assert result["status"] == "success" and result["output"]["summary"]
+
+            # Re-read with one section edited: only changed chunks (+ reduce) hit the model
+            summarize(_document(edit=7))
+            recomputed = backend.stats["requests"] - first_calls
+            print(f"First read: {first_calls} calls, after edit: {recomputed} calls")
+            assert recomputed <= 3
+
+            analysis = analyze_text(_document())
+            assert analysis["status"] == "success"
+            assert set(analysis["output"]) == {"key_points", "themes", "risks"}
+    finally:
+        set_client(None)
+    print("✅ Chunks summarized/analyzed, reduced, and reused after an edit")
+
+def test_analysis_reduce_falls_back_to_merge():
+    print("\n--- Test: Analysis Reduce Fallback ---")
+    from autonomy import actions
+
+    def fake_llm(prompt, **kwargs):
+        if "PARTIAL ANALYSES" in prompt:
+            return "I could not merge these."
+        n = prompt.count("word")
+        return json.dumps({"key_points": [f"point {n}", "shared point"], "themes": ["ops"], "risks": []})
+
+    with patch("autonomy.actions.ask_llm", side_effect=fake_llm), \
+         patch("autonomy.actions.split_text", side_effect=lambda t: split_text(t, max_chars=3000)):
+        result = actions.analyze_text(_document())
+
+    assert result["status"] == "success"
+    points = result["output"]["key_points"]
+    assert points.count("shared point") == 1 and len(points) > 2
+    assert result["output"]["themes"] == ["ops"]
+    print("✅ Deterministic union used when the reduce prompt fails")
+
+if __name__ == "__main__":
+    test_structure_aware_split()
+    test_map_concurrent_respects_limit_and_lane()
+    test_map_reduce_actions_with_chunk_cache()
+    test_analysis_reduce_falls_back_to_merge()
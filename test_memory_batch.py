@@ -0,0 +1,83 @@
+# test_memory_batch.py
+import sys
+import os
+import threading
+import time
+from unittest.mock import patch
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from tests.support.memory_stub import MemoryStubNode
+from memory.vector_store import MemoryWriteBuffer, add_memories, add_memory
+
+def test_add_memories_single_encode_and_insert():
+    print("\n--- Test: Batched Ingestion ---")
+    items = [(f"Memory number {i}", {"memory_type": "knowledge", "tags": ["bulk", "test"]}) for i in range(50)]
+    items.append(("   ", {"memory_type": "knowledge"}))
+
+    with MemoryStubNode() as node:
+        stored = add_memories(items)
+
+    assert stored == 50
+    assert node.collection.count() == 50
+    assert node.embedder.encode.call_count == 1  # one batched forward pass
+    meta = node.collection.get(limit=1)["metadatas"][0]
+    assert meta["tags"] == "bulk,test" and "timestamp" in meta
+    print("✅ 50 memories: one encode call, one insert, unique ids")
+
+def test_add_memories_respects_budget():
+    print("\n--- Test: Batch Budget ---")
+    with MemoryStubNode(EVICTION_MODE="delete", MEMORY_BUDGET=10) as node:
+        assert add_memories([(f"m{i}", {}) for i in range(8)]) == 8
+        # Over budget: older memories are evicted, new ones are always stored
+        assert add_memories([(f"n{i}", {}) for i in range(8)]) == 8
+        assert add_memories([(f"o{i}", {}) for i in range(12)]) == 10
+    assert node.collection.count() == 10
+    print("✅ Budget enforced by eviction, oversized batch truncated")
+
+def test_write_buffer_flushes_on_size_and_time():
+    print("\n--- Test: Write Buffer ---")
+    buffer = MemoryWriteBuffer(max_items=5, flush_interval=0.2)
+
+    with MemoryStubNode(write_buffer=buffer) as node:
+        collection = node.collection
+        for i in range(7):
+            add_memory(f"buffered {i}", {"memory_type": "knowledge"}, buffered=True)
+        # Size trigger wrote the first 5 in one batch; 2 wait for the timer
+        assert collection.count() == 5 and len(buffer) == 2
+
+        deadline = time.time() + 3
+        while collection.count() < 7 and time.time() < deadline:
+            time.sleep(0.05)
+
+    assert collection.count() == 7
+    assert node.embedder.encode.call_count == 2
+    print("✅ Buffered writes flushed by size, then by time")
+
+def test_concurrent_batches_get_distinct_ids():
+    print("\n--- Test: Concurrent Batch Ids ---")
+    with MemoryStubNode() as node:
+        collection, ledger, lexical = node.collection, node.ledger, node.lexical_index
+        # Writer threads (write buffer, task executor) storing batches at the same moment
+        threads = [threading.Thread(target=add_memories, args=([(f"t{n} m{i}", {}) for i in range(20)],))
+                   for n in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        concurrent = (collection.count(), ledger.count(), len(lexical))
+
+        # Fresh uuid ids need no lookup: a write is a single insert, no store read in the lock
+        with patch.object(collection, "get", side_effect=AssertionError("store read on write")):
+            stored = add_memories([("one more", {})])
+        after = (collection.count(), ledger.count(), len(lexical))
+
+    assert concurrent == (80, 80, 80)
+    assert stored == 1 and after == (81, 81, 81)
+    print("✅ 4 concurrent batches stored 80 distinct ids; store, ledger and BM25 index agree")
+
+if __name__ == "__main__":
+    test_add_memories_single_encode_and_insert()
+    test_add_memories_respects_budget()
+    test_write_buffer_flushes_on_size_and_time()
+    test_concurrent_batches_get_distinct_ids()
@@ -0,0 +1,98 @@
+# test_memory_retention.py
+import sys
+import os
+import json
+import tempfile
+import time
+from datetime import datetime, timedelta
+from unittest.mock import patch, MagicMock
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from memory import vector_store
+from memory.retention import memory_value
+from tests.support.memory_stub import MemoryStubNode
+
+def _entry(type_="knowledge", score=0.5, age_days=0.0, hits=0):
+    return {"created": time.time() - age_days * 86400, "score": score, "type": type_, "hits": hits, "last_hit": 0.0}
+
+def test_memory_value_ordering():
+    print("\n--- Test: Retention Value ---")
+    assert memory_value(_entry("strategy")) > memory_value(_entry("knowledge"))
+    assert memory_value(_entry(score=1.0)) > memory_value(_entry(score=0.2))
+    assert memory_value(_entry(age_days=1)) > memory_value(_entry(age_days=90))
+    assert memory_value(_entry(age_days=90, hits=20)) > memory_value(_entry(age_days=90))
+    print("✅ Type, verdict score, recency and recall hits all raise value")
+
+def test_budget_evicts_lowest_value_and_archives():
+    print("\n--- Test: Budget Eviction ---")
+    node = MemoryStubNode(MEMORY_BUDGET=10, EVICTION_MODE="archive")
+    collection = node.collection
+    archive = os.path.join(tempfile.mkdtemp(), "archive.jsonl")
+    old = (datetime.now() - timedelta(days=120)).isoformat()
+
+    with node, patch("memory.retention.ARCHIVE_PATH", archive):
+        # Pre-existing memories: 4 stale low-score facts, 6 useful strategies
+        collection.add(
+            ids=[f"old_{i}" for i in range(4)] + [f"strat_{i}" for i in range(6)],
+            documents=[f"stale fact {i}" for i in range(4)] + [f"strategy {i}" for i in range(6)],
+            embeddings=np.random.rand(10, 8).tolist(),
+            metadatas=[{"memory_type": "knowledge", "score": 0.1, "timestamp": old}] * 4
+                      + [{"memory_type": "strategy", "score": 1.0, "timestamp": datetime.now().isoformat()}] * 6
+        )
+
+        count_spy = MagicMock(wraps=collection.count)
+        with patch.object(collection, "count", count_spy):
+            stored = vector_store.add_memories([(f"new {i}", {"memory_type": "knowledge", "score": 0.9}) for i in range(3)])
+            vector_store.recall("strategy", k=2)
+        assert count_spy.call_count == 0  # ledger answers counts
+
+        stats = vector_store.retention_stats()
+
+    assert stored == 3
+    remaining = set(collection.get()["ids"])
+    print(f"Remaining: {sorted(remaining)}, stats: {stats}")
+    assert collection.count() == 9  # compacted to 90% of budget
+    assert not any(i.startswith("old_") for i in remaining)
+    assert all(f"strat_{i}" in remaining for i in range(6))
+    with open(archive) as f:
+        archived = [json.loads(line) for line in f]
+    assert {a["id"] for a in archived} == {f"old_{i}" for i in range(4)}
+    assert stats["evicted"] == 4 and stats["count"] == 9 and stats["hits"] == 2
+    print("✅ Lowest-value memories archived and evicted, new memories kept")
+
+def test_untimed_memories_evicted_first_and_hits_saved():
+    print("\n--- Test: Legacy Timestamps & Saved Hits ---")
+    from memory.retention import MemoryLedger
+
+    node = MemoryStubNode(MEMORY_BUDGET=100, EVICTION_MODE="delete")
+    collection = node.collection
+    now = datetime.now().isoformat()
+    with node:
+        collection.add(
+            ids=["legacy", "bad_time", "fresh", "recalled"],
+            documents=["legacy fact", "fact with a broken date", "fresh fact", "recalled fact"],
+            embeddings=np.random.rand(4, 8).tolist(),
+            metadatas=[{"memory_type": "knowledge", "score": 0.5},
+                       {"memory_type": "knowledge", "score": 0.5, "timestamp": "last tuesday"},
+                       {"memory_type": "knowledge", "score": 0.5, "timestamp": now},
+                       {"memory_type": "knowledge", "score": 0.5, "timestamp": now}]
+        )
+        node.ledger.sync(collection)
+        node.ledger.record_hits(["recalled", "recalled", "recalled"])
+        evicted = vector_store.compact(2)   # Saves the pending hits first
+        remaining = set(collection.get()["ids"])
+        saved = collection.get(ids=["recalled"])["metadatas"][0]
+
+    restarted = MemoryLedger().sync(collection)
+    assert evicted == 2 and remaining == {"fresh", "recalled"}
+    assert saved["hits"] == 3 and saved["timestamp"] == now  # Hits merged into the metadata
+    assert restarted.hits("recalled") == 3
+    print("✅ Memories without a valid timestamp go first; recall hits survive a restart")
+
+if __name__ == "__main__":
+    test_memory_value_ordering()
+    test_budget_evicts_lowest_value_and_archives()
+    test_untimed_memories_evicted_first_and_hits_saved()
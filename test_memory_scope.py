@@ -0,0 +1,69 @@
+# test_memory_scope.py
+import sys
+import os
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from memory import vector_store
+from tests.support.memory_stub import MemoryStubNode
+
+def test_filter_clause():
+    print("\n--- Test: where Clause ---")
+    assert vector_store.memory_filter() is None
+    assert vector_store.memory_filter(org_id=2) == {"org_id": 2}
+    assert vector_store.memory_filter(org_id=2, memory_types=["strategy"], tags=["Goal Success", "ops"]) == {
+        "$and": [
+            {"org_id": 2},
+            {"memory_type": {"$in": ["strategy"]}},
+            {"$or": [{"tag_goal_success": True}, {"tag_ops": True}]},
+        ]
+    }
+    print("✅ Org / type / tag filters combined into one where clause")
+
+def test_recall_scoped_by_org_type_and_tag():
+    print("\n--- Test: Scoped Recall ---")
+    with MemoryStubNode():
+        vector_store.add_memories([
+            ("Org 1 deploy strategy", {"memory_type": "strategy", "tags": ["deploy"], "org_id": 1}),
+            ("Org 1 deploy mistake", {"memory_type": "mistake", "tags": ["deploy", "rollback"], "org_id": 1}),
+            ("Org 2 deploy strategy", {"memory_type": "strategy", "tags": ["deploy"], "org_id": 2}),
+            ("Unscoped note", {"memory_type": "knowledge", "tags": "misc"}),
+        ])
+
+        everything = vector_store.recall("deploy", k=10)
+        org2 = vector_store.recall("deploy", k=10, org_id=2)
+        org1_strategy = vector_store.recall("deploy", k=10, org_id=1, memory_types=["strategy"])
+        rollback = vector_store.recall("deploy", k=10, tags=["rollback"])
+        default_org = vector_store.recall("note", k=10, org_id=vector_store.DEFAULT_ORG_ID)
+        batched = vector_store.recall_many(["deploy", "deploy plan"], k=10, org_id=2)
+
+    assert len(everything) == 4
+    assert [m["summary"] for m in org2] == ["Org 2 deploy strategy"]
+    assert [m["summary"] for m in org1_strategy] == ["Org 1 deploy strategy"]
+    assert [m["summary"] for m in rollback] == ["Org 1 deploy mistake"]
+    assert "Unscoped note" in [m["summary"] for m in default_org]
+    assert all(len(r) == 1 for r in batched)
+    print("✅ Filters applied inside the vector query")
+
+def test_legacy_memories_backfilled():
+    print("\n--- Test: Metadata Backfill ---")
+    node = MemoryStubNode()
+    collection = node.collection
+    collection.add(
+        ids=["legacy_1"], documents=["Old lesson"], embeddings=[np.random.rand(8).tolist()],
+        metadatas=[{"memory_type": "knowledge", "tags": "goal_failure,execution_error"}]
+    )
+    with node:
+        found = vector_store.recall("Old lesson", k=1, org_id=1, tags=["goal_failure"])
+
+    meta = collection.get(ids=["legacy_1"])["metadatas"][0]
+    assert meta["org_id"] == 1 and meta["tag_execution_error"] is True
+    assert [m["summary"] for m in found] == ["Old lesson"]
+    print("✅ Pre-scoping memories get org_id and tag keys on first load")
+
+if __name__ == "__main__":
+    test_filter_clause()
+    test_recall_scoped_by_org_type_and_tag()
+    test_legacy_memories_backfilled()
@@ -0,0 +1,152 @@
+# test_memory_search.py
+import sys
+import os
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from api.database import Base
+from api.memory_search import ensure_memory_search, fts_query, search_memories
+from api.models import Memory
+
+def _temp_db(rows=0):
+    path = os.path.join(tempfile.mkdtemp(prefix="weion_search_"), "weion.db")
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    db = Session()
+    # Rows written before the index exists are picked up when it is built
+    db.add_all([
+        Memory(id=f"pre-{i}", title=f"Legacy note {i}", context="archived rollout checklist",
+               org_id=1, timestamp=f"2024-01-01T00:00:{i:02d}")
+        for i in range(rows)
+    ])
+    db.commit()
+    ensure_memory_search(engine)
+    return engine, db
+
+def test_fts_query_sanitized():
+    print("\n--- Test: FTS Query ---")
+    assert fts_query("deploy canar*") == '"deploy" "canar"*'
+    assert fts_query('title:"x" OR -y') == '"title" "x" "OR" "y"'
+    assert fts_query("  ::  ") is None
+    print("✅ User text turned into an inert AND / prefix query")
+
+def test_search_and_triggers():
+    print("\n--- Test: Full-Text Search ---")
+    engine, db = _temp_db(rows=3)
+    db.add_all([
+        Memory(id="m1", title="Payments outage", context="Stripe webhook timed out", org_id=1, timestamp="2024-02-01T00:00:00"),
+        Memory(id="m2", title="Deploy checklist", context="Canary first, then payments", org_id=2, timestamp="2024-02-02T00:00:00"),
+        Memory(id="m3", title="Hiring plan", context="Two engineers", org_id=1, timestamp="2024-02-03T00:00:00"),
+    ])
+    db.commit()
+
+    found = search_memories(db, q="payments", sort="relevance")
+    assert [m["id"] for m in found["items"]] == ["m1", "m2"]  # title match ranks first
+    assert [m["id"] for m in search_memories(db, q="payments")["items"]] == ["m2", "m1"]  # newest first
+    assert [m["id"] for m in search_memories(db, q="payments", org_id=2)["items"]] == ["m2"]
+    assert [m["id"] for m in search_memories(db, q="webh*")["items"]] == ["m1"]
+    assert len(search_memories(db, q="rollout")["items"]) == 3
+
+    db.query(Memory).filter(Memory.id == "m3").update({"context": "Payments team hiring"})
+    db.query(Memory).filter(Memory.id == "m1").delete()
+    db.commit()
+    assert sorted(m["id"] for m in search_memories(db, q="payments")["items"]) == ["m2", "m3"]
+    assert search_memories(db, q="stripe")["items"] == []
+    db.close()
+    print("✅ Ranked matches, filters, prefix search; triggers follow updates and deletes")
+
+def test_keyset_pagination():
+    print("\n--- Test: Keyset Pagination ---")
+    engine, db = _temp_db()
+    db.add_all([
+        Memory(id=f"m{i:03d}", title=f"Incident {i}", context="database failover" if i % 2 else "cache miss storm",
+               org_id=1 + i % 3, timestamp=f"2024-03-01T00:{i // 60:02d}:{i % 60:02d}")
+        for i in range(250)
+    ])
+    db.commit()
+
+    for kwargs in ({}, {"org_id": 2}, {"q": "failover"}, {"q": "incident", "sort": "relevance"}, {"q": "storm", "org_id": 3},
+                   {"since": "2024-03-01T00:01:00", "until": "2024-03-01T00:03:00"}):
+        seen, cursor, pages = [], None, 0
+        while True:
+            page = search_memories(db, limit=40, cursor=cursor, **kwargs)
+            seen += [m["id"] for m in page["items"]]
+            pages += 1
+            cursor = page["next_cursor"]
+            if not cursor:
+                break
+        assert len(seen) == len(set(seen)), kwargs
+        expected = search_memories(db, limit=200, **kwargs)["items"]
+        if len(expected) < 200:
+            assert seen == [m["id"] for m in expected], kwargs
+    assert seen == [f"m{i:03d}" for i in range(179, 59, -1)]
+
+    relevance_cursor = search_memories(db, q="incident", sort="relevance", limit=10)["next_cursor"]
+    for bad in ({"cursor": "not-a-cursor"}, {"q": "incident", "cursor": relevance_cursor}, {"sort": "oldest"}):
+        try:
+            search_memories(db, **bad)
+            assert False, "expected ValueError"
+        except ValueError:
+            pass
+
+    with engine.connect() as conn:
+        plan = " ".join(str(r[-1]) for r in conn.execute(text(
+            "EXPLAIN QUERY PLAN SELECT id FROM memories WHERE org_id = 2 AND (timestamp, id) < ('2024-03-01T00:02:00', 'm120') "
+            "ORDER BY timestamp DESC, id DESC LIMIT 41"
+        )))
+    assert "ix_memories_org_timestamp_id" in plan and "TEMP B-TREE" not in plan
+    db.close()
+    print("✅ Pages cover every row once, in order, off the (org_id, timestamp, id) index")
+
+def test_query_order_and_stable_relevance_pages():
+    print("\n--- Test: Search Order & Relevance Paging ---")
+    engine, db = _temp_db()
+    db.add_all([
+        Memory(id=f"r{i:02d}", title=f"Release {i}", context="release notes" + " filler" * i,
+               org_id=1, timestamp=f"2024-04-01T00:00:{i:02d}")
+        for i in range(30)
+    ])
+    db.commit()
+    # Imported last, dated first: the newest rowid but the oldest timestamp
+    db.add(Memory(id="imported", title="Release archive", context="old release notes", org_id=1,
+                  timestamp="2023-01-01T00:00:00"))
+    db.commit()
+
+    def walk(**kwargs):
+        seen, cursor = [], None
+        while True:
+            page = search_memories(db, limit=7, cursor=cursor, **kwargs)
+            seen += [m["id"] for m in page["items"]]
+            cursor = page["next_cursor"]
+            if not cursor:
+                return seen
+
+    assert walk(q="release") == walk()
+    assert walk()[-1] == "imported"
+
+    ranked = [m["id"] for m in search_memories(db, q="release", sort="relevance", limit=200)["items"]]
+    first = search_memories(db, q="release", sort="relevance", limit=10)
+    # Writes between pages change every bm25 score; the walk keeps its first-page snapshot
+    db.add_all([Memory(id=f"new{i}", title="Release release", context="release", org_id=1,
+                       timestamp="2024-05-01T00:00:00") for i in range(5)])
+    db.commit()
+    seen, cursor = [m["id"] for m in first["items"]], first["next_cursor"]
+    while cursor:
+        page = search_memories(db, q="release", sort="relevance", limit=10, cursor=cursor)
+        seen += [m["id"] for m in page["items"]]
+        cursor = page["next_cursor"]
+    db.close()
+
+    assert seen == ranked
+    print("✅ Query results ordered like the listing; relevance pages neither skip nor repeat")
+
+if __name__ == "__main__":
+    test_fts_query_sanitized()
+    test_search_and_triggers()
+    test_keyset_pagination()
+    test_query_order_and_stable_relevance_pages()
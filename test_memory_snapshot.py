@@ -0,0 +1,127 @@
+# test_memory_snapshot.py
+import sys
+import os
+import tempfile
+from unittest.mock import patch
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from memory import vector_store
+from memory.numpy_store import NumpyCollection
+from memory.snapshot import read_header, read_snapshot, write_snapshot
+from tests.support.memory_stub import MemoryStubNode
+
+def test_snapshot_format():
+    print("\n--- Test: Snapshot Format ---")
+    path = os.path.join(tempfile.mkdtemp(prefix="weion_snap_"), "memory.snap")
+    vectors = np.random.rand(3, 8).astype(np.float32)
+    write_snapshot(path, "model-x", ["a", "b", "c"], ["A", "B", "C"], [{"k": 1}, {}, {"tags": "x"}], vectors)
+
+    snap = read_snapshot(path)
+    assert isinstance(snap.embeddings, np.memmap) and snap.header["data_offset"] % 64 == 0
+    assert np.array_equal(snap.embeddings, vectors)
+    assert snap.ids == ["a", "b", "c"] and snap.metadatas[0] == {"k": 1}
+    assert read_header(path)["model"] == "model-x"
+
+    with open(path, "r+b") as f:
+        f.write(b"NOTASNAP")
+    try:
+        read_snapshot(path)
+        assert False, "expected ValueError"
+    except ValueError:
+        pass
+    print("✅ Aligned, memory-mapped embeddings plus compressed records")
+
+def test_export_import_roundtrip():
+    print("\n--- Test: Export / Import ---")
+    path = os.path.join(tempfile.mkdtemp(prefix="weion_snap_"), "memory.snap")
+    with MemoryStubNode() as source:
+        vector_store.add_memories([
+            ("Deploy with canary first", {"memory_type": "strategy", "tags": ["deploy"], "org_id": 2}),
+            ("Rollback failed on schema change", {"memory_type": "mistake", "tags": ["rollback"]}),
+        ])
+        vector_store.recall("canary", k=2)
+        exported_count = vector_store.export_memory(path)
+    assert exported_count == 2
+
+    target = NumpyCollection(path=None, name="target")
+    with MemoryStubNode(target) as node:
+        imported = vector_store.import_memory(path)
+        again = vector_store.import_memory(path)
+        found = vector_store.recall("canary", k=2, org_id=2)
+        hits = node.ledger.hits(target.get(where={"org_id": 2})["ids"][0])
+    assert (imported, again) == (2, 0)
+    assert [m["summary"] for m in found] == ["Deploy with canary first"]
+    assert hits >= 2   # exported hit + the recall above
+    # Only the recall query was encoded: stored vectors came from the snapshot
+    assert node.embedder.encode.call_count == 1
+    exported = source.collection.get(include=["embeddings"])
+    stored = target.get(ids=list(exported["ids"]), include=["embeddings"])
+    assert np.allclose(np.asarray(exported["embeddings"]), stored["embeddings"])
+    print("✅ Memories, scope and recall hits restored without re-encoding")
+
+def test_import_verifies_model_and_dimension():
+    print("\n--- Test: Import Verification ---")
+    folder = tempfile.mkdtemp(prefix="weion_snap_")
+    other_model = os.path.join(folder, "other_model.snap")
+    other_dim = os.path.join(folder, "other_dim.snap")
+    write_snapshot(other_model, "some-other-model", ["a"], ["A"], [{}], np.zeros((1, 8), dtype=np.float32))
+    write_snapshot(other_dim, vector_store.EMBED_MODEL_NAME, ["a"], ["A"], [{}], np.zeros((1, 16), dtype=np.float32))
+
+    with MemoryStubNode(NumpyCollection(path=None, name="verify")):
+        for snap, expected in ((other_model, "some-other-model"), (other_dim, "dimension 16")):
+            try:
+                vector_store.import_memory(snap)
+                assert False, "expected ValueError"
+            except ValueError as e:
+                assert expected in str(e)
+    print("✅ Model name and dimension mismatches rejected")
+
+def test_import_replace_and_budget():
+    print("\n--- Test: Import Replace / Budget ---")
+    path = os.path.join(tempfile.mkdtemp(prefix="weion_snap_"), "memory.snap")
+    metas = [{"memory_type": "strategy" if i < 3 else "knowledge", "score": 1.0, "org_id": 1} for i in range(6)]
+    write_snapshot(path, vector_store.EMBED_MODEL_NAME, [f"s{i}" for i in range(6)], [f"Memory {i}" for i in range(6)],
+                   metas, np.random.rand(6, 8).astype(np.float32))
+
+    store = NumpyCollection(path=None, name="replace")
+    with MemoryStubNode(store):
+        vector_store.add_memory("Local memory", {"memory_type": "knowledge"})
+        with patch("memory.vector_store.MEMORY_BUDGET", 3):
+            imported = vector_store.import_memory(path, replace=True)
+
+    assert imported == 3
+    assert sorted(store.get(include=[])["ids"]) == ["s0", "s1", "s2"]
+    print("✅ replace=True drops the local store, budget keeps the highest-value memories")
+
+def test_empty_snapshot_roundtrip():
+    print("\n--- Test: Empty Snapshot ---")
+    folder = tempfile.mkdtemp(prefix="weion_snap_")
+    for name, vectors in (("list.snap", []), ("zeros.snap", np.zeros((0, 0)))):
+        path = os.path.join(folder, name)
+        write_snapshot(path, "model-x", [], [], [], vectors)
+        for mmap in (True, False):
+            snap = read_snapshot(path, mmap=mmap)
+            assert snap.ids == [] and snap.embeddings.shape == (0, 0) and snap.header["count"] == 0
+
+    path = os.path.join(folder, "empty_store.snap")
+    with MemoryStubNode(NumpyCollection(path=None, name="empty")):
+        assert vector_store.export_memory(path) == 0
+
+    store = NumpyCollection(path=None, name="wiped")
+    with MemoryStubNode(store) as node:
+        vector_store.add_memory("Local memory", {"memory_type": "knowledge"})
+        kept = (vector_store.import_memory(path), store.count())
+        wiped = (vector_store.import_memory(path, replace=True), store.count(), node.ledger.count())
+
+    assert kept + wiped == (0, 1, 0, 0, 0)
+    print("✅ Empty store exports, and an empty import with replace=True clears the store")
+
+if __name__ == "__main__":
+    test_snapshot_format()
+    test_export_import_roundtrip()
+    test_import_verifies_model_and_dimension()
+    test_import_replace_and_budget()
+    test_empty_snapshot_roundtrip()
@@ -0,0 +1,88 @@
+# test_migrations.py
+import sys
+import os
+import tempfile
+from unittest.mock import patch
+
+from sqlalchemy import inspect, text
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from api import migrations
+from api.database import create_db_engine
+from api.migrations import LATEST_VERSION, Migration, current_version, migrate
+
+def _legacy_engine(tmp):
+    """A database from before migrations: goal_executions lacks org_id and every hot index."""
+    engine = create_db_engine(f"sqlite:///{os.path.join(tmp, 'legacy.db')}")
+    with engine.begin() as conn:
+        conn.execute(text("""
+            CREATE TABLE goal_executions (
+                id INTEGER PRIMARY KEY, objective TEXT NOT NULL, status VARCHAR,
+                tasks JSON, current_task_index INTEGER, created_at DATETIME
+            )
+        """))
+        conn.execute(text("INSERT INTO goal_executions (id, objective, status) VALUES (7, 'ship it', 'RUNNING')"))
+    return engine
+
+def test_upgrades_live_database_in_place():
+    print("\n--- Test: Migrate Legacy Database ---")
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = _legacy_engine(tmp)
+        assert current_version(engine) == 0
+
+        applied = migrate(engine)
+        again = migrate(engine)
+
+        inspector = inspect(engine)
+        columns = {c["name"] for c in inspector.get_columns("goal_executions")}
+        indexes = {i["name"] for i in inspector.get_indexes("goal_executions")}
+        with engine.connect() as conn:
+            row = conn.execute(text("SELECT objective, status FROM goal_executions WHERE id = 7")).one()
+            has_fts = conn.execute(text("SELECT 1 FROM sqlite_master WHERE name = 'memories_fts'")).first()
+        version = current_version(engine)
+        engine.dispose()
+
+    assert applied == [m.version for m in migrations.MIGRATIONS]
+    assert again == []
+    assert version == LATEST_VERSION
+    assert {"org_id", "error", "updated_at"} <= columns
+    assert "ix_goal_executions_status_org" in indexes
+    assert tuple(row) == ("ship it", "RUNNING")
+    assert has_fts
+    print("✅ Columns and indexes added to the live table, rows kept, re-run is a no-op")
+
+def test_failed_migration_rolls_back():
+    print("\n--- Test: Failed Migration Rolls Back ---")
+
+    def broken(conn):
+        migrations.create_indexes(conn, "ix_decision_logs_created_at")
+        raise RuntimeError("boom")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_db_engine(f"sqlite:///{os.path.join(tmp, 'fresh.db')}")
+        with engine.begin() as conn:
+            conn.execute(text("CREATE TABLE decision_logs (id INTEGER PRIMARY KEY, created_at DATETIME)"))
+
+        failing = [Migration(1, "broken", broken)] + migrations.MIGRATIONS[1:]
+        with patch("api.migrations.MIGRATIONS", failing):
+            try:
+                migrate(engine)
+                raised = False
+            except RuntimeError:
+                raised = True
+
+        indexes = {i["name"] for i in inspect(engine).get_indexes("decision_logs")}
+        tables = set(inspect(engine).get_table_names())
+        version = current_version(engine)
+        engine.dispose()
+
+    assert raised
+    assert "ix_decision_logs_created_at" not in indexes
+    assert tables == {"decision_logs"}  # create_all was rolled back too
+    assert version == 0
+    print("✅ A failing migration leaves the schema untouched")
+
+if __name__ == "__main__":
+    test_upgrades_live_database_in_place()
+    test_failed_migration_rolls_back()
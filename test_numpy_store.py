@@ -0,0 +1,152 @@
+# test_numpy_store.py
+import sys
+import os
+import tempfile
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from memory import vector_store
+from memory.numpy_store import NumpyCollection, matches
+from tests.support.memory_stub import MemoryStubNode
+
+def _vectors(n, dim=16, seed=0):
+    return np.random.default_rng(seed).random((n, dim), dtype=np.float32)
+
+def test_where_clause():
+    print("\n--- Test: where Evaluation ---")
+    meta = {"org_id": 1, "memory_type": "strategy", "tag_deploy": True}
+    assert matches(meta, {"org_id": 1})
+    assert not matches(meta, {"org_id": 2})
+    assert matches(meta, {"$and": [{"org_id": 1}, {"memory_type": {"$in": ["strategy", "mistake"]}}]})
+    assert matches(meta, {"$or": [{"tag_rollback": True}, {"tag_deploy": True}]})
+    assert not matches(meta, {"tag_rollback": True})
+    print("✅ Chroma where clauses evaluated on metadata")
+
+def test_exact_search_matches_brute_force():
+    print("\n--- Test: Exact Search ---")
+    data = _vectors(300)
+    store = NumpyCollection(path=None, name="t")
+    store.add(ids=[f"m{i}" for i in range(300)], embeddings=data,
+              documents=[f"doc {i}" for i in range(300)],
+              metadatas=[{"org_id": i % 3} for i in range(300)])
+
+    queries = _vectors(4, seed=1)
+    result = store.query(query_embeddings=queries.tolist(), n_results=5)
+    for q, ids in zip(queries, result["ids"]):
+        expected = np.argsort(((data - q) ** 2).sum(axis=1))[:5]
+        assert ids == [f"m{i}" for i in expected]
+
+    filtered = store.query(query_embeddings=[queries[0].tolist()], n_results=5, where={"org_id": 2})
+    assert all(m["org_id"] == 2 for m in filtered["metadatas"][0])
+    assert filtered["documents"][0][0].startswith("doc ")
+    print("✅ Exact L2 top-k equals brute force, filters applied")
+
+def test_update_delete_and_reopen():
+    print("\n--- Test: Persistence ---")
+    path = tempfile.mkdtemp(prefix="weion_np_")
+    store = NumpyCollection(path=path, name="mem")
+    store.add(ids=["a", "b", "c"], embeddings=_vectors(3), documents=["A", "B", "C"],
+              metadatas=[{"k": 1}, {"k": 2}, {"k": 3}])
+    store.update(ids=["b"], metadatas=[{"org_id": 1}])
+    store.delete(ids=["a"])
+    store.add(ids=["d"], embeddings=_vectors(1, seed=5), documents=["D"], metadatas=[{"k": 4}])
+    store.close()
+
+    reopened = NumpyCollection(path=path, name="mem")
+    data = reopened.get(include=["documents", "metadatas", "embeddings"])
+    assert reopened.count() == 3 and sorted(data["ids"]) == ["b", "c", "d"]
+    assert reopened.get(ids=["b"])["metadatas"][0] == {"k": 2, "org_id": 1}
+    d = data["ids"].index("d")
+    assert np.allclose(data["embeddings"][d], _vectors(1, seed=5)[0])
+    assert reopened.query(query_embeddings=_vectors(1, seed=5).tolist(), n_results=1)["ids"][0] == ["d"]
+    print("✅ Metadata merges, deleted slots reused, state survives reopen")
+
+def test_duplicate_ids_and_large_document_reads():
+    print("\n--- Test: Duplicate Ids / Chunked Reads ---")
+    store = NumpyCollection(path=None, name="dups")
+    store.add(ids=["a"], embeddings=_vectors(1), documents=["A"])
+    store.add(ids=["a", "b", "b"], embeddings=_vectors(3, seed=1), documents=["A2", "B", "B2"])
+    assert store.count() == 2
+    assert store.get(ids=["a", "b"])["documents"] == ["A", "B"]  # First write of an id wins
+
+    ids = [f"m{i}" for i in range(2000)]
+    store.add(ids=ids, embeddings=_vectors(2000, seed=2), documents=[f"doc {i}" for i in ids])
+    docs = store.get(ids=ids[::-1])["documents"]
+    assert docs == [f"doc {i}" for i in ids[::-1]]
+    print("✅ Stored and in-batch duplicates skipped; >900 documents fetched in id chunks")
+
+def test_ivf_recall():
+    print("\n--- Test: IVF Search ---")
+    rng = np.random.default_rng(3)
+    centers = rng.random((20, 16), dtype=np.float32) * 10
+    data = (centers[rng.integers(0, 20, 2000)] + rng.random((2000, 16), dtype=np.float32)).astype(np.float32)
+    store = NumpyCollection(path=None, name="ivf", ivf_threshold=500, nprobe=8)
+    for start in range(0, 2000, 250):
+        store.add(ids=[f"m{i}" for i in range(start, start + 250)], embeddings=data[start:start + 250])
+
+    queries = data[rng.integers(0, 2000, 50)] + 0.01
+    result = store.query(query_embeddings=queries, n_results=10)
+    found = 0
+    for q, ids in zip(queries, result["ids"]):
+        expected = {f"m{i}" for i in np.argsort(((data - q) ** 2).sum(axis=1))[:10]}
+        found += len(expected & set(ids))
+    assert store.stats["ivf_trainings"] >= 1 and store.stats["ivf_queries"] == 50
+    assert found / 500 > 0.9
+    print(f"✅ IVF recall@10 = {found / 500:.2f}")
+
+def test_int8_quantization():
+    print("\n--- Test: int8 Quantization ---")
+    data = _vectors(500, dim=32)
+    queries = _vectors(20, dim=32, seed=9)
+    expected = [[f"m{i}" for i in np.argsort(((data - q) ** 2).sum(axis=1))[:5]] for q in queries]
+
+    path = tempfile.mkdtemp(prefix="weion_np_")
+    reranked = NumpyCollection(path=path, name="rr", quantization="int8", rerank_factor=4)
+    compact = NumpyCollection(path=path, name="q8", quantization="int8", rerank_factor=0)
+    for store in (reranked, compact):
+        store.add(ids=[f"m{i}" for i in range(500)], embeddings=data)
+
+    assert reranked.query(query_embeddings=queries, n_results=5)["ids"] == expected
+    approx = compact.query(query_embeddings=queries, n_results=5)["ids"]
+    assert sum(len(set(a) & set(e)) for a, e in zip(approx, expected)) / 100 > 0.8
+    assert compact.storage_bytes() == {"scan_per_vector": 40, "total_per_vector": 40}
+    assert reranked.storage_bytes()["total_per_vector"] == 40 + 128
+    assert not os.path.exists(os.path.join(path, "q8.f32"))
+    compact.close()
+
+    reopened = NumpyCollection(path=path, name="q8", quantization="none")
+    assert reopened.quantization == "int8" and reopened._vectors is None
+    assert reopened.query(query_embeddings=queries, n_results=5)["ids"] == approx
+    assert np.abs(reopened.get(ids=["m0"], include=["embeddings"])["embeddings"][0] - data[0]).max() < 0.01
+    print("✅ int8 codes scanned, float32 re-rank exact, settings kept on reopen")
+
+def test_vector_store_on_numpy_backend():
+    print("\n--- Test: Memory Layer on NumPy Backend ---")
+    store = NumpyCollection(path=None, name="long_term_memory")
+    with MemoryStubNode(store):
+        vector_store.add_memories([
+            ("Org 1 deploy strategy", {"memory_type": "strategy", "tags": ["deploy"], "org_id": 1}),
+            ("Org 2 deploy strategy", {"memory_type": "strategy", "tags": ["deploy"], "org_id": 2}),
+            ("Org 1 rollback mistake", {"memory_type": "mistake", "tags": ["rollback"], "org_id": 1}),
+        ])
+        org2 = vector_store.recall("deploy", k=5, org_id=2)
+        rollback = vector_store.recall_many(["deploy"], k=5, tags=["rollback"])[0]
+        hybrid = vector_store.hybrid_recall("rollback mistake", k=1, org_id=1)
+        evicted = vector_store.compact(1)
+
+    assert [m["summary"] for m in org2] == ["Org 2 deploy strategy"]
+    assert [m["summary"] for m in rollback] == ["Org 1 rollback mistake"]
+    assert [m["summary"] for m in hybrid] == ["Org 1 rollback mistake"]
+    assert evicted == 1 and store.count() == 2
+    print("✅ Add, scoped recall, hybrid recall and compaction work without Chroma")
+
+if __name__ == "__main__":
+    test_where_clause()
+    test_exact_search_matches_brute_force()
+    test_update_delete_and_reopen()
+    test_duplicate_ids_and_large_document_reads()
+    test_ivf_recall()
+    test_int8_quantization()
+    test_vector_store_on_numpy_backend()
@@ -0,0 +1,74 @@
+# test_query_plans.py
+import sys
+import os
+import re
+import tempfile
+
+from sqlalchemy import text
+from sqlalchemy.orm import sessionmaker
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from api.database import create_db_engine
+from api.migrations import migrate
+from api.models import (
+    AtomicTaskCheckpoint, AuditLog, DecisionLog, EmotionalMemory, GoalExecution, GoalPriority,
+    GovernanceVote, OrgPolicy, UserBehaviorSignal, UserPreference,
+)
+
+# The hot queries, written exactly as their call sites issue them
+HOT_QUERIES = {
+    "decision_engine.candidates": lambda db: db.query(GoalExecution).filter(
+        GoalExecution.status.in_(["RUNNING", "PENDING", "PAUSED"]), GoalExecution.org_id == 1),
+    "decision_engine.priorities": lambda db: db.query(GoalPriority).filter(GoalPriority.goal_id.in_([1, 2, 3])),
+    "resume_manager.pending": lambda db: db.query(GoalExecution).filter(
+        GoalExecution.status.in_(["RUNNING", "PENDING"])),
+    "goal_engine.checkpoints": lambda db: db.query(AtomicTaskCheckpoint).filter(
+        AtomicTaskCheckpoint.goal_id == 1).order_by(AtomicTaskCheckpoint.task_index),
+    "emotion_engine.current": lambda db: db.query(EmotionalMemory).filter(
+        EmotionalMemory.user_id == "u").order_by(EmotionalMemory.id.desc()).limit(1),
+    "narrative_engine.audit": lambda db: db.query(AuditLog).filter(
+        AuditLog.entity_id == 1, AuditLog.entity_type == "GOAL").order_by(AuditLog.id.desc()).limit(1),
+    "drift_detector.recent": lambda db: db.query(DecisionLog).order_by(DecisionLog.created_at.desc()).limit(50),
+    "governance.votes": lambda db: db.query(GovernanceVote).order_by(GovernanceVote.timestamp.desc()).limit(10),
+    "preference_learner.signals": lambda db: db.query(UserBehaviorSignal).filter(
+        UserBehaviorSignal.user_id == "u").order_by(UserBehaviorSignal.created_at.desc()),
+    "preference_engine.preference": lambda db: db.query(UserPreference).filter(UserPreference.user_id == "u").limit(1),
+    "policy_engine.active": lambda db: db.query(OrgPolicy).filter(OrgPolicy.active == True),
+}
+
+_FULL_SCAN = re.compile(r"^SCAN \w+$")
+
+def plan_problems(engine, build):
+    """EXPLAIN QUERY PLAN lines that mean a full table scan or a sort of the whole result."""
+    db = sessionmaker(bind=engine)()
+    try:
+        statement = build(db).statement.compile(engine, compile_kwargs={"literal_binds": True})
+        with engine.connect() as conn:
+            plan = [row[3] for row in conn.execute(text(f"EXPLAIN QUERY PLAN {statement}"))]
+    finally:
+        db.close()
+    return [line for line in plan if _FULL_SCAN.match(line) or "TEMP B-TREE" in line]
+
+def test_hot_queries_use_indexes():
+    print("\n--- Test: Hot Query Plans ---")
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_db_engine(f"sqlite:///{os.path.join(tmp, 'plans.db')}")
+        migrate(engine)
+
+        problems = {name: plan_problems(engine, build) for name, build in HOT_QUERIES.items()}
+        problems = {name: lines for name, lines in problems.items() if lines}
+
+        # The check itself: without its index the candidate query is a full scan
+        with engine.begin() as conn:
+            conn.execute(text("DROP INDEX ix_goal_executions_status_org"))
+        engine.dispose()  # Pooled connections cache prepared plans
+        unindexed = plan_problems(engine, HOT_QUERIES["decision_engine.candidates"])
+        engine.dispose()
+
+    assert not problems, f"Hot queries fell back to a full scan / sort: {problems}"
+    assert unindexed == ["SCAN goal_executions"], unindexed
+    print(f"✅ {len(HOT_QUERIES)} hot queries are served by indexes")
+
+if __name__ == "__main__":
+    test_hot_queries_use_indexes()
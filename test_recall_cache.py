@@ -0,0 +1,68 @@
+# test_recall_cache.py
+import sys
+import os
+from unittest.mock import MagicMock
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from memory import vector_store
+from memory.numpy_store import NumpyCollection
+from memory.recall_cache import RecallCache, recall_key
+from tests.support.memory_stub import MemoryStubNode
+
+def test_cache_generations():
+    print("\n--- Test: Recall Cache Generations ---")
+    cache = RecallCache(max_items=2)
+    key = recall_key("vector", "deploy", 5, tags=["b", "a"])
+    assert key == recall_key("vector", "deploy", 5, tags=["a", "b"])
+
+    cache.put(key, ["m1"], [{"summary": "x"}], cache.generation)
+    ids, memories = cache.get(key)
+    memories[0]["summary"] = "changed"
+    assert ids == ["m1"] and cache.get(key)[1] == [{"summary": "x"}]
+
+    stale = cache.generation
+    cache.invalidate()
+    assert cache.get(key) is None
+    cache.put(key, ["m1"], [], stale)
+    assert cache.get(key) is None
+
+    for q in ("a", "b", "c"):
+        cache.put(recall_key("vector", q, 5), [], [], cache.generation)
+    assert cache.stats()["size"] == 2 and cache.get(recall_key("vector", "a", 5)) is None
+    print("✅ Copies returned, stale generations dropped, LRU bounded")
+
+def test_repeated_recalls_hit_cache_until_write():
+    print("\n--- Test: Write Invalidation ---")
+    store = NumpyCollection(path=None, name="recall_cache")
+    store.query = MagicMock(side_effect=store.query)
+    with MemoryStubNode(store):
+        vector_store.add_memories([
+            ("Deploy with canary first", {"memory_type": "strategy", "org_id": 1}),
+            ("Rollback failed on schema change", {"memory_type": "mistake", "org_id": 1}),
+        ])
+        first = vector_store.recall("deploy", k=2, org_id=1)
+        again = vector_store.recall("deploy", k=2, org_id=1)
+        batch = vector_store.recall_many(["deploy", "rollback"], k=2, org_id=1)
+        queries_before_write = store.query.call_count
+        hits_before_write = vector_store.ledger.stats["hits"]
+
+        vector_store.add_memory("Deploy on Tuesdays only", {"memory_type": "strategy", "org_id": 1})
+        after_write = vector_store.recall("deploy", k=3, org_id=1)
+        after_write_again = vector_store.recall("deploy", k=3, org_id=1)
+        queries_after_write = store.query.call_count
+        stats = vector_store.recall_cache.stats()
+
+    assert first == again == batch[0]
+    # recall (1) + recall_many for the uncached query only (1)
+    assert queries_before_write == 2
+    # Cached recalls still count as recall hits for retention
+    assert hits_before_write == 2 + 2 + 4
+    assert queries_after_write == 3
+    assert len(after_write) == 3 and after_write == after_write_again
+    assert stats["hits"] >= 3 and stats["invalidations"] >= 2
+    print("✅ Repeated recalls served from cache, add_memory invalidates exactly")
+
+if __name__ == "__main__":
+    test_cache_generations()
+    test_repeated_recalls_hit_cache_until_write()
@@ -0,0 +1,61 @@
+# test_recall_many.py
+import sys
+import os
+import time
+from unittest.mock import patch, MagicMock
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from memory import vector_store
+from tests.support.memory_stub import MemoryStubNode
+
+def test_recall_many_matches_recall_in_one_query():
+    print("\n--- Test: recall_many ---")
+    with MemoryStubNode(dim=16) as node:
+        collection, embedder = node.collection, node.embedder
+        vector_store.add_memories([(f"COMPLETED GOAL: objective {i}", {"memory_type": "knowledge"}) for i in range(40)])
+        queries = [f"objective {i % 300}" for i in range(400)]  # 300 distinct, some repeated
+
+        spy = MagicMock(wraps=collection.query)
+        encode_calls = embedder.encode.call_count
+        with patch.object(collection, "query", spy):
+            started = time.perf_counter()
+            batched = vector_store.recall_many(queries, k=3)
+            elapsed = time.perf_counter() - started
+
+        assert spy.call_count == 1
+        assert len(spy.call_args.kwargs["query_embeddings"]) == 300
+        assert embedder.encode.call_count == encode_calls + 1
+        assert len(batched) == len(queries)
+        for i in (0, 17, 299, 350):
+            assert batched[i] == vector_store.recall(queries[i], k=3)
+        assert batched[5] == batched[305]
+
+    print(f"400 queries recalled in {elapsed * 1000:.1f}ms")
+    print("✅ One encode + one vector query, results identical to recall()")
+
+def test_recall_many_edge_cases():
+    print("\n--- Test: recall_many Edge Cases ---")
+    with MemoryStubNode():
+        assert vector_store.recall_many([]) == []
+        assert vector_store.recall_many(["a", "b"]) == [[], []]  # empty collection
+    with patch("memory.vector_store.embedder", None):
+        assert vector_store.recall_many(["a"]) == [[]]
+    print("✅ Empty inputs / store return one empty list per query")
+
+def test_prefetched_evidence_skips_recall():
+    print("\n--- Test: Decision Engine Prefetched Evidence ---")
+    from api.models import GoalPriority
+    from autonomy.decision_engine import adjust_priority_based_on_memory
+
+    prio = GoalPriority(confidence=0.8, risk=0.2)
+    with patch("autonomy.decision_engine.recall") as mock_recall:
+        adjust_priority_based_on_memory(prio, "Ship it", [{"summary": "FAILED GOAL: Ship it", "type": "mistake"}])
+        mock_recall.assert_not_called()
+    assert prio.confidence < 0.8
+    print("✅ Arbitration uses the batched evidence, no per-goal recall")
+
+if __name__ == "__main__":
+    test_recall_many_matches_recall_in_one_query()
+    test_recall_many_edge_cases()
+    test_prefetched_evidence_skips_recall()
@@ -0,0 +1,92 @@
+# test_semantic_cache.py
+import sys
+import os
+import hashlib
+from unittest.mock import patch
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from brain.semantic_cache import SemanticCache, set_semantic_cache
+
+def bag_of_words(text: str) -> np.ndarray:
+    """Deterministic stand-in for MiniLM: hashed word counts."""
+    vector = np.zeros(64, dtype=np.float32)
+    for word in text.split():
+        vector[int(hashlib.md5(word.encode()).hexdigest(), 16) % 64] += 1.0
+    return vector
+
+def test_exact_and_semantic_hits():
+    print("\n--- Test: Semantic Lookup ---")
+    calls = []
+    cache = SemanticCache(embed_fn=lambda t: calls.append(t) or bag_of_words(t))
+    ns = "model:planner-v1"
+
+    cache.set("Summarize the error logs from yesterday", "PLAN-A", ns)
+    calls.clear()
+
+    # Whitespace / casing only: exact tier, no embedding needed
+    assert cache.get("  summarize the ERROR logs   from yesterday ", ns, 0.95) == "PLAN-A"
+    assert calls == []
+
+    # One extra word: semantic hit at a loose threshold, miss at a strict one
+    assert cache.get("Summarize the error logs from yesterday please", ns, 0.9) == "PLAN-A"
+    assert cache.get("Summarize the error logs from yesterday please", ns, 0.99) is None
+    # Unrelated prompt
+    assert cache.get("Write a poem about the ocean", ns, 0.9) is None
+    # Other template version never matches
+    assert cache.get("Summarize the error logs from yesterday", "model:planner-v2", 0.5) is None
+
+    stats = cache.stats()[ns]
+    print(f"Stats: {stats}")
+    assert stats["hits_exact"] == 1 and stats["hits_semantic"] == 1 and stats["misses"] == 2
+    assert stats["hit_rate"] == 0.5
+    print("✅ Exact, semantic and namespaced lookups behave")
+
+def test_bounded_lru_and_ttl():
+    print("\n--- Test: Bounded Index ---")
+    cache = SemanticCache(max_entries=3, embed_fn=bag_of_words)
+    ns = "model:v1"
+    for i in range(3):
+        cache.set(f"goal number {i}", f"R{i}", ns)
+    cache.get("goal number 0", ns, 0.99)  # refresh 0
+    cache.set("goal number 3", "R3", ns)    # evicts 1 (least recently used)
+
+    assert cache.get("goal number 0", ns, 0.999) == "R0"
+    assert cache.get("goal number 1", ns, 0.999) is None
+    assert cache.stats()[ns]["entries"] == 3
+    assert cache.stats()[ns]["evictions"] == 1
+
+    expiring = SemanticCache(ttl=1, embed_fn=bag_of_words)
+    expiring.set("goal", "R", ns)
+    with patch("brain.semantic_cache.time.time", return_value=10**12):
+        assert expiring.get("goal", ns, 0.5) is None
+    assert expiring.stats()[ns]["expired"] == 1
+    print("✅ LRU eviction and TTL enforced")
+
+def test_decomposer_reuses_near_duplicate_goal():
+    print("\n--- Test: Decomposer Semantic Reuse ---")
+    from autonomy.task_decomposer import decompose_goal
+
+    answer = '{"strategy_explanation": "s", "tasks": ["Read logs", "Write report"]}'
+    set_semantic_cache(SemanticCache(embed_fn=bag_of_words))
+    try:
+        with patch("brain.model.get_cached", return_value=None), \
+             patch("brain.model.set_cache"), \
+             patch("brain.model._call", return_value={"response": answer}) as mock_call:
+            first = decompose_goal("Audit the auth service logs and summarize failed login attempts by region and hour for 2026-10-16")
+            second = decompose_goal("Audit the auth service logs and summarize failed login attempts by region and hour for 2026-10-17")
+            third = decompose_goal("Plan a marketing launch")
+    finally:
+        set_semantic_cache(None)
+
+    assert first == second
+    assert mock_call.call_count == 2  # first + unrelated third goal
+    assert third["tasks"] == ["Read logs", "Write report"]
+    print("✅ Near-identical goal served from the semantic tier")
+
+if __name__ == "__main__":
+    test_exact_and_semantic_hits()
+    test_bounded_lru_and_ttl()
+    test_decomposer_reuses_near_duplicate_goal()
@@ -0,0 +1,87 @@
+# tests/support/memory_stub.py
+
+import uuid
+from typing import Any, List, Optional
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+
+from memory import vector_store
+from memory.embedding_cache import EmbeddingCache
+from memory.lexical_index import BM25Index
+from memory.recall_cache import RecallCache
+from memory.retention import MemoryLedger
+
+
+def fake_embedder(dim: int = 8) -> MagicMock:
+    """
+    Stand-in for the SentenceTransformer: every text always maps to the same random
+    (meaning-free) vector, so recall, recall_many and re-ingestion see identical embeddings.
+    """
+    def encode(texts, **kw):
+        rows = [np.random.default_rng(sum(map(ord, t))).random(dim, dtype=np.float32) for t in texts]
+        return np.stack(rows) if rows else np.zeros((0, dim), dtype=np.float32)
+
+    embedder = MagicMock()
+    embedder.encode.side_effect = encode
+    embedder.get_sentence_embedding_dimension.return_value = dim
+    return embedder
+
+
+def chroma_collection():
+    """A fresh, empty in-memory Chroma collection."""
+    import chromadb
+    return chromadb.EphemeralClient().get_or_create_collection(f"test_{uuid.uuid4().hex}")
+
+
+class MemoryStubNode:
+    """
+    In-process memory node for tests: swaps every module-level singleton of
+    memory.vector_store (store, embedder, caches, ledger, lexical index) for a fresh one,
+    so tests neither load the embedding model nor share state. A new vector_store
+    singleton only needs adding here.
+
+    Usage:
+        with MemoryStubNode() as node:
+            vector_store.add_memory("...", {...})
+            assert node.collection.count() == 1
+
+    overrides: further vector_store globals to patch, e.g. MEMORY_BUDGET=10.
+    """
+
+    def __init__(
+        self,
+        collection: Any = None,
+        embedder: Any = None,
+        dim: int = 8,
+        recall_cache: Optional[RecallCache] = None,
+        **overrides: Any,
+    ):
+        self.collection = collection if collection is not None else chroma_collection()
+        self.embedder = embedder if embedder is not None else fake_embedder(dim)
+        self.embedding_cache = EmbeddingCache(vector_store.embedding_cache.encode_fn, "test-model", path=None)
+        self.ledger = MemoryLedger()
+        self.lexical_index = BM25Index()
+        self.recall_cache = recall_cache if recall_cache is not None else RecallCache()
+        self.overrides = overrides
+        self._patches: List[Any] = []
+
+    def __enter__(self) -> "MemoryStubNode":
+        targets = {
+            "collection": self.collection,
+            "embedder": self.embedder,
+            "embedding_cache": self.embedding_cache,
+            "ledger": self.ledger,
+            "lexical_index": self.lexical_index,
+            "recall_cache": self.recall_cache,
+            **self.overrides,
+        }
+        self._patches = [patch(f"memory.vector_store.{name}", value) for name, value in targets.items()]
+        for p in self._patches:
+            p.start()
+        return self
+
+    def __exit__(self, *exc):
+        for p in reversed(self._patches):
+            p.stop()
+        self._patches = []